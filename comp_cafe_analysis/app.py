@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import sys
 import os
 import signal
@@ -8,6 +8,8 @@ from gui.sessions_tab import SessionsTab
 from gui.tariffs_tab import TariffsTab
 from gui.receipts_tab import ReceiptsTab
 from gui.analysis_tab import AnalysisTab
+from gui.task_executor import TaskExecutor
+from gui.query_stats_window import QueryStatsWindow
 
 class InternetCafeApp:
     def __init__(self, root):
@@ -24,7 +26,21 @@ class InternetCafeApp:
         # Инициализация базы данных
         self.db = InternetCafeDatabase()
         
+        # Общий пул фоновых задач для запросов к базе данных
+        self.executor = TaskExecutor(self.root)
+        
+        self.setup_menu()
         self.setup_ui()
+        self.show_migration_problems()
+
+    def show_migration_problems(self):
+        """Предупреждение о непримененных миграциях и проблемах схемы"""
+        if self.db.migration_problems:
+            messagebox.showwarning(
+                "Миграции базы данных",
+                "\n\n".join(self.db.migration_problems)
+                + "\n\nЧасть функций (например, анализ выручки) может работать некорректно."
+            )
 
     def setup_styles(self):
         """Настройка стилей для увеличения масштаба"""
@@ -57,31 +73,53 @@ class InternetCafeApp:
         style.configure('TNotebook', font=('Arial', 11))
         style.configure('TNotebook.Tab', font=('Arial', 11, 'bold'), padding=[15, 5])
 
+    def setup_menu(self):
+        """Меню "Сервис": статистика запросов к базе данных (также по F12)"""
+        self.query_stats_window = None
+        menubar = tk.Menu(self.root)
+        service_menu = tk.Menu(menubar, tearoff=0)
+        service_menu.add_command(label="Статистика запросов", accelerator="F12",
+                                 command=self.show_query_stats)
+        menubar.add_cascade(label="Сервис", menu=service_menu)
+        self.root.config(menu=menubar)
+        self.root.bind('<F12>', lambda event: self.show_query_stats())
+
+    def show_query_stats(self):
+        """Окно статистики запросов; повторный вызов обновляет уже открытое окно"""
+        if self.query_stats_window is not None and self.query_stats_window.exists():
+            self.query_stats_window.show()
+        else:
+            self.query_stats_window = QueryStatsWindow(self.root, self.db.query_stats)
+
     def setup_ui(self):
         # Создание вкладок
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Вкладка сеансов
-        self.sessions_tab = SessionsTab(notebook, self.db)
+        self.sessions_tab = SessionsTab(notebook, self.db, self.executor)
         notebook.add(self.sessions_tab.frame, text="Сеансы")
         
         # Вкладка тарифов
-        self.tariffs_tab = TariffsTab(notebook, self.db)
+        self.tariffs_tab = TariffsTab(notebook, self.db, self.executor)
         notebook.add(self.tariffs_tab.frame, text="Тарифы")
         
         # Вкладка квитанций
-        self.receipts_tab = ReceiptsTab(notebook, self.db)
+        self.receipts_tab = ReceiptsTab(notebook, self.db, self.executor)
         notebook.add(self.receipts_tab.frame, text="Квитанции")
 
         # Вкладка анализа эффективности
-        self.analysis_tab = AnalysisTab(notebook, self.db)
+        self.analysis_tab = AnalysisTab(notebook, self.db, self.executor)
         notebook.add(self.analysis_tab.frame, text="Анализ эффективности")
 
     def on_closing(self):
         """Обработчик закрытия приложения"""
         print("Завершение работы приложения...")
         
+        # Отменяем фоновые задачи и дожидаемся выполняющихся до закрытия соединений
+        if hasattr(self, 'executor'):
+            self.executor.shutdown(wait=True)
+        
         try:
             # Закрываем соединение с базой данных
             if hasattr(self, 'db') and self.db:
@@ -0,0 +1,82 @@
+from bisect import bisect_right
+
+# Тарифные периоды в секундах от полуночи даты соединения.
+# Сеанс не длиннее суток, поэтому достаточно описать два дня подряд.
+DAY = 'day'
+EVENING = 'evening'
+NIGHT = 'night'
+
+_HOUR = 3600
+_DAY_SECONDS = 24 * _HOUR
+
+_BANDS = []
+for _offset in (0, _DAY_SECONDS):
+    _BANDS.extend([
+        (EVENING, _offset, _offset + 2 * _HOUR),                 # 00:00-02:00
+        (NIGHT, _offset + 2 * _HOUR, _offset + 6 * _HOUR),       # 02:00-06:00
+        (DAY, _offset + 6 * _HOUR, _offset + 20 * _HOUR),        # 06:00-20:00
+        (EVENING, _offset + 20 * _HOUR, _offset + 24 * _HOUR),   # 20:00-24:00
+    ])
+
+
+def _ceil_div(a, b):
+    """Целочисленное деление с округлением вверх"""
+    return -(-a // b)
+
+
+class SessionBilling:
+    @staticmethod
+    def split_minutes(start_time, end_time):
+        """Разбиение сеанса на минуты по тарифным периодам
+
+        Возвращает (всего минут, {период: минуты}). Минута тарифицируется по
+        часу, в котором она начинается, как и при поминутном обходе.
+        """
+        start = start_time.hour * _HOUR + start_time.minute * 60 + start_time.second
+        end = end_time.hour * _HOUR + end_time.minute * 60 + end_time.second
+
+        # Если время окончания раньше времени начала, сеанс перешел на следующий день
+        if end_time < start_time:
+            end += _DAY_SECONDS
+
+        total_minutes = (end - start) // 60
+        minutes = {DAY: 0, EVENING: 0, NIGHT: 0}
+
+        for band, band_start, band_end in _BANDS:
+            # Количество k в [0, total_minutes), для которых start + 60k попадает в [band_start, band_end)
+            first = max(0, _ceil_div(band_start - start, 60))
+            last = min(total_minutes, _ceil_div(band_end - start, 60))
+            if last > first:
+                minutes[band] += last - first
+
+        return total_minutes, minutes
+
+    @staticmethod
+    def calculate_cost(tariff, start_time, end_time):
+        """Расчет (минуты, стоимость) сеанса по тарифу (стоимость, вечер, ночь)"""
+        cost_per_minute, discount_evening, discount_night = tariff[0], tariff[1], tariff[2]
+        total_minutes, minutes = SessionBilling.split_minutes(start_time, end_time)
+
+        total_cost = (cost_per_minute * minutes[DAY]
+                      + discount_evening * minutes[EVENING]
+                      + discount_night * minutes[NIGHT])
+
+        return total_minutes, round(total_cost, 2)
+
+
+class TariffTimeline:
+    def __init__(self, rows):
+        """rows - последовательность (дата действия, стоимость, вечер, ночь)"""
+        ordered = sorted(rows, key=lambda row: row[0])
+        self.dates = [row[0] for row in ordered]
+        self.rates = [tuple(row[1:4]) for row in ordered]
+
+    def find(self, connection_date):
+        """Тариф, действующий на указанную дату, или None"""
+        index = bisect_right(self.dates, connection_date)
+        if index == 0:
+            return None
+        return self.rates[index - 1]
+
+    def __len__(self):
+        return len(self.dates)
@@ -0,0 +1,58 @@
+import io
+from psycopg2 import sql
+
+
+def format_copy_value(value):
+    """Представление значения в текстовом формате COPY (NULL - \\N, спецсимволы экранируются)"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+class CopyBuffer(io.TextIOBase):
+    """Файлоподобный объект для COPY FROM STDIN, формирующий строки данных по мере чтения
+
+    Строки берутся из любого итерируемого источника, поэтому в памяти
+    находится только текущая порция текста, а не весь набор данных.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ''
+        self.rows_count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        """Чтение следующей порции текста не короче size символов (если данные есть)"""
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.buffer += '\t'.join(format_copy_value(value) for value in row) + '\n'
+            self.rows_count += 1
+
+        if size < 0:
+            chunk, self.buffer = self.buffer, ''
+        else:
+            chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+def copy_rows(cursor, table, columns, rows, buffer_size=65536):
+    """Массовая загрузка строк в таблицу через COPY FROM STDIN
+
+    Выполняется в транзакции переданного курсора. Возвращает число загруженных строк.
+    """
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+    )
+    buffer = CopyBuffer(rows)
+    cursor.copy_expert(query, buffer, size=buffer_size)
+    return buffer.rows_count
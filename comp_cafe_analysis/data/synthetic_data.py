@@ -0,0 +1,170 @@
+import argparse
+from datetime import date, timedelta
+import numpy as np
+
+# Те же варианты, что и в SampleData
+START_MINUTES = np.array([0, 15, 30, 45])
+DURATIONS = np.array([30, 45, 60, 90, 120, 180, 240])
+SEASON_MONTHS = np.array([6, 7, 8, 12, 1])
+
+ORGANIZATIONS = [
+    "ООО 'ТехноСервис'", "ИП Иванов А.С.", "ООО 'Компьютерный Мир'",
+    "ИП Петрова М.К.", "ООО 'ИТ Решения'", "ИП Сидоров В.П.",
+    "ООО 'ГеймЛэнд'", "ИП Козлов Д.В.", "ООО 'КиберЗона'", "ИП Николаева Е.С."
+]
+ADDRESSES = [
+    "г. Москва, ул. Ленина, д. 10", "г. Москва, пр. Мира, д. 25",
+    "г. Москва, ул. Пушкина, д. 15", "г. Москва, б-р Космонавтов, д. 8",
+    "г. Москва, ул. Гагарина, д. 33", "г. Москва, ул. Тверская, д. 20"
+]
+OPERATORS = ["Иванова А.И.", "Петров С.М.", "Сидорова Е.К.", "Козлов Д.В.", "Николаева С.П."]
+
+# Время суток в формате ЧЧ:ММ для каждой минуты
+TIME_STRINGS = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60)]
+
+
+class SyntheticDataGenerator:
+    """Воспроизводимая генерация больших объемов сеансов и квитанций на NumPy
+
+    Распределения повторяют SampleData: в выходные больше посетителей, летом
+    и зимой - в 1,3 раза больше. Коэффициент scale умножает дневное число
+    сеансов и квитанций. Данные генерируются блоками по chunk_days дней в виде
+    массивов столбцов; при одинаковых параметрах результат одинаков.
+    """
+
+    def __init__(self, seed=None, scale=1.0, computers=8,
+                 start_date=date(2023, 1, 1), end_date=date(2025, 11, 30), chunk_days=30):
+        self.seed = seed
+        self.scale = scale
+        self.computers = computers
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunk_days = chunk_days
+
+        # IP-адреса компьютеров: 192.168.1.101, 192.168.1.102, ... с переходом в следующую подсеть
+        self.ip_addresses = [None] + [
+            f"192.168.{1 + (100 + computer) // 256}.{(100 + computer) % 256}"
+            for computer in range(1, computers + 1)
+        ]
+
+    def days(self):
+        """Массив всех дат периода (datetime64[D])"""
+        return np.arange(np.datetime64(self.start_date), np.datetime64(self.end_date + timedelta(days=1)))
+
+    @staticmethod
+    def is_weekend(days):
+        """Признак выходного дня для массива дат"""
+        # 1970-01-01 - четверг, поэтому сдвигаем на 3 дня к понедельнику
+        return (days.astype('int64') + 3) % 7 >= 5
+
+    @staticmethod
+    def is_season(days):
+        """Признак сезона повышенной посещаемости (лето и зима)"""
+        months = days.astype('datetime64[M]').astype('int64') % 12 + 1
+        return np.isin(months, SEASON_MONTHS)
+
+    def _scaled(self, counts):
+        """Применение коэффициента масштаба к дневным количествам"""
+        return np.floor(counts * self.scale).astype('int64')
+
+    def _chunks(self, seed_offset):
+        """Блоки дат и генератор случайных чисел для каждого блока"""
+        seed_sequence = np.random.SeedSequence(self.seed, spawn_key=(seed_offset,))
+        rng = np.random.default_rng(seed_sequence)
+        days = self.days()
+        for start in range(0, len(days), self.chunk_days):
+            yield days[start:start + self.chunk_days], rng
+
+    def iter_session_chunks(self):
+        """Генерация сеансов блоками: словари массивов столбцов"""
+        for days, rng in self._chunks(0):
+            weekend = self.is_weekend(days)
+            counts = np.where(weekend,
+                              rng.integers(25, 36, len(days)),
+                              rng.integers(15, 26, len(days)))
+            counts = np.where(self.is_season(days), np.floor(counts * 1.3), counts)
+            counts = self._scaled(counts)
+            total = int(counts.sum())
+
+            start = rng.integers(8, 24, total) * 60 + rng.choice(START_MINUTES, total)
+            yield {
+                'computer_number': rng.integers(1, self.computers + 1, total),
+                'connection_date': np.repeat(days, counts),
+                'start_minute': start,
+                'end_minute': (start + rng.choice(DURATIONS, total)) % (24 * 60),
+            }
+
+    def iter_session_rows(self):
+        """Сеансы в виде кортежей (компьютер, IP, дата, начало, окончание) для массовой загрузки"""
+        for chunk in self.iter_session_chunks():
+            dates = chunk['connection_date'].astype(str).tolist()
+            for computer, connection_date, start, end in zip(
+                    chunk['computer_number'].tolist(), dates,
+                    chunk['start_minute'].tolist(), chunk['end_minute'].tolist()):
+                yield (computer, self.ip_addresses[computer], connection_date,
+                       TIME_STRINGS[start], TIME_STRINGS[end])
+
+    def iter_receipt_chunks(self):
+        """Генерация квитанций блоками: словари массивов столбцов"""
+        for days, rng in self._chunks(1):
+            weekend = self.is_weekend(days)
+            counts = np.where(weekend,
+                              rng.integers(2, 6, len(days)),
+                              rng.integers(1, 5, len(days)))
+            counts = self._scaled(counts)
+            total = int(counts.sum())
+
+            receipt_dates = np.repeat(days, counts)
+            # Сумма растет с каждым годом периода (инфляция + рост бизнеса)
+            years = receipt_dates.astype('datetime64[Y]').astype('int64') + 1970
+            year_factor = 1.0 + (years - self.start_date.year) * 0.15
+            amounts = np.round(rng.uniform(600, 6000, total) * year_factor, 2)
+
+            yield {
+                'organization': rng.integers(0, len(ORGANIZATIONS), total),
+                'address': rng.integers(0, len(ADDRESSES), total),
+                'phone': rng.integers([10, 100, 10, 10], [100, 1000, 100, 100], (total, 4)),
+                'receipt_date': receipt_dates,
+                'total_minutes': (amounts / rng.uniform(1.8, 3.2, total)).astype('int64'),
+                'total_amount': amounts,
+                'operator': rng.integers(0, len(OPERATORS), total),
+                'shift_number': rng.integers(1, 4, total),
+            }
+
+    def iter_receipt_rows(self):
+        """Квитанции в виде кортежей в порядке столбцов таблицы receipts"""
+        for chunk in self.iter_receipt_chunks():
+            dates = chunk['receipt_date'].astype(str).tolist()
+            for organization, address, phone, receipt_date, minutes, amount, operator, shift in zip(
+                    chunk['organization'].tolist(), chunk['address'].tolist(),
+                    chunk['phone'].tolist(), dates, chunk['total_minutes'].tolist(),
+                    chunk['total_amount'].tolist(), chunk['operator'].tolist(),
+                    chunk['shift_number'].tolist()):
+                yield (ORGANIZATIONS[organization], ADDRESSES[address],
+                       "+7 9{} {}-{}-{}".format(*phone), receipt_date,
+                       minutes, amount, OPERATORS[operator], shift)
+
+
+def main():
+    """Загрузка синтетических данных в базу: python -m data.synthetic_data --seed 1 --scale 400"""
+    from database import InternetCafeDatabase
+
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных интернет-кафе")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--computers', type=int, default=8)
+    parser.add_argument('--no-receipts', action='store_true')
+    args = parser.parse_args()
+
+    generator = SyntheticDataGenerator(seed=args.seed, scale=args.scale, computers=args.computers)
+    db = InternetCafeDatabase()
+    try:
+        print(f"Загружено {db.import_sessions(generator.iter_session_rows())} сеансов")
+        if not args.no_receipts:
+            print(f"Загружено {db.import_receipts(generator.iter_receipt_rows())} квитанций")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
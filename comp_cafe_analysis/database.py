@@ -1,144 +1,169 @@
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import os
+from contextlib import contextmanager
 from datetime import datetime, date, time
 from data.sample_data import SampleData
 import random
 from decimal import Decimal
+from billing import SessionBilling, TariffTimeline
+from db_pool import ConnectionPool
+from migration_runner import apply_migrations
+from migrations import MIGRATIONS
+from bulk_loader import copy_rows
+from query_stats import QueryStats
+from prepared_statements import PreparedStatementCache
+
+# Столбцы таблиц в порядке полей кортежей демонстрационных и импортируемых данных
+SESSION_COLUMNS = ('computer_number', 'ip_address', 'connection_date', 'start_time', 'end_time')
+TARIFF_COLUMNS = ('effective_date', 'cost_per_minute', 'discount_evening', 'discount_night')
+RECEIPT_COLUMNS = ('organization_name', 'address', 'phone', 'receipt_date',
+                   'total_minutes', 'total_amount', 'operator_name', 'shift_number')
+RECEIPT_SESSION_COLUMNS = ('receipt_id', 'session_id', 'session_minutes', 'session_cost')
 
 class InternetCafeDatabase:
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        self.query_stats = QueryStats()
+        self.prepared_statements = PreparedStatementCache()
+        self.tariff_timeline = None
+        # Ошибки миграций - показываются пользователю при запуске
+        self.migration_problems = []
         self.connect()
         self.create_tables()
+        self.apply_migrations()
         self.prefill_data()
     
     def connect(self):
-        """Подключение к PostgreSQL базе данных"""
+        """Подключение к PostgreSQL базе данных через пул соединений"""
         try:
-            self.connection = psycopg2.connect(
+            self.pool = ConnectionPool(
+                minconn=1,
+                maxconn=int(os.getenv('DB_POOL_SIZE', '5')),
                 host=os.getenv('DB_HOST', 'localhost'),
                 database=os.getenv('DB_NAME', 'internet_cafe_db'),
                 user=os.getenv('DB_USER', 'postgres'),
                 password=os.getenv('DB_PASSWORD', 'magnususer'),
-                port=os.getenv('DB_PORT', '5432')
+                port=os.getenv('DB_PORT', '5432'),
+                cursor_factory=self.query_stats.cursor_factory(),
+                on_discard=self.prepared_statements.forget
             )
             print("Подключение к PostgreSQL установлено")
         except Exception as e:
             print(f"Ошибка подключения к базе данных: {e}")
     
+    @contextmanager
+    def get_connection(self, autocommit=False):
+        """Получение соединения из пула на время блока with"""
+        with self.pool.connection(autocommit=autocommit) as connection:
+            yield connection
+    
+    @contextmanager
+    def transaction(self):
+        """Транзакция из нескольких запросов; курсор закрывается, транзакция фиксируется при выходе"""
+        with self.pool.transaction() as cursor:
+            yield cursor
+    
     def create_tables(self):
         """Создание всех необходимых таблиц"""
         try:
-            cursor = self.connection.cursor()
+            with self.transaction() as cursor:
+                # Таблица сеансов
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        session_id SERIAL PRIMARY KEY,
+                        computer_number INTEGER NOT NULL,
+                        ip_address VARCHAR(15) NOT NULL,
+                        connection_date DATE NOT NULL,
+                        start_time TIME NOT NULL,
+                        end_time TIME NOT NULL,
+                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
             
-            # Таблица сеансов
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    session_id SERIAL PRIMARY KEY,
-                    computer_number INTEGER NOT NULL,
-                    ip_address VARCHAR(15) NOT NULL,
-                    connection_date DATE NOT NULL,
-                    start_time TIME NOT NULL,
-                    end_time TIME NOT NULL,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                # Таблица тарифов
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS tariffs (
+                        tariff_id SERIAL PRIMARY KEY,
+                        effective_date DATE NOT NULL,
+                        cost_per_minute DECIMAL(10,2) NOT NULL,
+                        discount_evening DECIMAL(10,2) NOT NULL,
+                        discount_night DECIMAL(10,2) NOT NULL,
+                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
             
-            # Таблица тарифов
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tariffs (
-                    tariff_id SERIAL PRIMARY KEY,
-                    effective_date DATE NOT NULL,
-                    cost_per_minute DECIMAL(10,2) NOT NULL,
-                    discount_evening DECIMAL(10,2) NOT NULL,
-                    discount_night DECIMAL(10,2) NOT NULL,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                # Таблица квитанций
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS receipts (
+                        receipt_id SERIAL PRIMARY KEY,
+                        organization_name VARCHAR(255) NOT NULL,
+                        address TEXT NOT NULL,
+                        phone VARCHAR(20) NOT NULL,
+                        receipt_date DATE NOT NULL,
+                        total_minutes INTEGER NOT NULL,
+                        total_amount DECIMAL(10,2) NOT NULL,
+                        operator_name VARCHAR(100) NOT NULL,
+                        shift_number INTEGER NOT NULL,
+                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
             
-            # Таблица квитанций
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS receipts (
-                    receipt_id SERIAL PRIMARY KEY,
-                    organization_name VARCHAR(255) NOT NULL,
-                    address TEXT NOT NULL,
-                    phone VARCHAR(20) NOT NULL,
-                    receipt_date DATE NOT NULL,
-                    total_minutes INTEGER NOT NULL,
-                    total_amount DECIMAL(10,2) NOT NULL,
-                    operator_name VARCHAR(100) NOT NULL,
-                    shift_number INTEGER NOT NULL,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                # Таблица связи квитанций и сеансов
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS receipt_sessions (
+                        id SERIAL PRIMARY KEY,
+                        receipt_id INTEGER REFERENCES receipts(receipt_id) ON DELETE CASCADE,
+                        session_id INTEGER REFERENCES sessions(session_id) ON DELETE CASCADE,
+                        session_minutes INTEGER NOT NULL,
+                        session_cost DECIMAL(10,2) NOT NULL
+                    )
+                """)
             
-            # Таблица связи квитанций и сеансов
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS receipt_sessions (
-                    id SERIAL PRIMARY KEY,
-                    receipt_id INTEGER REFERENCES receipts(receipt_id) ON DELETE CASCADE,
-                    session_id INTEGER REFERENCES sessions(session_id) ON DELETE CASCADE,
-                    session_minutes INTEGER NOT NULL,
-                    session_cost DECIMAL(10,2) NOT NULL
-                )
-            """)
-            
-            self.connection.commit()
-            cursor.close()
             print("Таблицы успешно созданы")
             
         except Exception as e:
             print(f"Ошибка создания таблиц: {e}")
 
+    def apply_migrations(self):
+        """Применение версионированных миграций схемы (индексы и т.п.)"""
+        try:
+            apply_migrations(self, MIGRATIONS)
+        except Exception as e:
+            self.migration_problems = [f"Ошибка применения миграций: {e}"]
+            print(self.migration_problems[0])
+
     def prefill_data(self):
         """Заполнение базы данных демонстрационными данными"""
         try:
-            cursor = self.connection.cursor()
+            with self.transaction() as cursor:
+                # Проверка существования данных
+                cursor.execute("SELECT COUNT(*) FROM sessions")
+                sessions_count = cursor.fetchone()[0]
             
-            # Проверка существования данных
-            cursor.execute("SELECT COUNT(*) FROM sessions")
-            sessions_count = cursor.fetchone()[0]
-            
-            if sessions_count == 0:
-                sample_data = SampleData()
+                if sessions_count == 0:
+                    sample_data = SampleData()
                 
-                print("Добавление демонстрационных данных...")
+                    print("Добавление демонстрационных данных...")
                 
-                # Вставка сеансов
-                cursor.executemany("""
-                    INSERT INTO sessions (computer_number, ip_address, connection_date, start_time, end_time)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, sample_data.sessions)
-                print(f"Добавлено {len(sample_data.sessions)} сеансов")
+                    # Массовая загрузка через COPY вместо построчных INSERT
+                    count = copy_rows(cursor, 'sessions', SESSION_COLUMNS, sample_data.sessions)
+                    print(f"Добавлено {count} сеансов")
                 
-                # Вставка тарифов
-                cursor.executemany("""
-                    INSERT INTO tariffs (effective_date, cost_per_minute, discount_evening, discount_night)
-                    VALUES (%s, %s, %s, %s)
-                """, sample_data.tariffs)
-                print(f"Добавлено {len(sample_data.tariffs)} тарифов")
+                    count = copy_rows(cursor, 'tariffs', TARIFF_COLUMNS, sample_data.tariffs)
+                    print(f"Добавлено {count} тарифов")
                 
-                # Вставка квитанций
-                cursor.executemany("""
-                    INSERT INTO receipts (organization_name, address, phone, receipt_date, 
-                    total_minutes, total_amount, operator_name, shift_number)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, sample_data.receipts)
-                print(f"Добавлено {len(sample_data.receipts)} квитанций")
+                    count = copy_rows(cursor, 'receipts', RECEIPT_COLUMNS, sample_data.receipts)
+                    print(f"Добавлено {count} квитанций")
                 
-                # Создаем связи между квитанциями и сеансами
-                self.create_receipt_sessions_links(cursor)
+                    # Создаем связи между квитанциями и сеансами
+                    self.create_receipt_sessions_links(cursor)
                 
-                self.connection.commit()
-                print("Демонстрационные данные успешно добавлены")
-            
-            cursor.close()
+                    print("Демонстрационные данные успешно добавлены")
             
         except Exception as e:
             print(f"Ошибка добавления демонстрационных данных: {e}")
-            if self.connection:
-                self.connection.rollback()
     
     def create_receipt_sessions_links(self, cursor):
         """Создание связей между квитанциями и сеансами"""
@@ -152,6 +177,7 @@ class InternetCafeDatabase:
             sessions = cursor.fetchall()
             
             session_index = 0
+            links = []
             
             for receipt in receipts:
                 receipt_id, receipt_date, total_amount = receipt
@@ -182,44 +208,170 @@ class InternetCafeDatabase:
                         # Расчет минут (примерно 1.5-3 руб/минута)
                         session_minutes = int(session_cost / random.uniform(1.5, 3.0))
                         
-                        cursor.execute("""
-                            INSERT INTO receipt_sessions (receipt_id, session_id, session_minutes, session_cost)
-                            VALUES (%s, %s, %s, %s)
-                        """, (receipt_id, session_id, session_minutes, Decimal(str(session_cost))))  # Преобразуем обратно в Decimal
+                        links.append((receipt_id, session_id, session_minutes, Decimal(str(session_cost))))  # Преобразуем обратно в Decimal
                     
                     session_index += 1
             
-            print("Созданы связи между квитанциями и сеансами")
+            # Все связи загружаются одной командой COPY
+            copy_rows(cursor, 'receipt_sessions', RECEIPT_SESSION_COLUMNS, links)
+            print(f"Создано {len(links)} связей между квитанциями и сеансами")
             
         except Exception as e:
             print(f"Ошибка создания связей: {e}")
             raise
     
+    def import_sessions(self, rows):
+        """Массовый импорт сеансов (например, из журналов прошлых периодов) одной транзакцией
+        
+        rows - итерируемый источник кортежей (компьютер, IP, дата, начало, окончание);
+        может быть генератором, строки не накапливаются в памяти. Возвращает число строк.
+        """
+        with self.transaction() as cursor:
+            return copy_rows(cursor, 'sessions', SESSION_COLUMNS, rows)
+    
+    def import_receipts(self, rows):
+        """Массовый импорт квитанций без привязки к сеансам; возвращает число строк"""
+        with self.transaction() as cursor:
+            return copy_rows(cursor, 'receipts', RECEIPT_COLUMNS, rows)
+    
     def execute_query(self, query, params=None):
         """Выполнение запроса и возврат результатов"""
         try:
-            cursor = self.connection.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                cursor.close()
-                return result, columns
-            else:
-                self.connection.commit()
-                cursor.close()
-                return True
+            # Одиночный запрос выполняется в режиме autocommit на соединении из пула
+            with self.get_connection(autocommit=True) as connection:
+                cursor = connection.cursor()
+                try:
+                    if params:
+                        # Часто повторяемые запросы выполняются как подготовленные на сервере
+                        self.prepared_statements.execute(cursor, query, params)
+                    else:
+                        cursor.execute(query)
+                    
+                    if query.strip().upper().startswith('SELECT'):
+                        result = cursor.fetchall()
+                        columns = [desc[0] for desc in cursor.description]
+                        return result, columns
+                    else:
+                        return True
+                finally:
+                    cursor.close()
         except Exception as e:
             print(f"Ошибка выполнения запроса: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
     
+    def get_tariff_timeline(self):
+        """Получение шкалы тарифов (загружается один раз до изменения таблицы)"""
+        if self.tariff_timeline is None:
+            result = self.execute_query("""
+                SELECT effective_date, cost_per_minute, discount_evening, discount_night
+                FROM tariffs
+                ORDER BY effective_date, tariff_id
+            """)
+            if not result:
+                return TariffTimeline([])
+            self.tariff_timeline = TariffTimeline(result[0])
+        return self.tariff_timeline
+    
+    def invalidate_tariff_timeline(self):
+        """Сброс шкалы тарифов после изменения таблицы tariffs"""
+        self.tariff_timeline = None
+    
+    def bill_sessions(self, session_ids):
+        """Расчет (session_id, минуты, стоимость) для списка сеансов одним запросом"""
+        result = self.execute_query("""
+            SELECT session_id, connection_date, start_time, end_time
+            FROM sessions
+            WHERE session_id = ANY(%s)
+            ORDER BY session_id
+        """, (list(session_ids),))
+        if not result:
+            return []
+        return self._bill_session_rows(result[0])
+    
+    def _bill_session_rows(self, rows):
+        """Расчет стоимости уже выбранных строк сеансов по шкале тарифов"""
+        timeline = self.get_tariff_timeline()
+        billed = []
+        for session_id, connection_date, start_time, end_time in rows:
+            tariff = timeline.find(connection_date)
+            if tariff is None:
+                raise ValueError(f"Не найден тариф для даты {connection_date}")
+            minutes, cost = SessionBilling.calculate_cost(tariff, start_time, end_time)
+            billed.append((session_id, minutes, cost))
+        return billed
+    
+    def create_receipt(self, receipt_info, session_ids):
+        """Создание квитанции по выбранным сеансам в одной транзакции
+        
+        receipt_info - (организация, адрес, телефон, дата, оператор, номер смены).
+        Возвращает (receipt_id, общее количество минут, общая сумма).
+        """
+        organization, address, phone, receipt_date, operator, shift = receipt_info
+        requested = sorted(set(session_ids))
+        if not requested:
+            raise ValueError("Не выбрано ни одного сеанса")
+        
+        # Загружаем шкалу тарифов до начала транзакции
+        self.get_tariff_timeline()
+        
+        with self.transaction() as cursor:
+            # Блокируем выбранные сеансы: параллельная квитанция с ними ждет конца транзакции
+            cursor.execute("""
+                SELECT session_id, connection_date, start_time, end_time
+                FROM sessions
+                WHERE session_id = ANY(%s)
+                ORDER BY session_id
+                FOR UPDATE
+            """, (requested,))
+            rows = cursor.fetchall()
+
+            missing = sorted(set(requested) - {row[0] for row in rows})
+            if missing:
+                raise ValueError(f"Сеансы не найдены (возможно, удалены): {', '.join(map(str, missing))}")
+
+            # Связи проверяются отдельным запросом уже после блокировки: его снимок
+            # видит квитанции, зафиксированные, пока мы ждали блокировку
+            cursor.execute("""
+                SELECT DISTINCT session_id
+                FROM receipt_sessions
+                WHERE session_id = ANY(%s)
+                ORDER BY session_id
+            """, (requested,))
+            linked = [row[0] for row in cursor.fetchall()]
+            if linked:
+                raise ValueError(f"Сеансы уже включены в квитанцию: {', '.join(map(str, linked))}")
+
+            billed = self._bill_session_rows(rows)
+
+            total_minutes = sum(minutes for _, minutes, _ in billed)
+            total_cost = sum(cost for _, _, cost in billed)
+            
+            cursor.execute("""
+                INSERT INTO receipts (organization_name, address, phone, receipt_date, 
+                total_minutes, total_amount, operator_name, shift_number)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING receipt_id
+            """, (organization, address, phone, receipt_date,
+                  total_minutes, total_cost, operator, shift))
+            receipt_id = cursor.fetchone()[0]
+            
+            # Все связи с сеансами одним пакетным запросом
+            execute_values(cursor, """
+                INSERT INTO receipt_sessions (receipt_id, session_id, session_minutes, session_cost)
+                VALUES %s
+            """, [(receipt_id, session_id, minutes, cost) for session_id, minutes, cost in billed],
+            page_size=len(billed))
+        
+        return receipt_id, total_minutes, total_cost
+    
+    def execute_query_stream(self, query, params=None, batch_size=1000):
+        """Потоковое выполнение SELECT: генератор пачек строк через серверный курсор"""
+        return self.pool.stream(query, params, batch_size)
+    
     def close(self):
-        """Закрытие соединения с базой данных"""
-        if self.connection:
-            self.connection.close()
+        """Закрытие всех соединений с базой данных и вывод статистики запросов"""
+        if self.pool:
+            self.pool.closeall()
+        self.prepared_statements.clear()
+        if self.query_stats.top(1):
+            print("Статистика запросов (по суммарному времени):")
+            print(self.query_stats.format_summary())
@@ -0,0 +1,131 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from psycopg2 import extensions, pool
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений PostgreSQL с проверкой работоспособности"""
+
+    def __init__(self, minconn=1, maxconn=5, timeout=30, health_check_interval=60,
+                 on_discard=None, **connect_kwargs):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        # Вызывается для каждого закрываемого соединения (сброс связанных с ним кэшей)
+        self.on_discard = on_discard
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        # Семафор ограничивает число одновременно выданных соединений:
+        # при исчерпании пула поток ждет, а не получает PoolError сразу
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._cursor_names = itertools.count(1)
+
+    def getconn(self):
+        """Получение исправного соединения из пула"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pool.PoolError("Превышено время ожидания свободного соединения")
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                self._discard(conn)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        """Возврат соединения в пул (незавершенная транзакция откатывается пулом)"""
+        try:
+            if close or conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn):
+        """Закрытие неисправного соединения и удаление его из пула"""
+        self._last_used.pop(id(conn), None)
+        if self.on_discard:
+            self.on_discard(conn)
+        self._pool.putconn(conn, close=True)
+
+    def _is_healthy(self, conn):
+        """Проверка соединения: закрытые отбрасываются, долго простаивавшие проверяются запросом"""
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            autocommit = conn.autocommit
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.autocommit = autocommit
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def connection(self, autocommit=False):
+        """Контекстная выдача соединения из пула"""
+        conn = self.getconn()
+        broken = False
+        try:
+            conn.autocommit = autocommit
+            yield conn
+        except Exception:
+            broken = bool(conn.closed)
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    @contextmanager
+    def transaction(self):
+        """Явная транзакция из нескольких запросов: commit при успехе, rollback при ошибке"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def stream(self, query, params=None, batch_size=1000):
+        """Потоковое чтение результата через серверный (именованный) курсор
+
+        Строки выдаются списками по batch_size, поэтому в памяти одновременно
+        находится не больше одной пачки. Соединение занято до исчерпания
+        или закрытия генератора.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor(name=f"stream_{next(self._cursor_names)}")
+            cursor.itersize = batch_size
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                # В прерванной ошибкой транзакции курсор закроется при откате
+                if not conn.closed and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_INERROR:
+                    cursor.close()
+
+    def closeall(self):
+        """Закрытие всех соединений пула"""
+        self._last_used.clear()
+        self._pool.closeall()
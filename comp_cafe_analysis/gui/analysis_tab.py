@@ -5,11 +5,14 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import datetime, timedelta
 import numpy as np
 from datetime import date
+from gui.task_executor import TaskExecutor
 
 class AnalysisTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
+        self.analysis_task = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -146,12 +149,11 @@ class AnalysisTab:
             end_date = date(2025, 11, 30)  # Последняя дата в демо-данных
             start_date = end_date - timedelta(days=period_days)
             
-            # Получаем данные о доходах по дням
+            # Доходы по дням берутся из сводной таблицы, которую поддерживают триггеры на receipts
             query = """
-                SELECT receipt_date, SUM(total_amount) as daily_income
-                FROM receipts 
+                SELECT receipt_date, total_amount as daily_income
+                FROM daily_revenue 
                 WHERE receipt_date BETWEEN %s AND %s
-                GROUP BY receipt_date 
                 ORDER BY receipt_date
             """
             result, columns = self.db.execute_query(query, (start_date, end_date))
@@ -201,15 +203,26 @@ class AnalysisTab:
             else:
                 return "Требуется оптимизация процессов. Проанализируйте причины низкой эффективности."
     
+    def load_income_data(self, on_loaded):
+        """Загрузка доходов в фоновом потоке; on_loaded(dates, incomes) вызывается в главном"""
+        # Предыдущая загрузка больше не нужна - ее результат устарел
+        if self.analysis_task:
+            self.analysis_task.cancel()
+        self.analysis_task = self.executor.submit(
+            self.get_income_data, self.get_period_days(),
+            on_success=lambda data: on_loaded(*data),
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Ошибка загрузки данных: {e}")
+        )
+    
     def calculate_analysis(self):
         """Основной расчет анализа"""
+        self.load_income_data(self.show_analysis)
+    
+    def show_analysis(self, dates, incomes):
+        """Расчет показателей по загруженным данным и обновление интерфейса"""
         try:
-            period_days = self.get_period_days()
             alpha = self.alpha_var.get()
             
-            # Получаем данные о доходах
-            dates, incomes = self.get_income_data(period_days)
-            
             if not incomes:
                 # Сбрасываем показатели если нет данных
                 self.max_income_label.config(text="0.00 руб")
@@ -293,10 +306,11 @@ class AnalysisTab:
     
     def update_plot(self):
         """Обновление только графиков без пересчета данных"""
+        self.load_income_data(self.show_plot)
+    
+    def show_plot(self, dates, incomes):
+        """Перерисовка графиков по загруженным данным"""
         try:
-            period_days = self.get_period_days()
-            dates, incomes = self.get_income_data(period_days)
-            
             if incomes:
                 alpha = self.alpha_var.get()
                 max_income, min_income, avg_income, hurwicz_value = self.calculate_hurwicz(incomes, alpha)
@@ -1,13 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import AppointmentValidator
+from gui.paged_tree import KeysetPager, PagedTreeview, SearchPager
+from gui.grid_filters import GridFilterBar, SearchBar
+from gui.autocomplete import EntityPicker
+from gui.task_executor import TaskExecutor
+
+APPOINTMENT_STATUSES = ['Запланировано', 'Завершено', 'Отменено', 'Неявка']
 
 class AppointmentsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
-        self.load_patient_doctor_comboboxes()
     
     def setup_ui(self):
         # Форма информации о назначении
@@ -15,11 +21,12 @@ class AppointmentsTab:
         form_frame.pack(fill='x', padx=5, pady=5)
         
         ttk.Label(form_frame, text="Пациент:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.a_patient = ttk.Combobox(form_frame, width=20)
+        # Подсказки по первым буквам фамилии из общего кэша справочника
+        self.a_patient = EntityPicker(form_frame, self.db.patients_cache, self.executor, width=20)
         self.a_patient.grid(row=0, column=1, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Врач:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
-        self.a_doctor = ttk.Combobox(form_frame, width=20)
+        self.a_doctor = EntityPicker(form_frame, self.db.doctors_cache, self.executor, width=20)
         self.a_doctor.grid(row=0, column=3, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Дата и время (ГГГГ-ММ-ДД ЧЧ:ММ):").grid(row=1, column=0, padx=5, pady=5, sticky='w')
@@ -27,7 +34,7 @@ class AppointmentsTab:
         self.a_datetime.grid(row=1, column=1, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Статус:").grid(row=1, column=2, padx=5, pady=5, sticky='w')
-        self.a_status = ttk.Combobox(form_frame, values=['Запланировано', 'Завершено', 'Отменено', 'Неявка'], width=18)
+        self.a_status = ttk.Combobox(form_frame, values=APPOINTMENT_STATUSES, width=18)
         self.a_status.grid(row=1, column=3, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Диагноз:").grid(row=2, column=0, padx=5, pady=5, sticky='w')
@@ -51,6 +58,22 @@ class AppointmentsTab:
         ttk.Button(button_frame, text="Удалить назначение", command=self.delete_appointment).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Очистить форму", command=self.clear_form).pack(side='left', padx=5)
         
+        # Полнотекстовый поиск по диагнозу, рецепту и примечаниям
+        self.search_bar = SearchBar(self.frame, self.search_appointments)
+        self.search_bar.frame.pack(fill='x', padx=5, pady=5)
+        
+        # Фильтры списка (применяются на сервере)
+        self.filter_bar = GridFilterBar(
+            self.frame, self.db, self.apply_filters,
+            executor=self.executor,
+            date_column='a.appointment_date',
+            patient_column='a.patient_id',
+            doctor_column='a.doctor_id',
+            status_column='a.status',
+            statuses=APPOINTMENT_STATUSES
+        )
+        self.filter_bar.frame.pack(fill='x', padx=5, pady=5)
+        
         # Список назначений
         list_frame = ttk.LabelFrame(self.frame, text="Список назначений")
         list_frame.pack(fill='both', expand=True, padx=5, pady=5)
@@ -62,50 +85,41 @@ class AppointmentsTab:
             self.appointments_tree.heading(col, text=col)
             self.appointments_tree.column(col, width=100)
         
-        self.appointments_tree.pack(fill='both', expand=True)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        self.appointments_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
         self.appointments_tree.bind('<<TreeviewSelect>>', self.on_appointment_select)
         
-        # Загрузка назначений
-        self.load_appointments()
-    
-    def load_patient_doctor_comboboxes(self):
-        """Загрузка имен пациентов и врачей в комбобоксы"""
-        try:
-            # Загрузка пациентов
-            patients_result, _ = self.db.execute_query(
-                "SELECT patient_id, first_name, last_name FROM patients ORDER BY last_name, first_name"
-            )
-            patient_names = [f"{p[1]} {p[2]} (ID: {p[0]})" for p in patients_result]
-            self.a_patient['values'] = patient_names
-            
-            # Загрузка врачей
-            doctors_result, _ = self.db.execute_query(
-                "SELECT doctor_id, first_name, last_name FROM doctors ORDER BY last_name, first_name"
-            )
-            doctor_names = [f"Доктор {d[1]} {d[2]} (ID: {d[0]})" for d in doctors_result]
-            self.a_doctor['values'] = doctor_names
-            
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные комбобоксов: {e}")
-    
-    def load_appointments(self):
-        """Загрузка назначений в дерево"""
-        try:
-            for item in self.appointments_tree.get_children():
-                self.appointments_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
+        # Назначения загружаются страницами по ключу (дата, ID)
+        self.list_pager = KeysetPager(
+            self.db,
+            """
                 SELECT a.appointment_id, p.first_name || ' ' || p.last_name, 
                        d.first_name || ' ' || d.last_name, a.appointment_date, 
                        a.status, a.diagnosis
                 FROM appointments a
                 JOIN patients p ON a.patient_id = p.patient_id
                 JOIN doctors d ON a.doctor_id = d.doctor_id
-                ORDER BY a.appointment_date DESC
-            """)
-            
-            for row in result:
-                self.appointments_tree.insert('', 'end', values=row)
+            """,
+            key_columns=['a.appointment_date', 'a.appointment_id'],
+            key_indexes=[3, 0],
+            id_column='a.appointment_id'
+        )
+        # В результатах поиска последним столбцом идет релевантность - в таблице не выводится
+        self.appointments_view = PagedTreeview(
+            self.appointments_tree, scrollbar, self.list_pager,
+            format_row=lambda row: row[:len(columns)],
+            executor=self.executor,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить назначения: {e}")
+        )
+        
+        # Загрузка назначений
+        self.load_appointments()
+    
+    def load_appointments(self):
+        """Загрузка первой страницы назначений (следующие подгружаются при прокрутке)"""
+        try:
+            self.appointments_view.reload()
                 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось загрузить назначения: {e}")
@@ -115,24 +129,20 @@ class AppointmentsTab:
         try:
             # Валидация данных
             if not AppointmentValidator.validate_appointment_data(
-                self.a_patient.get(),
-                self.a_doctor.get(),
+                self.a_patient.get_id(),
+                self.a_doctor.get_id(),
                 self.a_datetime.get(),
                 self.a_status.get(),
                 self.a_diagnosis.get("1.0", tk.END).strip()
             ):
                 return
                 
-            # Извлечение ID пациента и врача из выбора комбобокса
-            patient_text = self.a_patient.get()
-            doctor_text = self.a_doctor.get()
-            
-            patient_id = int(patient_text.split('(ID: ')[1].rstrip(')')) if patient_text else None
-            doctor_id = int(doctor_text.split('(ID: ')[1].rstrip(')')) if doctor_text else None
+            patient_id = self.a_patient.get_id()
+            doctor_id = self.a_doctor.get_id()
             
             query = """
                 INSERT INTO appointments (patient_id, doctor_id, appointment_date, status, diagnosis, prescription, notes)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING appointment_id
             """
             params = (
                 patient_id,
@@ -144,14 +154,26 @@ class AppointmentsTab:
                 self.a_notes.get("1.0", tk.END).strip()
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Назначение успешно добавлено")
-            self.clear_form()
-            self.load_appointments()
+            self.executor.submit(
+                self.insert_appointment, query, params,
+                on_success=self.on_appointment_added,
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось добавить назначение: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить назначение: {e}")
     
+    def insert_appointment(self, query, params):
+        """Вставка записи (выполняется в рабочем потоке); возвращает ID"""
+        with self.db.transaction() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+    
+    def on_appointment_added(self, appointment_id):
+        messagebox.showinfo("Успех", "Назначение успешно добавлено")
+        self.clear_form()
+        self.appointments_view.refresh_row(appointment_id)
+    
     def update_appointment(self):
         """Обновление выбранного назначения с валидацией"""
         selected = self.appointments_tree.selection()
@@ -162,8 +184,8 @@ class AppointmentsTab:
         try:
             # Валидация данных
             if not AppointmentValidator.validate_appointment_data(
-                self.a_patient.get(),
-                self.a_doctor.get(),
+                self.a_patient.get_id(),
+                self.a_doctor.get_id(),
                 self.a_datetime.get(),
                 self.a_status.get(),
                 self.a_diagnosis.get("1.0", tk.END).strip()
@@ -172,12 +194,8 @@ class AppointmentsTab:
                 
             appointment_id = self.appointments_tree.item(selected[0])['values'][0]
             
-            # Извлечение ID пациента и врача из выбора комбобокса
-            patient_text = self.a_patient.get()
-            doctor_text = self.a_doctor.get()
-            
-            patient_id = int(patient_text.split('(ID: ')[1].rstrip(')')) if patient_text else None
-            doctor_id = int(doctor_text.split('(ID: ')[1].rstrip(')')) if doctor_text else None
+            patient_id = self.a_patient.get_id()
+            doctor_id = self.a_doctor.get_id()
             
             query = """
                 UPDATE appointments SET patient_id=%s, doctor_id=%s, appointment_date=%s, 
@@ -194,13 +212,19 @@ class AppointmentsTab:
                 appointment_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Назначение успешно обновлено")
-            self.load_appointments()
+            self.executor.submit(
+                self.db.execute_query, query, params,
+                on_success=lambda _: self.on_appointment_updated(appointment_id),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось обновить назначение: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить назначение: {e}")
     
+    def on_appointment_updated(self, appointment_id):
+        messagebox.showinfo("Успех", "Назначение успешно обновлено")
+        self.appointments_view.refresh_row(appointment_id)
+    
     def delete_appointment(self):
         """Удаление выбранного назначения"""
         selected = self.appointments_tree.selection()
@@ -211,56 +235,86 @@ class AppointmentsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить это назначение?"):
             try:
                 appointment_id = self.appointments_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM appointments WHERE appointment_id=%s", (appointment_id,))
-                messagebox.showinfo("Успех", "Назначение успешно удалено")
-                self.clear_form()
-                self.load_appointments()
+                self.executor.submit(
+                    self.db.execute_query, "DELETE FROM appointments WHERE appointment_id=%s", (appointment_id,),
+                    on_success=lambda _: self.on_appointment_deleted(appointment_id),
+                    on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить назначение: {e}")
+                )
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить назначение: {e}")
     
+    def on_appointment_deleted(self, appointment_id):
+        messagebox.showinfo("Успех", "Назначение успешно удалено")
+        self.clear_form()
+        self.appointments_view.remove_row(appointment_id)
+    
+    def apply_filters(self, filters):
+        """Установка серверных фильтров и перезагрузка списка"""
+        self.appointments_view.pager.set_filters(filters)
+        self.load_appointments()
+    
+    def search_appointments(self, text):
+        """Полнотекстовый поиск: назначения по убыванию релевантности, пустая строка - обычный список"""
+        if text:
+            pager = SearchPager(
+                self.db,
+                """
+                    SELECT a.appointment_id, p.first_name || ' ' || p.last_name, 
+                           d.first_name || ' ' || d.last_name, a.appointment_date, 
+                           a.status, a.diagnosis, ts_rank(a.search_vector, q)::float8 AS rank
+                    FROM websearch_to_tsquery('russian', %s) q
+                    JOIN appointments a ON a.search_vector @@ q
+                    JOIN patients p ON a.patient_id = p.patient_id
+                    JOIN doctors d ON a.doctor_id = d.doctor_id
+                """,
+                key_columns=['found.rank', 'found.appointment_id'],
+                key_indexes=[6, 0],
+                id_column='found.appointment_id',
+                select_params=[text]
+            )
+        else:
+            pager = self.list_pager
+        # Фильтры панели действуют и на результаты поиска
+        pager.set_filters(self.appointments_view.pager.filters)
+        self.appointments_view.pager = pager
+        self.load_appointments()
+    
     def on_appointment_select(self, event):
         """Заполнение формы при выборе назначения"""
         selected = self.appointments_tree.selection()
         if selected:
             appointment_data = self.appointments_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM appointments WHERE appointment_id=%s", (appointment_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM appointments WHERE appointment_id=%s", (appointment_data[0],),
+                on_success=lambda result: self.fill_form(appointment_data[0], result)
             )
+    
+    def fill_form(self, appointment_id, result):
+        """Заполнение формы загруженной записью, если она все еще выбрана"""
+        selected = self.appointments_tree.selection()
+        if not selected or self.appointments_tree.item(selected[0])['values'][0] != appointment_id:
+            return
+        if result and result[0]:
+            appointment = result[0][0]
+            # Имена пациента и врача подставляются из кэша справочников
+            self.a_patient.set_id(appointment[1])
+            self.a_doctor.set_id(appointment[2])
             
-            if result:
-                appointment = result[0]
-                # Получение имен пациента и врача для комбобоксов
-                patient_result, _ = self.db.execute_query(
-                    "SELECT first_name, last_name FROM patients WHERE patient_id=%s", (appointment[1],)
-                )
-                doctor_result, _ = self.db.execute_query(
-                    "SELECT first_name, last_name FROM doctors WHERE doctor_id=%s", (appointment[2],)
-                )
-                
-                if patient_result:
-                    patient_name = f"{patient_result[0][0]} {patient_result[0][1]} (ID: {appointment[1]})"
-                    self.a_patient.set(patient_name)
-                
-                if doctor_result:
-                    doctor_name = f"Доктор {doctor_result[0][0]} {doctor_result[0][1]} (ID: {appointment[2]})"
-                    self.a_doctor.set(doctor_name)
-                
-                self.a_datetime.delete(0, tk.END)
-                self.a_datetime.insert(0, appointment[3].strftime('%Y-%m-%d %H:%M') if appointment[3] else '')
-                self.a_status.set(appointment[4] or '')
-                self.a_diagnosis.delete("1.0", tk.END)
-                self.a_diagnosis.insert("1.0", appointment[5] or '')
-                self.a_prescription.delete("1.0", tk.END)
-                self.a_prescription.insert("1.0", appointment[6] or '')
-                self.a_notes.delete("1.0", tk.END)
-                self.a_notes.insert("1.0", appointment[7] or '')
+            self.a_datetime.delete(0, tk.END)
+            self.a_datetime.insert(0, appointment[3].strftime('%Y-%m-%d %H:%M') if appointment[3] else '')
+            self.a_status.set(appointment[4] or '')
+            self.a_diagnosis.delete("1.0", tk.END)
+            self.a_diagnosis.insert("1.0", appointment[5] or '')
+            self.a_prescription.delete("1.0", tk.END)
+            self.a_prescription.insert("1.0", appointment[6] or '')
+            self.a_notes.delete("1.0", tk.END)
+            self.a_notes.insert("1.0", appointment[7] or '')
     
     def clear_form(self):
         """Очистка полей формы"""
-        self.a_patient.set('')
-        self.a_doctor.set('')
+        self.a_patient.clear()
+        self.a_doctor.clear()
         self.a_datetime.delete(0, tk.END)
         self.a_status.set('')
         self.a_diagnosis.delete("1.0", tk.END)
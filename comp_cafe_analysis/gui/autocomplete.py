@@ -0,0 +1,180 @@
+from bisect import bisect_left
+from tkinter import ttk, messagebox
+from gui.task_executor import TaskExecutor
+
+# Задержка поиска после нажатия клавиши, мс
+DEBOUNCE_MS = 200
+# Сколько вариантов показывать в выпадающем списке
+MAX_MATCHES = 20
+
+# Текст поля и списка, пока справочник загружается
+LOADING_TEXT = "Загрузка..."
+
+# Клавиши, которые не меняют текст и не должны запускать поиск
+NAVIGATION_KEYS = {'Up', 'Down', 'Left', 'Right', 'Return', 'Tab', 'Escape', 'Home', 'End'}
+
+
+class EntityPicker:
+    """Поле выбора пациента или врача с подсказками по мере ввода
+
+    Подсказки ищутся бинарным поиском по отсортированным ключам
+    "фамилия имя" из EntityCache, в список попадают первые max_matches
+    совпадений по префиксу. Список открывается стрелкой вниз. Выбранный ID
+    хранится отдельно от текста поля и возвращается методом get_id().
+
+    Главный поток только читает уже загруженный кэш (EntityCache.peek).
+    Если кэша нет (первое открытие или сброс после изменений), справочник
+    загружается через executor, а в списке до тех пор показывается
+    "Загрузка...".
+    """
+
+    def __init__(self, parent, cache, executor=None, width=20, max_matches=MAX_MATCHES,
+                 debounce_ms=DEBOUNCE_MS):
+        self.cache = cache
+        self.max_matches = max_matches
+        self.debounce_ms = debounce_ms
+        self.selected_id = None
+        # Текущие варианты списка: пары (подпись, ID)
+        self.matches = []
+        self.pending = None
+        # ID, который нужно выбрать после загрузки справочника (set_id во время загрузки)
+        self.pending_id = None
+        self.loading = False
+
+        # postcommand обновляет варианты перед открытием списка, даже если задержка не истекла
+        self.combobox = ttk.Combobox(parent, width=width, postcommand=self.update_matches)
+        self.combobox.bind('<KeyRelease>', self.on_key)
+        self.combobox.bind('<<ComboboxSelected>>', self.on_selected)
+
+        self.executor = executor or TaskExecutor(self.combobox)
+        # Справочник загружается заранее, чтобы подсказки были готовы к вводу
+        self.request_load()
+
+    def grid(self, **kwargs):
+        self.combobox.grid(**kwargs)
+
+    @staticmethod
+    def format_label(entity_id, first_name, last_name):
+        """Подпись варианта; ID выводится только для различения однофамильцев"""
+        return f"{last_name} {first_name} (ID: {entity_id})"
+
+    def request_load(self):
+        """Загрузка справочника в рабочем потоке, если кэш пуст и загрузка еще не запущена"""
+        if self.loading or self.cache.peek() is not None:
+            return
+        self.loading = True
+        self.executor.submit(self.cache.load, on_success=self.on_loaded, on_error=self.on_load_error)
+
+    def on_load_error(self, error):
+        self.loading = False
+        if self.pending_id is not None:
+            self.clear()
+        messagebox.showerror("Ошибка", f"Не удалось загрузить список для выбора: {error}")
+
+    def on_loaded(self, data):
+        """Справочник загружен: отложенный выбор по ID или обновление подсказок"""
+        self.loading = False
+        if self.pending_id is not None:
+            self.set_id(self.pending_id)
+        elif self.selected_id is None and self.combobox.get():
+            self.update_matches()
+
+    def find(self, prefix):
+        """Первые max_matches записей, у которых "фамилия имя" начинается с prefix
+
+        None, если справочник еще не загружен
+        """
+        data = self.cache.peek()
+        if data is None:
+            return None
+        _, entries, keys = data
+        prefix = prefix.strip().lower()
+        found = []
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and len(found) < self.max_matches and keys[index].startswith(prefix):
+            found.append(entries[index])
+            index += 1
+        return found
+
+    def on_key(self, event):
+        """Изменение текста: сброс выбора и отложенное обновление подсказок"""
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        self.selected_id = None
+        self.pending_id = None
+        if self.pending is not None:
+            self.combobox.after_cancel(self.pending)
+        self.pending = self.combobox.after(self.debounce_ms, self.update_matches)
+
+    def update_matches(self):
+        """Заполнение выпадающего списка вариантами для введенного текста"""
+        if self.pending is not None:
+            self.combobox.after_cancel(self.pending)
+            self.pending = None
+        if self.selected_id is not None:
+            # Текст поля - подпись уже выбранной записи
+            return
+        found = self.find(self.combobox.get())
+        if found is None:
+            self.matches = []
+            self.combobox['values'] = [LOADING_TEXT]
+            self.request_load()
+            return
+        self.matches = [
+            (self.format_label(entity_id, first_name, last_name), entity_id)
+            for entity_id, first_name, last_name in found
+        ]
+        self.combobox['values'] = [label for label, _ in self.matches]
+
+    def on_selected(self, event):
+        """Выбор варианта из списка"""
+        index = self.combobox.current()
+        if 0 <= index < len(self.matches):
+            self.selected_id = self.matches[index][1]
+
+    def get_id(self):
+        """ID выбранной записи или None, если ничего не выбрано"""
+        if self.selected_id is not None:
+            return self.selected_id
+        if self.pending_id is not None:
+            # Выбран через set_id, справочник еще загружается
+            return self.pending_id
+        # Текст введен полностью, без выбора из списка
+        text = self.combobox.get()
+        for label, entity_id in self.matches:
+            if label == text:
+                return entity_id
+        return None
+
+    def get_text(self):
+        return self.combobox.get()
+
+    def set_id(self, entity_id):
+        """Выбор записи по ID (например, при заполнении формы из таблицы)"""
+        data = self.cache.peek()
+        if data is None:
+            # Выбор завершится после загрузки справочника
+            self.clear()
+            self.pending_id = entity_id
+            self.combobox.set(LOADING_TEXT)
+            self.request_load()
+            return
+        self.pending_id = None
+        entity = data[0].get(entity_id)
+        if entity is None:
+            self.clear()
+            return
+        label = self.format_label(entity_id, entity[0], entity[1])
+        self.matches = [(label, entity_id)]
+        self.combobox['values'] = [label]
+        self.combobox.set(label)
+        self.selected_id = entity_id
+
+    def clear(self):
+        """Очистка поля и выбора"""
+        if self.pending is not None:
+            self.combobox.after_cancel(self.pending)
+            self.pending = None
+        self.combobox.set('')
+        self.selected_id = None
+        self.pending_id = None
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import DoctorValidator
+from gui.task_executor import TaskExecutor
 
 class DoctorsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
     
     def setup_ui(self):
@@ -75,23 +77,52 @@ class DoctorsTab:
         self.load_doctors()
     
     def load_doctors(self):
-        """Загрузка врачей в дерево"""
-        try:
-            for item in self.doctors_tree.get_children():
-                self.doctors_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
-                SELECT doctor_id, first_name, last_name, specialization, phone, email, license_number 
-                FROM doctors ORDER BY last_name, first_name
-            """)
-            
-            for row in result:
-                self.doctors_tree.insert('', 'end', values=row)
-                
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить врачей: {e}")
+        """Загрузка врачей в дерево (запрос в фоновом потоке)"""
+        self.executor.submit(
+            self.fetch_doctors,
+            on_success=self.show_doctors,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить врачей: {e}")
+        )
+    
+    def fetch_doctors(self):
+        result, columns = self.db.execute_query("""
+            SELECT doctor_id, first_name, last_name, specialization, phone, email, license_number 
+            FROM doctors ORDER BY last_name, first_name
+        """)
+        return result
+    
+    def show_doctors(self, rows):
+        for item in self.doctors_tree.get_children():
+            self.doctors_tree.delete(item)
+        
+        for row in rows:
+            self.doctors_tree.insert('', 'end', values=row)
+    
+    def save_doctor(self, query, params, deleted):
+        """Изменение таблицы doctors и той же записи в справочнике врачей (выполняется в рабочем потоке)"""
+        with self.db.transaction() as cursor:
+            cursor.execute(query + " RETURNING doctor_id, first_name, last_name", params)
+            rows = cursor.fetchall()
+        for doctor_id, first_name, last_name in rows:
+            if deleted:
+                self.db.doctors_cache.remove(doctor_id)
+            else:
+                self.db.doctors_cache.put(doctor_id, first_name, last_name)
+    
+    def submit_save(self, query, params, success_message, error_message, clear_form, deleted=False):
+        """Фоновое изменение врачей с сообщением и перезагрузкой списка по завершении"""
+        def on_saved(_):
+            messagebox.showinfo("Успех", success_message)
+            if clear_form:
+                self.clear_form()
+            self.load_doctors()
+        
+        self.executor.submit(
+            self.save_doctor, query, params, deleted,
+            on_success=on_saved,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"{error_message}: {e}")
+        )
     
-   
     def add_doctor(self):
         """Добавление нового врача с валидацией"""
         try:
@@ -123,10 +154,7 @@ class DoctorsTab:
                 float(self.d_salary.get()) if self.d_salary.get() else 0
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Врач успешно добавлен")
-            self.clear_form()
-            self.load_doctors()
+            self.submit_save(query, params, "Врач успешно добавлен", "Не удалось добавить врача", True)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить врача: {e}")
@@ -169,9 +197,7 @@ class DoctorsTab:
                 doctor_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Врач успешно обновлен")
-            self.load_doctors()
+            self.submit_save(query, params, "Врач успешно обновлен", "Не удалось обновить врача", False)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить врача: {e}")
@@ -186,10 +212,9 @@ class DoctorsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этого врача?"):
             try:
                 doctor_id = self.doctors_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM doctors WHERE doctor_id=%s", (doctor_id,))
-                messagebox.showinfo("Успех", "Врач успешно удален")
-                self.clear_form()
-                self.load_doctors()
+                self.submit_save("DELETE FROM doctors WHERE doctor_id=%s", (doctor_id,),
+                                 "Врач успешно удален", "Не удалось удалить врача", True,
+                                 deleted=True)
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить врача: {e}")
@@ -199,28 +224,33 @@ class DoctorsTab:
         selected = self.doctors_tree.selection()
         if selected:
             doctor_data = self.doctors_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM doctors WHERE doctor_id=%s", (doctor_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM doctors WHERE doctor_id=%s", (doctor_data[0],),
+                on_success=lambda result: self.fill_form(doctor_data[0], result)
             )
-            
-            if result:
-                doctor = result[0]
-                self.d_first_name.delete(0, tk.END)
-                self.d_first_name.insert(0, doctor[1])
-                self.d_last_name.delete(0, tk.END)
-                self.d_last_name.insert(0, doctor[2])
-                self.d_specialization.set(doctor[3])
-                self.d_phone.delete(0, tk.END)
-                self.d_phone.insert(0, doctor[4] or '')
-                self.d_email.delete(0, tk.END)
-                self.d_email.insert(0, doctor[5] or '')
-                self.d_license.delete(0, tk.END)
-                self.d_license.insert(0, doctor[6] or '')
-                self.d_hire_date.delete(0, tk.END)
-                self.d_hire_date.insert(0, doctor[7])
-                self.d_salary.delete(0, tk.END)
-                self.d_salary.insert(0, str(doctor[8]) if doctor[8] else '')
+    
+    def fill_form(self, doctor_id, result):
+        """Заполнение формы загруженной записью, если она все еще выбрана"""
+        selected = self.doctors_tree.selection()
+        if not selected or self.doctors_tree.item(selected[0])['values'][0] != doctor_id:
+            return
+        if result and result[0]:
+            doctor = result[0][0]
+            self.d_first_name.delete(0, tk.END)
+            self.d_first_name.insert(0, doctor[1])
+            self.d_last_name.delete(0, tk.END)
+            self.d_last_name.insert(0, doctor[2])
+            self.d_specialization.set(doctor[3])
+            self.d_phone.delete(0, tk.END)
+            self.d_phone.insert(0, doctor[4] or '')
+            self.d_email.delete(0, tk.END)
+            self.d_email.insert(0, doctor[5] or '')
+            self.d_license.delete(0, tk.END)
+            self.d_license.insert(0, doctor[6] or '')
+            self.d_hire_date.delete(0, tk.END)
+            self.d_hire_date.insert(0, doctor[7])
+            self.d_salary.delete(0, tk.END)
+            self.d_salary.insert(0, str(doctor[8]) if doctor[8] else '')
     
     def clear_form(self):
         """Очистка полей формы"""
@@ -0,0 +1,150 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+from gui.autocomplete import EntityPicker
+
+# Значение комбобокса статуса "без фильтра"
+ALL_ITEMS = "Все"
+
+
+class GridFilterBar:
+    """Панель серверных фильтров таблицы: период, пациент, врач и (при наличии) статус"""
+
+    def __init__(self, parent, db, on_apply, date_column, patient_column, doctor_column,
+                 status_column=None, statuses=None, executor=None):
+        # on_apply(filters) получает список пар (условие SQL, параметры) для KeysetPager
+        self.db = db
+        self.on_apply = on_apply
+        self.date_column = date_column
+        self.patient_column = patient_column
+        self.doctor_column = doctor_column
+        self.status_column = status_column
+
+        self.frame = ttk.LabelFrame(parent, text="Фильтры")
+
+        ttk.Label(self.frame, text="С (ГГГГ-ММ-ДД):").grid(row=0, column=0, padx=5, pady=5, sticky='w')
+        self.date_from = ttk.Entry(self.frame, width=12)
+        self.date_from.grid(row=0, column=1, padx=5, pady=5)
+
+        ttk.Label(self.frame, text="По:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
+        self.date_to = ttk.Entry(self.frame, width=12)
+        self.date_to.grid(row=0, column=3, padx=5, pady=5)
+
+        # Пустое поле пациента или врача - без фильтра
+        ttk.Label(self.frame, text="Пациент:").grid(row=0, column=4, padx=5, pady=5, sticky='w')
+        self.patient = EntityPicker(self.frame, db.patients_cache, executor, width=20)
+        self.patient.grid(row=0, column=5, padx=5, pady=5)
+
+        ttk.Label(self.frame, text="Врач:").grid(row=0, column=6, padx=5, pady=5, sticky='w')
+        self.doctor = EntityPicker(self.frame, db.doctors_cache, executor, width=20)
+        self.doctor.grid(row=0, column=7, padx=5, pady=5)
+
+        column = 8
+        self.status = None
+        if status_column:
+            ttk.Label(self.frame, text="Статус:").grid(row=0, column=column, padx=5, pady=5, sticky='w')
+            self.status = ttk.Combobox(self.frame, width=14, state='readonly', values=[ALL_ITEMS] + list(statuses or []))
+            self.status.grid(row=0, column=column + 1, padx=5, pady=5)
+            column += 2
+
+        ttk.Button(self.frame, text="Применить", command=self.apply).grid(row=0, column=column, padx=5, pady=5)
+        ttk.Button(self.frame, text="Сбросить", command=self.reset).grid(row=0, column=column + 1, padx=5, pady=5)
+
+        self.reset_fields()
+
+    @staticmethod
+    def picked_id(picker, field_name):
+        """ID из поля выбора; None для пустого поля"""
+        if not picker.get_text().strip():
+            return None
+        entity_id = picker.get_id()
+        if entity_id is None:
+            raise ValueError(f"Выберите значение поля '{field_name}' из списка")
+        return entity_id
+
+    @staticmethod
+    def parse_date(text, field_name):
+        """Проверка даты фильтра; пустая строка - без ограничения"""
+        text = text.strip()
+        if not text:
+            return None
+        try:
+            datetime.strptime(text, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Поле '{field_name}' должно быть в формате ГГГГ-ММ-ДД")
+        return text
+
+    def build_filters(self):
+        """Список пар (условие SQL, параметры) по заполненным полям"""
+        filters = []
+
+        date_from = self.parse_date(self.date_from.get(), "С")
+        date_to = self.parse_date(self.date_to.get(), "По")
+        if date_from:
+            filters.append((f"{self.date_column} >= %s", [date_from]))
+        if date_to:
+            # Включая весь последний день (для столбцов TIMESTAMP)
+            filters.append((f"{self.date_column} < %s::date + 1", [date_to]))
+
+        patient_id = self.picked_id(self.patient, "Пациент")
+        if patient_id is not None:
+            filters.append((f"{self.patient_column} = %s", [patient_id]))
+
+        doctor_id = self.picked_id(self.doctor, "Врач")
+        if doctor_id is not None:
+            filters.append((f"{self.doctor_column} = %s", [doctor_id]))
+
+        if self.status is not None and self.status.get() not in ('', ALL_ITEMS):
+            filters.append((f"{self.status_column} = %s", [self.status.get()]))
+
+        return filters
+
+    def apply(self):
+        """Применение фильтров"""
+        try:
+            filters = self.build_filters()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        self.on_apply(filters)
+
+    def reset_fields(self):
+        """Очистка полей фильтров"""
+        self.date_from.delete(0, tk.END)
+        self.date_to.delete(0, tk.END)
+        self.patient.clear()
+        self.doctor.clear()
+        if self.status is not None:
+            self.status.set(ALL_ITEMS)
+
+    def reset(self):
+        """Сброс фильтров и перезагрузка таблицы"""
+        self.reset_fields()
+        self.on_apply([])
+
+
+class SearchBar:
+    """Строка полнотекстового поиска над таблицей"""
+
+    def __init__(self, parent, on_search):
+        # on_search(text) получает строку запроса; пустая строка - сброс поиска
+        self.on_search = on_search
+
+        self.frame = ttk.LabelFrame(parent, text="Поиск")
+
+        self.query = ttk.Entry(self.frame, width=50)
+        self.query.grid(row=0, column=0, padx=5, pady=5, sticky='we')
+        self.query.bind('<Return>', lambda event: self.search())
+
+        ttk.Button(self.frame, text="Найти", command=self.search).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Button(self.frame, text="Сбросить", command=self.reset).grid(row=0, column=2, padx=5, pady=5)
+        self.frame.columnconfigure(0, weight=1)
+
+    def search(self):
+        """Запуск поиска по введенной строке"""
+        self.on_search(self.query.get().strip())
+
+    def reset(self):
+        """Очистка строки поиска и возврат к обычному списку"""
+        self.query.delete(0, tk.END)
+        self.on_search('')
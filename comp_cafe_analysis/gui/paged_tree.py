@@ -0,0 +1,250 @@
+import os
+from bisect import bisect_left
+
+# Размер страницы, загружаемой в таблицу за один запрос
+PAGE_SIZE = int(os.getenv('GRID_PAGE_SIZE', '100'))
+
+
+class KeysetPager:
+    """Постраничная выборка по ключу (keyset) в порядке убывания ключевых столбцов"""
+
+    def __init__(self, db, select, key_columns, key_indexes, id_column, page_size=PAGE_SIZE,
+                 select_params=()):
+        # select - "SELECT ... FROM ..." без WHERE и ORDER BY, select_params - его параметры
+        # key_columns - выражения ключа сортировки, последним идет уникальный ID
+        # key_indexes - позиции этих выражений в строке результата
+        self.db = db
+        self.select = select
+        self.key_columns = key_columns
+        self.key_indexes = key_indexes
+        self.id_column = id_column
+        self.page_size = page_size
+        self.select_params = list(select_params)
+        self.filters = []
+        self.reset()
+
+    def reset(self):
+        """Возврат к первой странице"""
+        self.last_key = None
+        self.exhausted = False
+
+    def set_filters(self, filters):
+        """Установка серверных фильтров: список пар (условие SQL, параметры)"""
+        self.filters = list(filters)
+        self.reset()
+
+    def row_key(self, row):
+        """Ключ сортировки строки"""
+        return tuple(row[index] for index in self.key_indexes)
+
+    def _filtered_select(self, conditions, params):
+        """Запрос select с фильтрами и дополнительными условиями (без сортировки)"""
+        all_conditions = [condition for condition, _ in self.filters] + conditions
+        all_params = self.select_params + [
+            param for _, filter_params in self.filters for param in filter_params
+        ] + params
+
+        query = self.select
+        if all_conditions:
+            query += " WHERE " + " AND ".join(f"({condition})" for condition in all_conditions)
+        return query, all_params
+
+    def _build_query(self, conditions, params):
+        """Сборка запроса с фильтрами и сортировкой по ключу"""
+        query, all_params = self._filtered_select(conditions, params)
+        query += " ORDER BY " + ", ".join(f"{column} DESC" for column in self.key_columns)
+        return query, all_params
+
+    def next_page(self):
+        """Следующая страница строк (пустой список, если данные закончились)"""
+        if self.exhausted:
+            return []
+        return self.accept_page(self.fetch_page(self.last_key))
+
+    def fetch_page(self, last_key):
+        """Страница строк после ключа last_key; состояние пейджера не меняется (можно вызывать из рабочего потока)"""
+        conditions = []
+        params = []
+        if last_key is not None:
+            placeholders = ", ".join(["%s"] * len(self.key_columns))
+            conditions.append(f"({', '.join(self.key_columns)}) < ({placeholders})")
+            params.extend(last_key)
+
+        query, params = self._build_query(conditions, params)
+        result = self.db.execute_query(query + " LIMIT %s", tuple(params) + (self.page_size,))
+        if result is None:
+            raise RuntimeError("Не удалось загрузить страницу данных")
+        return result[0]
+
+    def accept_page(self, rows):
+        """Продвижение к следующей странице после загрузки rows; возвращает rows"""
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self.last_key = self.row_key(rows[-1])
+        return rows
+
+    def fetch_row(self, row_id):
+        """Одна строка по ID с учетом фильтров (None, если строки нет)"""
+        query, params = self._build_query([f"{self.id_column} = %s"], [row_id])
+        result = self.db.execute_query(query, tuple(params))
+        if result and result[0]:
+            return result[0][0]
+        return None
+
+
+class SearchPager(KeysetPager):
+    """Постраничная выдача результатов поиска по убыванию релевантности
+
+    select вычисляет релевантность (ts_rank) в одном из столбцов; совпадения
+    находит GIN-индекс, ранжируются все совпадения с учетом фильтров.
+    Релевантность нужно приводить к float8: значение real, вернувшееся из
+    Python в условие ключа, не равно исходному, и строки повторяются.
+    Ключ страниц - (релевантность, ID), key_columns ссылаются на столбцы
+    подзапроса found.
+    """
+
+    def _build_query(self, conditions, params):
+        """Подзапрос совпадений с фильтрами, снаружи - условие ключа и сортировка по релевантности"""
+        matches, all_params = self._filtered_select([], [])
+
+        query = f"SELECT * FROM ({matches}) found"
+        if conditions:
+            query += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+        query += " ORDER BY " + ", ".join(f"{column} DESC" for column in self.key_columns)
+        return query, all_params + params
+
+
+class PagedTreeview:
+    """Ленивое заполнение Treeview: строки подгружаются страницами по мере прокрутки
+
+    Если задан executor (TaskExecutor), запросы выполняются в рабочем потоке,
+    а таблица обновляется в главном; ошибки загрузки передаются в on_error.
+    Ответы, пришедшие после перезагрузки таблицы, отбрасываются.
+    """
+
+    def __init__(self, tree, scrollbar, pager, format_row=None, id_index=0, executor=None, on_error=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.pager = pager
+        self.format_row = format_row or list
+        self.id_index = id_index
+        # Подгружаем следующую страницу, когда ниже видимой области остается меньше полстраницы
+        self.prefetch_rows = max(1, pager.page_size // 2)
+        self.keys = []
+        self.load_pending = False
+        self.executor = executor
+        self.on_error = on_error
+        # Номер загрузки таблицы: растет при каждой перезагрузке
+        self.generation = 0
+
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def reload(self):
+        """Полная перезагрузка с первой страницы"""
+        self.tree.delete(*self.tree.get_children())
+        self.keys = []
+        self.pager.reset()
+        self.generation += 1
+        self.load_more()
+
+    def load_more(self):
+        """Загрузка следующей страницы в конец таблицы"""
+        if self.executor is None:
+            self.load_pending = False
+            self.show_page(self.pager.next_page())
+            return
+        if self.pager.exhausted:
+            self.load_pending = False
+            return
+
+        self.load_pending = True
+        generation = self.generation
+        self.executor.submit(
+            self.pager.fetch_page, self.pager.last_key,
+            on_success=lambda rows: self.on_page_loaded(generation, rows),
+            on_error=lambda e: self.on_page_error(generation, e)
+        )
+
+    def on_page_loaded(self, generation, rows):
+        """Страница из рабочего потока (устаревшие после перезагрузки игнорируются)"""
+        if generation != self.generation:
+            return
+        self.load_pending = False
+        self.show_page(self.pager.accept_page(rows))
+
+    def on_page_error(self, generation, error):
+        if generation == self.generation:
+            self.load_pending = False
+        self.report_error(generation, error)
+
+    def report_error(self, generation, error):
+        """Передача ошибки загрузки в on_error (кроме устаревших загрузок)"""
+        if generation == self.generation and self.on_error:
+            self.on_error(error)
+
+    def show_page(self, rows):
+        """Добавление строк страницы в конец таблицы"""
+        for row in rows:
+            iid = str(row[self.id_index])
+            if self.tree.exists(iid):
+                # Строка уже вставлена refresh_row, пока страница загружалась
+                continue
+            self.tree.insert('', 'end', iid=iid, values=self.format_row(row))
+            self.keys.append(self.pager.row_key(row))
+
+    def on_scroll(self, first, last):
+        """Обработчик прокрутки: обновляет полосу и при необходимости подгружает данные"""
+        self.scrollbar.set(first, last)
+        remaining = (1.0 - float(last)) * len(self.keys)
+        if remaining < self.prefetch_rows and not self.pager.exhausted and not self.load_pending:
+            self.load_pending = True
+            self.tree.after_idle(self.load_more)
+
+    def remove_row(self, row_id):
+        """Удаление одной строки без перезагрузки таблицы"""
+        iid = str(row_id)
+        if self.tree.exists(iid):
+            self.keys.pop(self.tree.index(iid))
+            self.tree.delete(iid)
+
+    def refresh_row(self, row_id):
+        """Обновление (или вставка) одной строки на ее место в порядке сортировки"""
+        if self.executor is None:
+            self.place_row(row_id, self.pager.fetch_row(row_id))
+            return
+
+        generation = self.generation
+        self.executor.submit(
+            self.pager.fetch_row, row_id,
+            on_success=lambda row: self.on_row_loaded(generation, row_id, row),
+            on_error=lambda e: self.report_error(generation, e)
+        )
+
+    def on_row_loaded(self, generation, row_id, row):
+        if generation == self.generation:
+            self.place_row(row_id, row)
+
+    def place_row(self, row_id, row):
+        """Размещение загруженной строки (None - строки больше нет) в порядке сортировки"""
+        iid = str(row_id)
+        if row is None:
+            self.remove_row(row_id)
+            return
+
+        key = self.pager.row_key(row)
+        if self.tree.exists(iid) and self.keys[self.tree.index(iid)] == key:
+            # Порядок не изменился - обновляем значения на месте
+            self.tree.item(iid, values=self.format_row(row))
+            return
+
+        self.remove_row(row_id)
+        # Ключи загруженных строк идут по убыванию: вставляем перед первым меньшим
+        position = len(self.keys) - bisect_left(self.keys[::-1], key)
+        if position == len(self.keys) and not self.pager.exhausted:
+            # Строка за пределами загруженных страниц появится при прокрутке
+            return
+
+        self.tree.insert('', position, iid=iid, values=self.format_row(row))
+        self.keys.insert(position, key)
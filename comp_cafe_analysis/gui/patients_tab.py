@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import PatientValidator
+from gui.task_executor import TaskExecutor
 
 class PatientsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
     
     def setup_ui(self):
@@ -72,21 +74,51 @@ class PatientsTab:
         self.load_patients()
     
     def load_patients(self):
-        """Загрузка пациентов в дерево"""
-        try:
-            for item in self.patients_tree.get_children():
-                self.patients_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
-                SELECT patient_id, first_name, last_name, date_of_birth, gender, phone, email 
-                FROM patients ORDER BY last_name, first_name
-            """)
-            
-            for row in result:
-                self.patients_tree.insert('', 'end', values=row)
-                
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить пациентов: {e}")
+        """Загрузка пациентов в дерево (запрос в фоновом потоке)"""
+        self.executor.submit(
+            self.fetch_patients,
+            on_success=self.show_patients,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить пациентов: {e}")
+        )
+    
+    def fetch_patients(self):
+        result, columns = self.db.execute_query("""
+            SELECT patient_id, first_name, last_name, date_of_birth, gender, phone, email 
+            FROM patients ORDER BY last_name, first_name
+        """)
+        return result
+    
+    def show_patients(self, rows):
+        for item in self.patients_tree.get_children():
+            self.patients_tree.delete(item)
+        
+        for row in rows:
+            self.patients_tree.insert('', 'end', values=row)
+    
+    def save_patient(self, query, params, deleted):
+        """Изменение таблицы patients и той же записи в справочнике пациентов (выполняется в рабочем потоке)"""
+        with self.db.transaction() as cursor:
+            cursor.execute(query + " RETURNING patient_id, first_name, last_name", params)
+            rows = cursor.fetchall()
+        for patient_id, first_name, last_name in rows:
+            if deleted:
+                self.db.patients_cache.remove(patient_id)
+            else:
+                self.db.patients_cache.put(patient_id, first_name, last_name)
+    
+    def submit_save(self, query, params, success_message, error_message, clear_form, deleted=False):
+        """Фоновое изменение пациентов с сообщением и перезагрузкой списка по завершении"""
+        def on_saved(_):
+            messagebox.showinfo("Успех", success_message)
+            if clear_form:
+                self.clear_form()
+            self.load_patients()
+        
+        self.executor.submit(
+            self.save_patient, query, params, deleted,
+            on_success=on_saved,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"{error_message}: {e}")
+        )
     
     def add_patient(self):
         """Добавление нового пациента с валидацией"""
@@ -117,10 +149,7 @@ class PatientsTab:
                 self.p_insurance.get()
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Пациент успешно добавлен")
-            self.clear_form()
-            self.load_patients()
+            self.submit_save(query, params, "Пациент успешно добавлен", "Не удалось добавить пациента", True)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить пациента: {e}")
@@ -161,9 +190,7 @@ class PatientsTab:
                 patient_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Пациент успешно обновлен")
-            self.load_patients()
+            self.submit_save(query, params, "Пациент успешно обновлен", "Не удалось обновить пациента", False)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить пациента: {e}")
@@ -178,10 +205,9 @@ class PatientsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этого пациента?"):
             try:
                 patient_id = self.patients_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM patients WHERE patient_id=%s", (patient_id,))
-                messagebox.showinfo("Успех", "Пациент успешно удален")
-                self.clear_form()
-                self.load_patients()
+                self.submit_save("DELETE FROM patients WHERE patient_id=%s", (patient_id,),
+                                 "Пациент успешно удален", "Не удалось удалить пациента", True,
+                                 deleted=True)
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить пациента: {e}")
@@ -191,28 +217,33 @@ class PatientsTab:
         selected = self.patients_tree.selection()
         if selected:
             patient_data = self.patients_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM patients WHERE patient_id=%s", (patient_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM patients WHERE patient_id=%s", (patient_data[0],),
+                on_success=lambda result: self.fill_form(patient_data[0], result)
             )
-            
-            if result:
-                patient = result[0]
-                self.p_first_name.delete(0, tk.END)
-                self.p_first_name.insert(0, patient[1])
-                self.p_last_name.delete(0, tk.END)
-                self.p_last_name.insert(0, patient[2])
-                self.p_dob.delete(0, tk.END)
-                self.p_dob.insert(0, patient[3])
-                self.p_gender.set(patient[4])
-                self.p_phone.delete(0, tk.END)
-                self.p_phone.insert(0, patient[5] or '')
-                self.p_email.delete(0, tk.END)
-                self.p_email.insert(0, patient[6] or '')
-                self.p_address.delete("1.0", tk.END)
-                self.p_address.insert("1.0", patient[7] or '')
-                self.p_insurance.delete(0, tk.END)
-                self.p_insurance.insert(0, patient[8] or '')
+    
+    def fill_form(self, patient_id, result):
+        """Заполнение формы загруженной записью, если она все еще выбрана"""
+        selected = self.patients_tree.selection()
+        if not selected or self.patients_tree.item(selected[0])['values'][0] != patient_id:
+            return
+        if result and result[0]:
+            patient = result[0][0]
+            self.p_first_name.delete(0, tk.END)
+            self.p_first_name.insert(0, patient[1])
+            self.p_last_name.delete(0, tk.END)
+            self.p_last_name.insert(0, patient[2])
+            self.p_dob.delete(0, tk.END)
+            self.p_dob.insert(0, patient[3])
+            self.p_gender.set(patient[4])
+            self.p_phone.delete(0, tk.END)
+            self.p_phone.insert(0, patient[5] or '')
+            self.p_email.delete(0, tk.END)
+            self.p_email.insert(0, patient[6] or '')
+            self.p_address.delete("1.0", tk.END)
+            self.p_address.insert("1.0", patient[7] or '')
+            self.p_insurance.delete(0, tk.END)
+            self.p_insurance.insert(0, patient[8] or '')
     
     def clear_form(self):
         """Очистка полей формы"""
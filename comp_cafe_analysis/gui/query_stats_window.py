@@ -0,0 +1,56 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+
+# Сколько самых затратных запросов показывать в окне
+SHOWN_QUERIES = 20
+
+
+class QueryStatsWindow:
+    """Окно статистики запросов (QueryStats) во время работы приложения
+
+    Показывает ту же сводку, что выводится в журнал при закрытии:
+    самые затратные запросы по суммарному времени и вызывающий их код.
+    """
+
+    def __init__(self, root, query_stats):
+        self.query_stats = query_stats
+        self.window = tk.Toplevel(root)
+        self.window.title("Статистика запросов")
+        self.window.geometry("1100x500")
+
+        self.text = scrolledtext.ScrolledText(self.window, wrap='none', font=('Courier', 10))
+        self.text.pack(fill='both', expand=True, padx=5, pady=5)
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.pack(fill='x', padx=5, pady=5)
+        ttk.Button(button_frame, text="Обновить", command=self.refresh).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Сбросить", command=self.reset).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Закрыть", command=self.window.destroy).pack(side='right', padx=5)
+
+        self.refresh()
+
+    def exists(self):
+        """Открыто ли еще окно"""
+        return bool(self.window.winfo_exists())
+
+    def show(self):
+        """Обновление сводки и вывод окна на передний план"""
+        self.refresh()
+        self.window.deiconify()
+        self.window.lift()
+
+    def refresh(self):
+        """Сводка на текущий момент"""
+        if self.query_stats.top(1):
+            summary = self.query_stats.format_summary(SHOWN_QUERIES)
+        else:
+            summary = "Запросов пока не было"
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", summary)
+        self.text.config(state='disabled')
+
+    def reset(self):
+        """Очистка накопленной статистики (например, перед замером одного действия)"""
+        self.query_stats.reset()
+        self.refresh()
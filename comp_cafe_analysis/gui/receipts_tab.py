@@ -1,12 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, time, timedelta
 from validators import ReceiptValidator
+from gui.task_executor import TaskExecutor
 
 class ReceiptsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
+        self.cost_task = None
         self.setup_ui()
         self.load_sessions_combobox()
     
@@ -82,133 +84,93 @@ class ReceiptsTab:
         self.load_receipts()
     
     def load_sessions_combobox(self):
-        """Загрузка сеансов в список"""
-        try:
-            self.r_sessions.delete(0, tk.END)
-            
-            result, columns = self.db.execute_query("""
-                SELECT s.session_id, s.computer_number, s.connection_date, s.start_time, s.end_time
-                FROM sessions s
-                LEFT JOIN receipt_sessions rs ON s.session_id = rs.session_id
-                WHERE rs.session_id IS NULL
-                ORDER BY s.connection_date DESC, s.start_time DESC
-            """)
-            
-            for row in result:
-                session_text = f"Компьютер {row[1]} | {row[2]} | {row[3].strftime('%H:%M')}-{row[4].strftime('%H:%M')} (ID: {row[0]})"
-                self.r_sessions.insert(tk.END, session_text)
-                
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить сеансы: {e}")
+        """Загрузка сеансов в список (строки читаются и форматируются в фоновом потоке)"""
+        self.executor.submit(
+            self.fetch_free_sessions,
+            on_success=self.show_free_sessions,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить сеансы: {e}")
+        )
+    
+    def fetch_free_sessions(self):
+        """Подписи сеансов, не вошедших в квитанции"""
+        result = self.db.execute_query("""
+            SELECT s.session_id, s.computer_number, s.connection_date, s.start_time, s.end_time
+            FROM sessions s
+            LEFT JOIN receipt_sessions rs ON s.session_id = rs.session_id
+            WHERE rs.session_id IS NULL
+            ORDER BY s.connection_date DESC, s.start_time DESC
+        """)
+        if result is None:
+            raise RuntimeError("Ошибка выполнения запроса")
+        return [
+            f"Компьютер {row[1]} | {row[2]} | {row[3].strftime('%H:%M')}-{row[4].strftime('%H:%M')} (ID: {row[0]})"
+            for row in result[0]
+        ]
+    
+    def show_free_sessions(self, sessions):
+        self.r_sessions.delete(0, tk.END)
+        if sessions:
+            self.r_sessions.insert(tk.END, *sessions)
     
     def load_receipts(self):
-        """Загрузка квитанций в дерево"""
-        try:
-            for item in self.receipts_tree.get_children():
-                self.receipts_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
-                SELECT receipt_id, organization_name, receipt_date, total_minutes, total_amount, operator_name, shift_number
-                FROM receipts 
-                ORDER BY receipt_date DESC
-            """)
-            
-            for row in result:
-                self.receipts_tree.insert('', 'end', values=row)
-                
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить квитанции: {e}")
+        """Загрузка квитанций в дерево (запрос в фоновом потоке)"""
+        self.executor.submit(
+            self.fetch_receipts,
+            on_success=self.show_receipts,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить квитанции: {e}")
+        )
     
-    def calculate_session_cost(self, session_id, connection_date, start_time, end_time):
-        """Расчет стоимости сеанса на основе тарифов"""
-        try:
-            # Находим действующий тариф на дату сеанса
-            result, columns = self.db.execute_query("""
-                SELECT cost_per_minute, discount_evening, discount_night
-                FROM tariffs 
-                WHERE effective_date <= %s
-                ORDER BY effective_date DESC 
-                LIMIT 1
-            """, (connection_date,))
-            
-            if not result:
-                messagebox.showerror("Ошибка", f"Не найден тариф для даты {connection_date}")
-                return 0, 0
-            
-            tariff = result[0]
-            cost_per_minute = tariff[0]
-            discount_evening = tariff[1]
-            discount_night = tariff[2]
-            
-            # Расчет продолжительности в минутах
-            start_dt = datetime.combine(connection_date, start_time)
-            end_dt = datetime.combine(connection_date, end_time)
-            
-            # Если время окончания раньше времени начала, значит сеанс перешел на следующий день
-            if end_time < start_time:
-                end_dt = datetime.combine(connection_date + timedelta(days=1), end_time)
-            
-            total_minutes = int((end_dt - start_dt).total_seconds() / 60)
-            
-            # Расчет стоимости по периодам
-            total_cost = 0
-            current_dt = start_dt
-            
-            for minute in range(total_minutes):
-                hour = current_dt.time().hour
-                
-                # Определяем тарифный период
-                if 6 <= hour < 20:
-                    rate = cost_per_minute
-                elif 20 <= hour < 24 or 0 <= hour < 2:
-                    rate = discount_evening
-                else:  # 2 <= hour < 6
-                    rate = discount_night
-                
-                total_cost += rate
-                current_dt = current_dt + timedelta(minutes=1)
-            
-            return total_minutes, round(total_cost, 2)
-            
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка расчета стоимости: {e}")
-            return 0, 0
+    def fetch_receipts(self):
+        result, columns = self.db.execute_query("""
+            SELECT receipt_id, organization_name, receipt_date, total_minutes, total_amount, operator_name, shift_number
+            FROM receipts 
+            ORDER BY receipt_date DESC
+        """)
+        return result
+    
+    def show_receipts(self, rows):
+        for item in self.receipts_tree.get_children():
+            self.receipts_tree.delete(item)
+        
+        for row in rows:
+            self.receipts_tree.insert('', 'end', values=row)
+    
+    def get_selected_session_ids(self):
+        """Получение ID выбранных в списке сеансов"""
+        session_ids = []
+        for index in self.r_sessions.curselection():
+            session_text = self.r_sessions.get(index)
+            session_ids.append(int(session_text.split('(ID: ')[1].rstrip(')')))
+        return session_ids
     
     def calculate_cost(self):
         """Расчет общей стоимости выбранных сеансов"""
         try:
-            selected_indices = self.r_sessions.curselection()
-            if not selected_indices:
+            session_ids = self.get_selected_session_ids()
+            if not session_ids:
                 messagebox.showwarning("Предупреждение", "Выберите хотя бы один сеанс")
                 return
             
-            total_minutes = 0
-            total_cost = 0
-            
-            for index in selected_indices:
-                session_text = self.r_sessions.get(index)
-                session_id = int(session_text.split('(ID: ')[1].rstrip(')'))
-                
-                # Получаем данные сеанса
-                result, columns = self.db.execute_query(
-                    "SELECT connection_date, start_time, end_time FROM sessions WHERE session_id=%s",
-                    (session_id,)
-                )
-                
-                if result:
-                    session_data = result[0]
-                    minutes, cost = self.calculate_session_cost(
-                        session_id, session_data[0], session_data[1], session_data[2]
-                    )
-                    total_minutes += minutes
-                    total_cost += cost
-            
-            self.r_total_minutes.config(text=str(total_minutes))
-            self.r_total_amount.config(text=f"{total_cost:.2f}")
+            # Данные всех сеансов одним запросом в фоновом потоке, расчет в памяти
+            if self.cost_task:
+                self.cost_task.cancel()
+            self.cost_task = self.executor.submit(
+                self.db.bill_sessions, session_ids,
+                on_success=self.show_cost,
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Ошибка расчета: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка расчета: {e}")
     
+    def show_cost(self, billed):
+        """Вывод итогов расчета стоимости"""
+        total_minutes = sum(minutes for _, minutes, _ in billed)
+        total_cost = sum(cost for _, _, cost in billed)
+        
+        self.r_total_minutes.config(text=str(total_minutes))
+        self.r_total_amount.config(text=f"{total_cost:.2f}")
+    
     def create_receipt(self):
         """Создание квитанции"""
         try:
@@ -223,74 +185,37 @@ class ReceiptsTab:
             ):
                 return
             
-            selected_indices = self.r_sessions.curselection()
-            if not selected_indices:
+            session_ids = self.get_selected_session_ids()
+            if not session_ids:
                 messagebox.showwarning("Предупреждение", "Выберите хотя бы один сеанс")
                 return
             
-            total_minutes = int(self.r_total_minutes.cget("text"))
-            total_cost = float(self.r_total_amount.cget("text"))
-            
-            if total_minutes == 0:
-                messagebox.showwarning("Предупреждение", "Нет данных для создания квитанции")
-                return
-            
-            # Создаем квитанцию
-            query = """
-                INSERT INTO receipts (organization_name, address, phone, receipt_date, 
-                total_minutes, total_amount, operator_name, shift_number)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING receipt_id
-            """
-            params = (
+            receipt_info = (
                 self.r_org.get(),
                 self.r_address.get("1.0", tk.END).strip(),
                 self.r_phone.get(),
                 self.r_date.get(),
-                total_minutes,
-                total_cost,
                 self.r_operator.get(),
                 int(self.r_shift.get())
             )
             
-            result = self.db.execute_query(query, params)
-            if result:
-                # Получаем ID созданной квитанции
-                receipt_id_result, _ = self.db.execute_query("SELECT lastval()")
-                receipt_id = receipt_id_result[0][0] if receipt_id_result else None
-                
-                if receipt_id:
-                    # Добавляем связи с сеансами
-                    for index in selected_indices:
-                        session_text = self.r_sessions.get(index)
-                        session_id = int(session_text.split('(ID: ')[1].rstrip(')'))
-                        
-                        # Получаем данные сеанса для расчета стоимости
-                        session_result, _ = self.db.execute_query(
-                            "SELECT connection_date, start_time, end_time FROM sessions WHERE session_id=%s",
-                            (session_id,)
-                        )
-                        
-                        if session_result:
-                            session_data = session_result[0]
-                            minutes, cost = self.calculate_session_cost(
-                                session_id, session_data[0], session_data[1], session_data[2]
-                            )
-                            
-                            # Создаем связь
-                            link_query = """
-                                INSERT INTO receipt_sessions (receipt_id, session_id, session_minutes, session_cost)
-                                VALUES (%s, %s, %s, %s)
-                            """
-                            self.db.execute_query(link_query, (receipt_id, session_id, minutes, cost))
-            
-            messagebox.showinfo("Успех", "Квитанция успешно создана")
-            self.clear_form()
-            self.load_receipts()
-            self.load_sessions_combobox()
+            # Квитанция и связи с сеансами создаются в одной транзакции в фоновом потоке
+            self.executor.submit(
+                self.db.create_receipt, receipt_info, session_ids,
+                on_success=lambda _: self.on_receipts_changed("Квитанция успешно создана"),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось создать квитанцию: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось создать квитанцию: {e}")
     
+    def on_receipts_changed(self, message):
+        """Сообщение и обновление списков после создания или удаления квитанции"""
+        messagebox.showinfo("Успех", message)
+        self.clear_form()
+        self.load_receipts()
+        self.load_sessions_combobox()
+    
     def delete_receipt(self):
         """Удаление выбранной квитанции"""
         selected = self.receipts_tree.selection()
@@ -309,11 +234,11 @@ class ReceiptsTab:
                               f"Дата: {receipt_date}"):
             try:
                 # Удаляем квитанцию (связи удалятся каскадно благодаря ON DELETE CASCADE)
-                self.db.execute_query("DELETE FROM receipts WHERE receipt_id=%s", (receipt_id,))
-                messagebox.showinfo("Успех", "Квитанция успешно удалена")
-                self.clear_form()
-                self.load_receipts()
-                self.load_sessions_combobox()
+                self.executor.submit(
+                    self.db.execute_query, "DELETE FROM receipts WHERE receipt_id=%s", (receipt_id,),
+                    on_success=lambda _: self.on_receipts_changed("Квитанция успешно удалена"),
+                    on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить квитанцию: {e}")
+                )
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить квитанцию: {e}")
@@ -323,52 +248,59 @@ class ReceiptsTab:
         selected = self.receipts_tree.selection()
         if selected:
             receipt_data = self.receipts_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM receipts WHERE receipt_id=%s", (receipt_data[0],)
+            self.executor.submit(
+                self.fetch_receipt, receipt_data[0],
+                on_success=lambda loaded: self.fill_form(receipt_data[0], *loaded),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить квитанцию: {e}")
             )
-            
-            if result:
-                receipt = result[0]
-                self.r_org.delete(0, tk.END)
-                self.r_org.insert(0, receipt[1])
-                self.r_address.delete("1.0", tk.END)
-                self.r_address.insert("1.0", receipt[2] or '')
-                self.r_phone.delete(0, tk.END)
-                self.r_phone.insert(0, receipt[3] or '')
-                self.r_date.delete(0, tk.END)
-                self.r_date.insert(0, receipt[4])
-                self.r_operator.delete(0, tk.END)
-                self.r_operator.insert(0, receipt[7] or '')
-                self.r_shift.delete(0, tk.END)
-                self.r_shift.insert(0, str(receipt[8]) if receipt[8] else '')
-                
-                # Загружаем связанные сеансы
-                self.load_receipt_sessions(receipt_data[0])
     
-    def load_receipt_sessions(self, receipt_id):
-        """Загрузка сеансов для выбранной квитанции"""
-        try:
-            result, columns = self.db.execute_query("""
-                SELECT s.session_id, s.computer_number, s.connection_date, s.start_time, s.end_time,
-                       rs.session_minutes, rs.session_cost
-                FROM receipt_sessions rs
-                JOIN sessions s ON rs.session_id = s.session_id
-                WHERE rs.receipt_id = %s
-            """, (receipt_id,))
-            
-            total_minutes = 0
-            total_cost = 0
-            
-            for row in result:
-                total_minutes += row[5]
-                total_cost += row[6]
-            
-            self.r_total_minutes.config(text=str(total_minutes))
-            self.r_total_amount.config(text=f"{total_cost:.2f}")
+    def fetch_receipt(self, receipt_id):
+        """Квитанция и ее сеансы (выполняется в рабочем потоке)"""
+        result, columns = self.db.execute_query(
+            "SELECT * FROM receipts WHERE receipt_id=%s", (receipt_id,)
+        )
+        sessions, columns = self.db.execute_query("""
+            SELECT s.session_id, s.computer_number, s.connection_date, s.start_time, s.end_time,
+                   rs.session_minutes, rs.session_cost
+            FROM receipt_sessions rs
+            JOIN sessions s ON rs.session_id = s.session_id
+            WHERE rs.receipt_id = %s
+        """, (receipt_id,))
+        return (result[0] if result else None), sessions
+    
+    def fill_form(self, receipt_id, receipt, sessions):
+        """Заполнение формы загруженной квитанцией, если она все еще выбрана"""
+        selected = self.receipts_tree.selection()
+        if not selected or self.receipts_tree.item(selected[0])['values'][0] != receipt_id:
+            return
+        if receipt:
+            self.r_org.delete(0, tk.END)
+            self.r_org.insert(0, receipt[1])
+            self.r_address.delete("1.0", tk.END)
+            self.r_address.insert("1.0", receipt[2] or '')
+            self.r_phone.delete(0, tk.END)
+            self.r_phone.insert(0, receipt[3] or '')
+            self.r_date.delete(0, tk.END)
+            self.r_date.insert(0, receipt[4])
+            self.r_operator.delete(0, tk.END)
+            self.r_operator.insert(0, receipt[7] or '')
+            self.r_shift.delete(0, tk.END)
+            self.r_shift.insert(0, str(receipt[8]) if receipt[8] else '')
             
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить сеансы квитанции: {e}")
+            # Итоги по связанным сеансам
+            self.show_receipt_sessions(sessions)
+    
+    def show_receipt_sessions(self, sessions):
+        """Итоги по сеансам выбранной квитанции"""
+        total_minutes = 0
+        total_cost = 0
+        
+        for row in sessions:
+            total_minutes += row[5]
+            total_cost += row[6]
+        
+        self.r_total_minutes.config(text=str(total_minutes))
+        self.r_total_amount.config(text=f"{total_cost:.2f}")
     
     def clear_form(self):
         """Очистка полей формы"""
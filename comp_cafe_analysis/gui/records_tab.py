@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import MedicalRecordValidator
+from gui.paged_tree import KeysetPager, PagedTreeview, SearchPager
+from gui.grid_filters import GridFilterBar, SearchBar
+from gui.autocomplete import EntityPicker
+from gui.task_executor import TaskExecutor
 
 class RecordsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
-        self.load_record_comboboxes()
     
     def setup_ui(self):
         # Форма медицинской записи
@@ -15,11 +19,12 @@ class RecordsTab:
         form_frame.pack(fill='x', padx=5, pady=5)
         
         ttk.Label(form_frame, text="Пациент:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.r_patient = ttk.Combobox(form_frame, width=20)
+        # Подсказки по первым буквам фамилии из общего кэша справочника
+        self.r_patient = EntityPicker(form_frame, self.db.patients_cache, self.executor, width=20)
         self.r_patient.grid(row=0, column=1, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Врач:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
-        self.r_doctor = ttk.Combobox(form_frame, width=20)
+        self.r_doctor = EntityPicker(form_frame, self.db.doctors_cache, self.executor, width=20)
         self.r_doctor.grid(row=0, column=3, padx=5, pady=5)
         
         ttk.Label(form_frame, text="Дата визита (ГГГГ-ММ-ДД):").grid(row=1, column=0, padx=5, pady=5, sticky='w')
@@ -55,6 +60,20 @@ class RecordsTab:
         ttk.Button(button_frame, text="Удалить запись", command=self.delete_medical_record).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Очистить форму", command=self.clear_form).pack(side='left', padx=5)
         
+        # Полнотекстовый поиск по симптомам, диагнозу, лечению и медикаментам
+        self.search_bar = SearchBar(self.frame, self.search_records)
+        self.search_bar.frame.pack(fill='x', padx=5, pady=5)
+        
+        # Фильтры списка (применяются на сервере)
+        self.filter_bar = GridFilterBar(
+            self.frame, self.db, self.apply_filters,
+            executor=self.executor,
+            date_column='mr.visit_date',
+            patient_column='mr.patient_id',
+            doctor_column='mr.doctor_id'
+        )
+        self.filter_bar.frame.pack(fill='x', padx=5, pady=5)
+        
         # Список медицинских записей
         list_frame = ttk.LabelFrame(self.frame, text="Медицинские записи")
         list_frame.pack(fill='both', expand=True, padx=5, pady=5)
@@ -66,49 +85,40 @@ class RecordsTab:
             self.records_tree.heading(col, text=col)
             self.records_tree.column(col, width=100)
         
-        self.records_tree.pack(fill='both', expand=True)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        self.records_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
         self.records_tree.bind('<<TreeviewSelect>>', self.on_record_select)
         
-        # Загрузка медицинских записей
-        self.load_medical_records()
-    
-    def load_record_comboboxes(self):
-        """Загрузка имен пациентов и врачей в комбобоксы медицинских записей"""
-        try:
-            # Загрузка пациентов
-            patients_result, _ = self.db.execute_query(
-                "SELECT patient_id, first_name, last_name FROM patients ORDER BY last_name, first_name"
-            )
-            patient_names = [f"{p[1]} {p[2]} (ID: {p[0]})" for p in patients_result]
-            self.r_patient['values'] = patient_names
-            
-            # Загрузка врачей
-            doctors_result, _ = self.db.execute_query(
-                "SELECT doctor_id, first_name, last_name FROM doctors ORDER BY last_name, first_name"
-            )
-            doctor_names = [f"Доктор {d[1]} {d[2]} (ID: {d[0]})" for d in doctors_result]
-            self.r_doctor['values'] = doctor_names
-            
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить данные комбобоксов: {e}")
-    
-    def load_medical_records(self):
-        """Загрузка медицинских записей в дерево"""
-        try:
-            for item in self.records_tree.get_children():
-                self.records_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
+        # Записи загружаются страницами по ключу (дата визита, ID)
+        self.list_pager = KeysetPager(
+            self.db,
+            """
                 SELECT mr.record_id, p.first_name || ' ' || p.last_name, 
                        d.first_name || ' ' || d.last_name, mr.visit_date, mr.diagnosis
                 FROM medical_records mr
                 JOIN patients p ON mr.patient_id = p.patient_id
                 JOIN doctors d ON mr.doctor_id = d.doctor_id
-                ORDER BY mr.visit_date DESC
-            """)
-            
-            for row in result:
-                self.records_tree.insert('', 'end', values=row)
+            """,
+            key_columns=['mr.visit_date', 'mr.record_id'],
+            key_indexes=[3, 0],
+            id_column='mr.record_id'
+        )
+        # В результатах поиска последним столбцом идет релевантность - в таблице не выводится
+        self.records_view = PagedTreeview(
+            self.records_tree, scrollbar, self.list_pager,
+            format_row=lambda row: row[:len(columns)],
+            executor=self.executor,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить медицинские записи: {e}")
+        )
+        
+        # Загрузка медицинских записей
+        self.load_medical_records()
+    
+    def load_medical_records(self):
+        """Загрузка первой страницы медицинских записей (следующие подгружаются при прокрутке)"""
+        try:
+            self.records_view.reload()
                 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось загрузить медицинские записи: {e}")
@@ -119,24 +129,20 @@ class RecordsTab:
         try:
             # Валидация данных
             if not MedicalRecordValidator.validate_medical_record_data(
-                self.r_patient.get(),
-                self.r_doctor.get(),
+                self.r_patient.get_id(),
+                self.r_doctor.get_id(),
                 self.r_visit_date.get(),
                 self.r_diagnosis.get("1.0", tk.END).strip()
             ):
                 return
                 
-            # Извлечение ID пациента и врача из выбора комбобокса
-            patient_text = self.r_patient.get()
-            doctor_text = self.r_doctor.get()
-            
-            patient_id = int(patient_text.split('(ID: ')[1].rstrip(')')) if patient_text else None
-            doctor_id = int(doctor_text.split('(ID: ')[1].rstrip(')')) if doctor_text else None
+            patient_id = self.r_patient.get_id()
+            doctor_id = self.r_doctor.get_id()
             
             query = """
                 INSERT INTO medical_records (patient_id, doctor_id, visit_date, symptoms, 
                 diagnosis, treatment, medications, next_visit_date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING record_id
             """
             params = (
                 patient_id,
@@ -149,14 +155,26 @@ class RecordsTab:
                 self.r_next_visit.get() or None
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Медицинская запись успешно добавлена")
-            self.clear_form()
-            self.load_medical_records()
+            self.executor.submit(
+                self.insert_record, query, params,
+                on_success=self.on_record_added,
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось добавить медицинскую запись: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить медицинскую запись: {e}")
     
+    def insert_record(self, query, params):
+        """Вставка записи (выполняется в рабочем потоке); возвращает ID"""
+        with self.db.transaction() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+    
+    def on_record_added(self, record_id):
+        messagebox.showinfo("Успех", "Медицинская запись успешно добавлена")
+        self.clear_form()
+        self.records_view.refresh_row(record_id)
+    
     def update_medical_record(self):
         """Обновление выбранной медицинской записи с валидацией"""
         selected = self.records_tree.selection()
@@ -167,8 +185,8 @@ class RecordsTab:
         try:
             # Валидация данных
             if not MedicalRecordValidator.validate_medical_record_data(
-                self.r_patient.get(),
-                self.r_doctor.get(),
+                self.r_patient.get_id(),
+                self.r_doctor.get_id(),
                 self.r_visit_date.get(),
                 self.r_diagnosis.get("1.0", tk.END).strip()
             ):
@@ -176,12 +194,8 @@ class RecordsTab:
                 
             record_id = self.records_tree.item(selected[0])['values'][0]
             
-            # Извлечение ID пациента и врача из выбора комбобокса
-            patient_text = self.r_patient.get()
-            doctor_text = self.r_doctor.get()
-            
-            patient_id = int(patient_text.split('(ID: ')[1].rstrip(')')) if patient_text else None
-            doctor_id = int(doctor_text.split('(ID: ')[1].rstrip(')')) if doctor_text else None
+            patient_id = self.r_patient.get_id()
+            doctor_id = self.r_doctor.get_id()
             
             query = """
                 UPDATE medical_records SET patient_id=%s, doctor_id=%s, visit_date=%s, 
@@ -200,13 +214,19 @@ class RecordsTab:
                 record_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Медицинская запись успешно обновлена")
-            self.load_medical_records()
+            self.executor.submit(
+                self.db.execute_query, query, params,
+                on_success=lambda _: self.on_record_updated(record_id),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось обновить медицинскую запись: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить медицинскую запись: {e}")
     
+    def on_record_updated(self, record_id):
+        messagebox.showinfo("Успех", "Медицинская запись успешно обновлена")
+        self.records_view.refresh_row(record_id)
+    
     def delete_medical_record(self):
         """Удаление выбранной медицинской записи"""
         selected = self.records_tree.selection()
@@ -217,59 +237,89 @@ class RecordsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить эту медицинскую запись?"):
             try:
                 record_id = self.records_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM medical_records WHERE record_id=%s", (record_id,))
-                messagebox.showinfo("Успех", "Медицинская запись успешно удалена")
-                self.clear_form()
-                self.load_medical_records()
+                self.executor.submit(
+                    self.db.execute_query, "DELETE FROM medical_records WHERE record_id=%s", (record_id,),
+                    on_success=lambda _: self.on_record_deleted(record_id),
+                    on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить медицинскую запись: {e}")
+                )
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить медицинскую запись: {e}")
     
+    def on_record_deleted(self, record_id):
+        messagebox.showinfo("Успех", "Медицинская запись успешно удалена")
+        self.clear_form()
+        self.records_view.remove_row(record_id)
+    
+    def apply_filters(self, filters):
+        """Установка серверных фильтров и перезагрузка списка"""
+        self.records_view.pager.set_filters(filters)
+        self.load_medical_records()
+    
+    def search_records(self, text):
+        """Полнотекстовый поиск: записи по убыванию релевантности, пустая строка - обычный список"""
+        if text:
+            pager = SearchPager(
+                self.db,
+                """
+                    SELECT mr.record_id, p.first_name || ' ' || p.last_name, 
+                           d.first_name || ' ' || d.last_name, mr.visit_date, mr.diagnosis,
+                           ts_rank(mr.search_vector, q)::float8 AS rank
+                    FROM websearch_to_tsquery('russian', %s) q
+                    JOIN medical_records mr ON mr.search_vector @@ q
+                    JOIN patients p ON mr.patient_id = p.patient_id
+                    JOIN doctors d ON mr.doctor_id = d.doctor_id
+                """,
+                key_columns=['found.rank', 'found.record_id'],
+                key_indexes=[5, 0],
+                id_column='found.record_id',
+                select_params=[text]
+            )
+        else:
+            pager = self.list_pager
+        # Фильтры панели действуют и на результаты поиска
+        pager.set_filters(self.records_view.pager.filters)
+        self.records_view.pager = pager
+        self.load_medical_records()
+    
     def on_record_select(self, event):
         """Заполнение формы при выборе медицинской записи"""
         selected = self.records_tree.selection()
         if selected:
             record_data = self.records_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM medical_records WHERE record_id=%s", (record_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM medical_records WHERE record_id=%s", (record_data[0],),
+                on_success=lambda result: self.fill_form(record_data[0], result)
             )
+    
+    def fill_form(self, record_id, result):
+        """Заполнение формы загруженной записью, если она все еще выбрана"""
+        selected = self.records_tree.selection()
+        if not selected or self.records_tree.item(selected[0])['values'][0] != record_id:
+            return
+        if result and result[0]:
+            record = result[0][0]
+            # Имена пациента и врача подставляются из кэша справочников
+            self.r_patient.set_id(record[1])
+            self.r_doctor.set_id(record[7])
             
-            if result:
-                record = result[0]
-                # Получение имен пациента и врача для комбобоксов
-                patient_result, _ = self.db.execute_query(
-                    "SELECT first_name, last_name FROM patients WHERE patient_id=%s", (record[1],)
-                )
-                doctor_result, _ = self.db.execute_query(
-                    "SELECT first_name, last_name FROM doctors WHERE doctor_id=%s", (record[7],)
-                )
-                
-                if patient_result:
-                    patient_name = f"{patient_result[0][0]} {patient_result[0][1]} (ID: {record[1]})"
-                    self.r_patient.set(patient_name)
-                
-                if doctor_result:
-                    doctor_name = f"Доктор {doctor_result[0][0]} {doctor_result[0][1]} (ID: {record[7]})"
-                    self.r_doctor.set(doctor_name)
-                
-                self.r_visit_date.delete(0, tk.END)
-                self.r_visit_date.insert(0, record[2])
-                self.r_symptoms.delete("1.0", tk.END)
-                self.r_symptoms.insert("1.0", record[3] or '')
-                self.r_diagnosis.delete("1.0", tk.END)
-                self.r_diagnosis.insert("1.0", record[4] or '')
-                self.r_treatment.delete("1.0", tk.END)
-                self.r_treatment.insert("1.0", record[5] or '')
-                self.r_medications.delete("1.0", tk.END)
-                self.r_medications.insert("1.0", record[6] or '')
-                self.r_next_visit.delete(0, tk.END)
-                self.r_next_visit.insert(0, record[8] or '')
+            self.r_visit_date.delete(0, tk.END)
+            self.r_visit_date.insert(0, record[2])
+            self.r_symptoms.delete("1.0", tk.END)
+            self.r_symptoms.insert("1.0", record[3] or '')
+            self.r_diagnosis.delete("1.0", tk.END)
+            self.r_diagnosis.insert("1.0", record[4] or '')
+            self.r_treatment.delete("1.0", tk.END)
+            self.r_treatment.insert("1.0", record[5] or '')
+            self.r_medications.delete("1.0", tk.END)
+            self.r_medications.insert("1.0", record[6] or '')
+            self.r_next_visit.delete(0, tk.END)
+            self.r_next_visit.insert(0, record[8] or '')
     
     def clear_form(self):
         """Очистка полей формы"""
-        self.r_patient.set('')
-        self.r_doctor.set('')
+        self.r_patient.clear()
+        self.r_doctor.clear()
         self.r_visit_date.delete(0, tk.END)
         self.r_next_visit.delete(0, tk.END)
         self.r_symptoms.delete("1.0", tk.END)
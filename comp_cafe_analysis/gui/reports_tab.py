@@ -1,12 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import itertools
 import os
+from gui.task_executor import TaskExecutor
+from batch_reports import generate_patient_reports, parse_patient_ids
+
+# Сколько ошибок перечислять в итоговом сообщении пакетного формирования
+MAX_LISTED_FAILURES = 10
 
 class ReportsTab:
-    def __init__(self, notebook, db, pdf_generator):
+    def __init__(self, notebook, db, pdf_generator, executor=None):
         self.db = db
         self.pdf_generator = pdf_generator
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
+        self.report_task = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -20,6 +28,13 @@ class ReportsTab:
         ttk.Button(patients_frame, text="Сгенерировать отчет по всем пациентам", 
                   command=self.generate_all_patients_report).pack(side='left', padx=5)
         
+        # Пакетное формирование отдельных отчетов по пациентам
+        ttk.Label(patients_frame, text="ID пациентов:").pack(side='left', padx=(20, 5))
+        self.batch_ids_entry = ttk.Entry(patients_frame, width=20)
+        self.batch_ids_entry.pack(side='left', padx=5)
+        ttk.Button(patients_frame, text="Отчеты по каждому пациенту (ZIP)", 
+                  command=self.generate_patient_reports_batch).pack(side='left', padx=5)
+        
         # Врачи
         doctors_frame = ttk.LabelFrame(reports_frame, text="Отчеты по врачам", padding=10)
         doctors_frame.pack(fill='x', pady=5)
@@ -47,6 +62,17 @@ class ReportsTab:
         
         ttk.Button(comprehensive_frame, text="Сгенерировать комплексный отчет", 
                   command=self.generate_comprehensive_report).pack(side='left', padx=5)
+        
+        # Ход формирования отчета
+        status_frame = ttk.Frame(reports_frame)
+        status_frame.pack(fill='x', pady=5)
+        
+        self.progress_bar = ttk.Progressbar(status_frame, mode='indeterminate', length=200)
+        self.progress_bar.pack(side='left', padx=5)
+        self.status_label = ttk.Label(status_frame, text="")
+        self.status_label.pack(side='left', padx=5)
+        self.cancel_button = ttk.Button(status_frame, text="Отмена", command=self.cancel_report, state='disabled')
+        self.cancel_button.pack(side='left', padx=5)
     
     def safe_execute_query(self, query, params=None):
         """Безопасное выполнение запроса с обработкой ошибок"""
@@ -59,158 +85,229 @@ class ReportsTab:
             print(f"Ошибка выполнения запроса: {e}")
             return None, None
     
+    def run_report(self, title, build, success_message, empty_message):
+        """Запрос имени файла и формирование отчета в фоновом потоке
+        
+        build(task, filename) выполняется в рабочем потоке и возвращает False,
+        если данных для отчета нет.
+        """
+        if self.report_task and not self.report_task.done():
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения формирования текущего отчета")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF файлы", "*.pdf")],
+            title=title
+        )
+        if not filename:
+            return
+        
+        self.set_busy(True)
+        self.report_task = self.executor.submit(
+            build, filename,
+            pass_task=True,
+            on_success=lambda generated: self.on_report_done(generated, filename, success_message, empty_message),
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчет: {e}"),
+            on_progress=self.show_progress,
+            on_finally=lambda: self.set_busy(False)
+        )
+    
+    def on_report_done(self, generated, filename, success_message, empty_message):
+        """Сообщение о результате формирования отчета"""
+        if generated:
+            messagebox.showinfo("Успех", f"{success_message}: {filename}")
+            os.startfile(filename)
+        else:
+            messagebox.showwarning("Предупреждение", empty_message)
+    
+    def show_progress(self, message):
+        """Отображение текущего этапа формирования отчета"""
+        self.status_label.config(text=message)
+    
+    def set_busy(self, busy):
+        """Переключение индикатора и кнопки отмены"""
+        if busy:
+            self.progress_bar.start(10)
+            self.cancel_button.config(state='normal')
+        else:
+            self.progress_bar.stop()
+            self.cancel_button.config(state='disabled')
+            self.status_label.config(text="")
+    
+    def cancel_report(self):
+        """Отмена формирования отчета (проверяется между пачками строк)"""
+        if self.report_task:
+            self.report_task.cancel()
+            self.status_label.config(text="Отмена...")
+    
+    def stream_rows(self, task, query):
+        """Построчная выборка для отчета через серверный курсор (None, если строк нет)
+        
+        Строки читаются пачками по мере формирования PDF, между пачками
+        проверяется отмена задачи.
+        """
+        task.report_progress("Загрузка данных...")
+        batches = self.db.execute_query_stream(query)
+        first = next(batches, None)
+        if not first:
+            batches.close()
+            return None
+        
+        def rows():
+            count = 0
+            for batch in itertools.chain([first], batches):
+                task.check_cancelled()
+                yield from batch
+                count += len(batch)
+                task.report_progress(f"Формирование PDF: {count} строк...")
+        return rows()
+    
     def generate_all_patients_report(self):
         """Генерация отчета по всем пациентам"""
+        self.run_report("Сохранить отчет по всем пациентам как", self.build_all_patients_report,
+                        "Отчет сгенерирован", "Нет данных о пациентах")
+    
+    def build_all_patients_report(self, task, filename):
+        """Загрузка пациентов и построение PDF (в рабочем потоке)"""
+        rows = self.stream_rows(task, """
+            SELECT patient_id, first_name, last_name, date_of_birth, gender, phone
+            FROM patients ORDER BY last_name, first_name
+        """)
+        if rows is None:
+            return False
+        self.pdf_generator.generate_all_patients_report(rows, filename)
+        return True
+    
+    def generate_patient_reports_batch(self):
+        """Пакетное формирование отчетов по пациентам в ZIP-архив
+        
+        ID задаются списком и диапазонами ("1, 5, 10-20"), пустое поле - все пациенты.
+        """
+        if self.report_task and not self.report_task.done():
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения формирования текущего отчета")
+            return
+        
         try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF файлы", "*.pdf")],
-                title="Сохранить отчет по всем пациентам как"
-            )
-            
-            if filename:
-                result = self.safe_execute_query("""
-                    SELECT patient_id, first_name, last_name, date_of_birth, gender, phone
-                    FROM patients ORDER BY last_name, first_name
-                """)
-                
-                if result and result[0]:
-                    self.pdf_generator.generate_all_patients_report(result[0], filename)
-                    messagebox.showinfo("Успех", f"Отчет сгенерирован: {filename}")
-                    os.startfile(filename)
-                else:
-                    messagebox.showwarning("Предупреждение", "Нет данных о пациентах")
-                    
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчет: {e}")
+            patient_ids = parse_patient_ids(self.batch_ids_entry.get()) or None
+        except ValueError:
+            messagebox.showerror("Ошибка", "ID пациентов должны быть числами или диапазонами вида 10-20")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".zip",
+            filetypes=[("ZIP архивы", "*.zip")],
+            title="Сохранить отчеты по пациентам как"
+        )
+        if not filename:
+            return
+        
+        self.set_busy(True)
+        self.report_task = self.executor.submit(
+            self.build_patient_reports_batch, filename, patient_ids,
+            pass_task=True,
+            on_success=lambda result: self.on_batch_done(result, filename),
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчеты: {e}"),
+            on_progress=self.show_progress,
+            on_finally=lambda: self.set_busy(False)
+        )
+    
+    def build_patient_reports_batch(self, task, filename, patient_ids):
+        """Формирование отчетов в пуле процессов (из рабочего потока)"""
+        task.report_progress("Загрузка данных...")
+        
+        def on_progress(done, total):
+            task.check_cancelled()
+            task.report_progress(f"Сформировано отчетов: {done}" + (f" из {total}" if total else ""))
+        
+        return generate_patient_reports(self.db, filename, patient_ids, on_progress=on_progress)
+    
+    def on_batch_done(self, result, filename):
+        """Итог пакетного формирования: число отчетов и список ошибок по файлам"""
+        written, failures = result
+        if not written and not failures:
+            messagebox.showwarning("Предупреждение", "Нет данных о пациентах")
+            return
+        message = f"Сформировано отчетов: {written}\n{filename}"
+        if not failures:
+            messagebox.showinfo("Успех", message)
+            return
+        lines = [f"Пациент {patient_id}: {error}" for patient_id, error in failures[:MAX_LISTED_FAILURES]]
+        if len(failures) > MAX_LISTED_FAILURES:
+            lines.append(f"... и еще {len(failures) - MAX_LISTED_FAILURES}")
+        messagebox.showwarning("Предупреждение", f"{message}\n\nОшибки ({len(failures)}):\n" + "\n".join(lines))
     
     def generate_all_doctors_report(self):
         """Генерация отчета по всем врачам"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF файлы", "*.pdf")],
-                title="Сохранить отчет по всем врачам как"
-            )
-            
-            if filename:
-                result = self.safe_execute_query("""
-                    SELECT doctor_id, first_name, last_name, specialization, phone, email
-                    FROM doctors ORDER BY last_name, first_name
-                """)
-                
-                if result and result[0]:
-                    self.pdf_generator.generate_all_doctors_report(result[0], filename)
-                    messagebox.showinfo("Успех", f"Отчет сгенерирован: {filename}")
-                    os.startfile(filename)
-                else:
-                    messagebox.showwarning("Предупреждение", "Нет данных о врачах")
-                    
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчет: {e}")
+        self.run_report("Сохранить отчет по всем врачам как", self.build_all_doctors_report,
+                        "Отчет сгенерирован", "Нет данных о врачах")
+    
+    def build_all_doctors_report(self, task, filename):
+        """Загрузка врачей и построение PDF (в рабочем потоке)"""
+        rows = self.stream_rows(task, """
+            SELECT doctor_id, first_name, last_name, specialization, phone, email
+            FROM doctors ORDER BY last_name, first_name
+        """)
+        if rows is None:
+            return False
+        self.pdf_generator.generate_all_doctors_report(rows, filename)
+        return True
     
     def generate_appointments_report(self):
         """Генерация PDF отчета по назначениям"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF файлы", "*.pdf")],
-                title="Сохранить отчет по назначениям как"
-            )
-            
-            if filename:
-                result = self.safe_execute_query("""
-                    SELECT a.appointment_id, p.first_name, p.last_name, d.first_name, 
-                           a.appointment_date, a.status, a.diagnosis
-                    FROM appointments a
-                    JOIN patients p ON a.patient_id = p.patient_id
-                    JOIN doctors d ON a.doctor_id = d.doctor_id
-                    ORDER BY a.appointment_date DESC
-                """)
-                
-                if result and result[0]:
-                    self.pdf_generator.generate_appointments_report(result[0], filename)
-                    messagebox.showinfo("Успех", f"Отчет сгенерирован: {filename}")
-                    os.startfile(filename)
-                else:
-                    messagebox.showwarning("Предупреждение", "Нет данных о назначениях")
-                    
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчет: {e}")
+        self.run_report("Сохранить отчет по назначениям как", self.build_appointments_report,
+                        "Отчет сгенерирован", "Нет данных о назначениях")
+    
+    def build_appointments_report(self, task, filename):
+        """Загрузка назначений и построение PDF (в рабочем потоке)"""
+        rows = self.stream_rows(task, """
+            SELECT a.appointment_id, p.first_name, p.last_name, d.first_name, 
+                   a.appointment_date, a.status, a.diagnosis
+            FROM appointments a
+            JOIN patients p ON a.patient_id = p.patient_id
+            JOIN doctors d ON a.doctor_id = d.doctor_id
+            ORDER BY a.appointment_date DESC
+        """)
+        if rows is None:
+            return False
+        self.pdf_generator.generate_appointments_report(rows, filename)
+        return True
     
     def generate_all_records_report(self):
         """Генерация PDF отчета по всем медицинским записям"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF файлы", "*.pdf")],
-                title="Сохранить отчет по всем медкартам как"
-            )
-            
-            if filename:
-                result = self.safe_execute_query("""
-                    SELECT mr.record_id, p.first_name || ' ' || p.last_name as patient_name,
-                           d.first_name || ' ' || d.last_name as doctor_name, mr.visit_date, 
-                           mr.diagnosis, mr.treatment
-                    FROM medical_records mr
-                    JOIN patients p ON mr.patient_id = p.patient_id
-                    JOIN doctors d ON mr.doctor_id = d.doctor_id
-                    ORDER BY mr.visit_date DESC
-                """)
-                
-                if result and result[0]:
-                    self.pdf_generator.generate_medical_records_report(result[0], filename)
-                    messagebox.showinfo("Успех", f"Отчет сгенерирован: {filename}")
-                    os.startfile(filename)
-                else:
-                    messagebox.showwarning("Предупреждение", "Нет данных медицинских записей")
-                    
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сгенерировать отчет: {e}")
+        self.run_report("Сохранить отчет по всем медкартам как", self.build_all_records_report,
+                        "Отчет сгенерирован", "Нет данных медицинских записей")
+    
+    def build_all_records_report(self, task, filename):
+        """Загрузка медкарт и построение PDF (в рабочем потоке)"""
+        rows = self.stream_rows(task, """
+            SELECT mr.record_id, p.first_name || ' ' || p.last_name as patient_name,
+                   d.first_name || ' ' || d.last_name as doctor_name, mr.visit_date, 
+                   mr.diagnosis, mr.treatment
+            FROM medical_records mr
+            JOIN patients p ON mr.patient_id = p.patient_id
+            JOIN doctors d ON mr.doctor_id = d.doctor_id
+            ORDER BY mr.visit_date DESC
+        """)
+        if rows is None:
+            return False
+        self.pdf_generator.generate_medical_records_report(rows, filename)
+        return True
     
     def generate_comprehensive_report(self):
         """Генерация комплексного PDF отчета"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF файлы", "*.pdf")],
-                title="Сохранить комплексный отчет как"
-            )
-            
-            if filename:
-                # Получаем данные для всех разделов
-                patients_result = self.safe_execute_query("SELECT * FROM patients")
-                doctors_result = self.safe_execute_query("SELECT * FROM doctors")
-                appointments_result = self.safe_execute_query("""
-                    SELECT a.appointment_id, p.first_name, p.last_name, d.first_name, 
-                           a.appointment_date, a.status, a.diagnosis
-                    FROM appointments a
-                    JOIN patients p ON a.patient_id = p.patient_id
-                    JOIN doctors d ON a.doctor_id = d.doctor_id
-                """)
-                records_result = self.safe_execute_query("""
-                    SELECT mr.record_id, p.first_name || ' ' || p.last_name as patient_name,
-                           d.first_name || ' ' || d.last_name as doctor_name, mr.visit_date, 
-                           mr.diagnosis, mr.treatment
-                    FROM medical_records mr
-                    JOIN patients p ON mr.patient_id = p.patient_id
-                    JOIN doctors d ON mr.doctor_id = d.doctor_id
-                """)
-                
-                # Извлекаем только данные (первый элемент кортежа)
-                patients_data = patients_result[0] if patients_result and patients_result[0] else []
-                doctors_data = doctors_result[0] if doctors_result and doctors_result[0] else []
-                appointments_data = appointments_result[0] if appointments_result and appointments_result[0] else []
-                records_data = records_result[0] if records_result and records_result[0] else []
-                
-                if patients_data or doctors_data or appointments_data or records_data:
-                    self.pdf_generator.generate_comprehensive_report(
-                        patients_data, doctors_data, appointments_data, records_data, filename
-                    )
-                    messagebox.showinfo("Успех", f"Комплексный отчет сгенерирован: {filename}")
-                    os.startfile(filename)
-                else:
-                    messagebox.showwarning("Предупреждение", "Нет данных для генерации отчета")
-                    
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сгенерировать комплексный отчет: {e}")
+        self.run_report("Сохранить комплексный отчет как", self.build_comprehensive_report,
+                        "Комплексный отчет сгенерирован", "Нет данных для генерации отчета")
+    
+    def build_comprehensive_report(self, task, filename):
+        """Загрузка сводной статистики и построение комплексного PDF (в рабочем потоке)"""
+        task.report_progress("Загрузка данных...")
+        summary = self.db.get_report_summary()
+        task.check_cancelled()
+        if summary is None:
+            raise RuntimeError("не удалось получить статистику из базы данных")
+        if not (summary['patients'] or summary['doctors'] or summary['appointments'] or summary['records']):
+            return False
+        task.report_progress("Формирование PDF...")
+        self.pdf_generator.generate_comprehensive_report(summary, filename)
+        return True
@@ -1,11 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import SessionValidator
+from gui.paged_tree import KeysetPager, PagedTreeview
+from gui.task_executor import TaskExecutor
 
 class SessionsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
     
     def setup_ui(self):
@@ -53,32 +56,44 @@ class SessionsTab:
             self.sessions_tree.heading(col, text=col)
             self.sessions_tree.column(col, width=100)
         
-        self.sessions_tree.pack(fill='both', expand=True)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        self.sessions_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
         self.sessions_tree.bind('<<TreeviewSelect>>', self.on_session_select)
         
+        # Сеансы загружаются страницами по ключу (дата, время начала, ID)
+        pager = KeysetPager(
+            self.db,
+            """
+                SELECT session_id, computer_number, ip_address, connection_date, 
+                       start_time, end_time,
+                       EXTRACT(EPOCH FROM (end_time - start_time))/60 as duration_minutes
+                FROM sessions
+            """,
+            key_columns=['connection_date', 'start_time', 'session_id'],
+            key_indexes=[3, 4, 0],
+            id_column='session_id'
+        )
+        self.sessions_view = PagedTreeview(
+            self.sessions_tree, scrollbar, pager, format_row=self.format_session_row,
+            executor=self.executor,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить сеансы: {e}")
+        )
+        
         # Загрузка сеансов
         self.load_sessions()
     
+    def format_session_row(self, row):
+        """Форматирование строки сеанса для таблицы"""
+        formatted_row = list(row)
+        if row[6]:
+            formatted_row[6] = f"{int(row[6])} мин"
+        return formatted_row
+    
     def load_sessions(self):
-        """Загрузка сеансов в дерево"""
+        """Загрузка первой страницы сеансов (следующие подгружаются при прокрутке)"""
         try:
-            for item in self.sessions_tree.get_children():
-                self.sessions_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
-                SELECT session_id, computer_number, ip_address, connection_date, 
-                       start_time, end_time,
-                       EXTRACT(EPOCH FROM (end_time - start_time))/60 as duration_minutes
-                FROM sessions 
-                ORDER BY connection_date DESC, start_time DESC
-            """)
-            
-            for row in result:
-                # Форматируем длительность
-                formatted_row = list(row)
-                if row[6]:
-                    formatted_row[6] = f"{int(row[6])} мин"
-                self.sessions_tree.insert('', 'end', values=formatted_row)
+            self.sessions_view.reload()
                 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось загрузить сеансы: {e}")
@@ -98,7 +113,7 @@ class SessionsTab:
                 
             query = """
                 INSERT INTO sessions (computer_number, ip_address, connection_date, start_time, end_time)
-                VALUES (%s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s) RETURNING session_id
             """
             params = (
                 int(self.s_computer.get()),
@@ -108,14 +123,26 @@ class SessionsTab:
                 self.s_end.get()
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Сеанс успешно добавлен")
-            self.clear_form()
-            self.load_sessions()
+            self.executor.submit(
+                self.insert_session, query, params,
+                on_success=self.on_session_added,
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось добавить сеанс: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить сеанс: {e}")
     
+    def insert_session(self, query, params):
+        """Вставка сеанса (выполняется в рабочем потоке); возвращает ID"""
+        with self.db.transaction() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+    
+    def on_session_added(self, session_id):
+        messagebox.showinfo("Успех", "Сеанс успешно добавлен")
+        self.clear_form()
+        self.sessions_view.refresh_row(session_id)
+    
     def update_session(self):
         """Обновление выбранного сеанса с валидацией"""
         selected = self.sessions_tree.selection()
@@ -148,13 +175,19 @@ class SessionsTab:
                 session_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Сеанс успешно обновлен")
-            self.load_sessions()
+            self.executor.submit(
+                self.db.execute_query, query, params,
+                on_success=lambda _: self.on_session_updated(session_id),
+                on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось обновить сеанс: {e}")
+            )
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить сеанс: {e}")
     
+    def on_session_updated(self, session_id):
+        messagebox.showinfo("Успех", "Сеанс успешно обновлен")
+        self.sessions_view.refresh_row(session_id)
+    
     def delete_session(self):
         """Удаление выбранного сеанса"""
         selected = self.sessions_tree.selection()
@@ -165,36 +198,47 @@ class SessionsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этот сеанс?"):
             try:
                 session_id = self.sessions_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM sessions WHERE session_id=%s", (session_id,))
-                messagebox.showinfo("Успех", "Сеанс успешно удален")
-                self.clear_form()
-                self.load_sessions()
+                self.executor.submit(
+                    self.db.execute_query, "DELETE FROM sessions WHERE session_id=%s", (session_id,),
+                    on_success=lambda _: self.on_session_deleted(session_id),
+                    on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить сеанс: {e}")
+                )
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить сеанс: {e}")
     
+    def on_session_deleted(self, session_id):
+        messagebox.showinfo("Успех", "Сеанс успешно удален")
+        self.clear_form()
+        self.sessions_view.remove_row(session_id)
+    
     def on_session_select(self, event):
         """Заполнение формы при выборе сеанса"""
         selected = self.sessions_tree.selection()
         if selected:
             session_data = self.sessions_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM sessions WHERE session_id=%s", (session_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM sessions WHERE session_id=%s", (session_data[0],),
+                on_success=lambda result: self.fill_form(session_data[0], result)
             )
-            
-            if result:
-                session = result[0]
-                self.s_computer.delete(0, tk.END)
-                self.s_computer.insert(0, session[1])
-                self.s_ip.delete(0, tk.END)
-                self.s_ip.insert(0, session[2])
-                self.s_date.delete(0, tk.END)
-                self.s_date.insert(0, session[3])
-                self.s_start.delete(0, tk.END)
-                self.s_start.insert(0, session[4].strftime('%H:%M') if session[4] else '')
-                self.s_end.delete(0, tk.END)
-                self.s_end.insert(0, session[5].strftime('%H:%M') if session[5] else '')
+    
+    def fill_form(self, session_id, result):
+        """Заполнение формы загруженным сеансом, если он все еще выбран"""
+        selected = self.sessions_tree.selection()
+        if not selected or self.sessions_tree.item(selected[0])['values'][0] != session_id:
+            return
+        if result and result[0]:
+            session = result[0][0]
+            self.s_computer.delete(0, tk.END)
+            self.s_computer.insert(0, session[1])
+            self.s_ip.delete(0, tk.END)
+            self.s_ip.insert(0, session[2])
+            self.s_date.delete(0, tk.END)
+            self.s_date.insert(0, session[3])
+            self.s_start.delete(0, tk.END)
+            self.s_start.insert(0, session[4].strftime('%H:%M') if session[4] else '')
+            self.s_end.delete(0, tk.END)
+            self.s_end.insert(0, session[5].strftime('%H:%M') if session[5] else '')
     
     def clear_form(self):
         """Очистка полей формы"""
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from validators import TariffValidator
+from gui.task_executor import TaskExecutor
 
 class TariffsTab:
-    def __init__(self, notebook, db):
+    def __init__(self, notebook, db, executor=None):
         self.db = db
         self.frame = ttk.Frame(notebook)
+        self.executor = executor or TaskExecutor(self.frame)
         self.setup_ui()
     
     def setup_ui(self):
@@ -56,22 +58,46 @@ class TariffsTab:
         self.load_tariffs()
     
     def load_tariffs(self):
-        """Загрузка тарифов в дерево"""
-        try:
-            for item in self.tariffs_tree.get_children():
-                self.tariffs_tree.delete(item)
-            
-            result, columns = self.db.execute_query("""
-                SELECT tariff_id, effective_date, cost_per_minute, discount_evening, discount_night
-                FROM tariffs 
-                ORDER BY effective_date DESC
-            """)
-            
-            for row in result:
-                self.tariffs_tree.insert('', 'end', values=row)
-                
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить тарифы: {e}")
+        """Загрузка тарифов в дерево (запрос в фоновом потоке)"""
+        self.executor.submit(
+            self.fetch_tariffs,
+            on_success=self.show_tariffs,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить тарифы: {e}")
+        )
+    
+    def fetch_tariffs(self):
+        result, columns = self.db.execute_query("""
+            SELECT tariff_id, effective_date, cost_per_minute, discount_evening, discount_night
+            FROM tariffs 
+            ORDER BY effective_date DESC
+        """)
+        return result
+    
+    def show_tariffs(self, rows):
+        for item in self.tariffs_tree.get_children():
+            self.tariffs_tree.delete(item)
+        
+        for row in rows:
+            self.tariffs_tree.insert('', 'end', values=row)
+    
+    def save_tariff(self, query, params):
+        """Изменение таблицы тарифов и сброс шкалы тарифов (выполняется в рабочем потоке)"""
+        self.db.execute_query(query, params)
+        self.db.invalidate_tariff_timeline()
+    
+    def submit_save(self, query, params, success_message, error_message, clear_form):
+        """Фоновое изменение тарифов с сообщением и перезагрузкой списка по завершении"""
+        def on_saved(_):
+            messagebox.showinfo("Успех", success_message)
+            if clear_form:
+                self.clear_form()
+            self.load_tariffs()
+        
+        self.executor.submit(
+            self.save_tariff, query, params,
+            on_success=on_saved,
+            on_error=lambda e: messagebox.showerror("Ошибка", f"{error_message}: {e}")
+        )
     
     def add_tariff(self):
         """Добавление нового тарифа с валидацией"""
@@ -96,10 +122,7 @@ class TariffsTab:
                 float(self.t_night.get())
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Тариф успешно добавлен")
-            self.clear_form()
-            self.load_tariffs()
+            self.submit_save(query, params, "Тариф успешно добавлен", "Не удалось добавить тариф", True)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось добавить тариф: {e}")
@@ -134,9 +157,7 @@ class TariffsTab:
                 tariff_id
             )
             
-            self.db.execute_query(query, params)
-            messagebox.showinfo("Успех", "Тариф успешно обновлен")
-            self.load_tariffs()
+            self.submit_save(query, params, "Тариф успешно обновлен", "Не удалось обновить тариф", False)
             
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось обновить тариф: {e}")
@@ -151,10 +172,8 @@ class TariffsTab:
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этот тариф?"):
             try:
                 tariff_id = self.tariffs_tree.item(selected[0])['values'][0]
-                self.db.execute_query("DELETE FROM tariffs WHERE tariff_id=%s", (tariff_id,))
-                messagebox.showinfo("Успех", "Тариф успешно удален")
-                self.clear_form()
-                self.load_tariffs()
+                self.submit_save("DELETE FROM tariffs WHERE tariff_id=%s", (tariff_id,),
+                                 "Тариф успешно удален", "Не удалось удалить тариф", True)
                 
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить тариф: {e}")
@@ -164,21 +183,26 @@ class TariffsTab:
         selected = self.tariffs_tree.selection()
         if selected:
             tariff_data = self.tariffs_tree.item(selected[0])['values']
-            
-            result, columns = self.db.execute_query(
-                "SELECT * FROM tariffs WHERE tariff_id=%s", (tariff_data[0],)
+            self.executor.submit(
+                self.db.execute_query, "SELECT * FROM tariffs WHERE tariff_id=%s", (tariff_data[0],),
+                on_success=lambda result: self.fill_form(tariff_data[0], result)
             )
-            
-            if result:
-                tariff = result[0]
-                self.t_date.delete(0, tk.END)
-                self.t_date.insert(0, tariff[1])
-                self.t_cost.delete(0, tk.END)
-                self.t_cost.insert(0, str(tariff[2]))
-                self.t_evening.delete(0, tk.END)
-                self.t_evening.insert(0, str(tariff[3]))
-                self.t_night.delete(0, tk.END)
-                self.t_night.insert(0, str(tariff[4]))
+    
+    def fill_form(self, tariff_id, result):
+        """Заполнение формы загруженным тарифом, если он все еще выбран"""
+        selected = self.tariffs_tree.selection()
+        if not selected or self.tariffs_tree.item(selected[0])['values'][0] != tariff_id:
+            return
+        if result and result[0]:
+            tariff = result[0][0]
+            self.t_date.delete(0, tk.END)
+            self.t_date.insert(0, tariff[1])
+            self.t_cost.delete(0, tk.END)
+            self.t_cost.insert(0, str(tariff[2]))
+            self.t_evening.delete(0, tk.END)
+            self.t_evening.insert(0, str(tariff[3]))
+            self.t_night.delete(0, tk.END)
+            self.t_night.insert(0, str(tariff[4]))
     
     def clear_form(self):
         """Очистка полей формы"""
@@ -0,0 +1,140 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Задача отменена пользователем"""
+
+
+class Task:
+    """Описание фоновой задачи: отмена и передача прогресса в главный поток"""
+
+    def __init__(self, executor, on_progress=None, on_finally=None):
+        self.executor = executor
+        self.on_progress = on_progress
+        self.on_finally = on_finally
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Отмена задачи: не начатая не запустится, запущенная должна проверять cancelled"""
+        self._cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            # Задача так и не запустилась - завершаем ее сразу
+            self.executor.dispatch(self.on_finally)
+
+    def check_cancelled(self):
+        """Прерывание выполнения, если задача отменена"""
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report_progress(self, *args):
+        """Передача прогресса (вызывается из рабочего потока)"""
+        if self.on_progress and not self.cancelled:
+            self.executor.dispatch(self.on_progress, *args)
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class TaskExecutor:
+    """Общий пул потоков для блокирующих операций (БД, формирование PDF)
+
+    Tkinter нельзя вызывать из других потоков, поэтому результаты, ошибки
+    и прогресс кладутся в очередь, которую главный поток разбирает через after().
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self._callbacks = queue.Queue()
+        self._closed = False
+        # Незавершенные задачи - для отмены при остановке
+        self._tasks = set()
+        self._tasks_lock = threading.Lock()
+        self._poll()
+
+    def submit(self, func, *args, on_success=None, on_error=None, on_progress=None,
+               on_finally=None, pass_task=False, **kwargs):
+        """Запуск func(*args, **kwargs) в рабочем потоке
+
+        Колбэки выполняются в главном потоке: on_success(результат),
+        on_error(исключение), on_progress(*значения), on_finally() - всегда,
+        в том числе при отмене. При pass_task=True функция первым аргументом
+        получает объект Task для проверки отмены и передачи прогресса.
+        """
+        task = Task(self, on_progress, on_finally)
+        if pass_task:
+            args = (task,) + args
+
+        def run():
+            if self._closed:
+                return
+            if task.cancelled:
+                self.dispatch(on_finally)
+                return
+            try:
+                result = func(*args, **kwargs)
+            except TaskCancelled:
+                self.dispatch(on_finally)
+                return
+            except Exception as e:
+                if not task.cancelled:
+                    if on_error:
+                        self.dispatch(on_error, e)
+                    else:
+                        print(f"Ошибка фоновой задачи: {e}")
+                self.dispatch(on_finally)
+                return
+            if not task.cancelled:
+                self.dispatch(on_success, result)
+            self.dispatch(on_finally)
+
+        with self._tasks_lock:
+            self._tasks.add(task)
+        task.future = self._pool.submit(run)
+        task.future.add_done_callback(lambda future: self._forget(task))
+        return task
+
+    def _forget(self, task):
+        with self._tasks_lock:
+            self._tasks.discard(task)
+
+    def dispatch(self, callback, *args):
+        """Постановка колбэка в очередь главного потока"""
+        if callback is not None:
+            self._callbacks.put((callback, args))
+
+    def _poll(self):
+        """Выполнение накопленных колбэков в главном потоке"""
+        while True:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Ошибка обработки результата задачи: {e}")
+
+        if not self._closed:
+            self.root.after(self.poll_interval, self._poll)
+
+    def shutdown(self, wait=False):
+        """Остановка пула: колбэки больше не выполняются, ожидающие задачи
+        отменяются, выполняющимся передается отмена (Task.cancelled).
+        При wait=True возврат только после завершения выполняющихся задач -
+        так их можно остановить до закрытия соединений с базой.
+        """
+        self._closed = True
+        with self._tasks_lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        self._pool.shutdown(wait=wait)
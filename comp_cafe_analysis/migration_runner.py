@@ -0,0 +1,88 @@
+"""
+Применение версионированных миграций схемы и проверка планов запросов.
+Общий модуль для обоих приложений; списки миграций и проверок каждое
+приложение хранит в своем migrations.py
+"""
+
+
+def get_applied_versions(cursor):
+    """Создание таблицы версий при необходимости и получение примененных версий"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(db, migrations):
+    """
+    Применение всех еще не примененных миграций. migrations - список
+    (версия, описание, список шагов); шаг - SQL-команда или функция от курсора.
+    Каждая миграция выполняется в отдельной транзакции.
+    Ошибка миграции прерывает применение (последующие могут от нее зависеть)
+    и возбуждается как RuntimeError с номером миграции; миграция будет
+    повторена при следующем запуске
+    """
+    with db.transaction() as cursor:
+        applied = get_applied_versions(cursor)
+
+    for version, description, statements in sorted(migrations, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        try:
+            with db.transaction() as cursor:
+                for statement in statements:
+                    if callable(statement):
+                        statement(cursor)
+                    else:
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+        except Exception as e:
+            raise RuntimeError(
+                f"Миграция {version} ({description}) не применена: {str(e).strip()}\n"
+                f"Последующие миграции пропущены"
+            ) from e
+        print(f"Применена миграция {version}: {description}")
+
+
+def _plan_index_names(plan):
+    """Все имена индексов, встречающиеся в плане EXPLAIN (FORMAT JSON)"""
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= _plan_index_names(child)
+    return names
+
+
+def check_indexes(db, checks):
+    """
+    Проверка планов запросов: checks - список (индекс, запрос, параметры),
+    запрос должен использовать индекс, если планировщику запрещено
+    последовательное сканирование. Возвращает список (индекс, используется ли)
+    """
+    results = []
+    for index_name, query, params in checks:
+        with db.transaction() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cursor.fetchone()[0][0]['Plan']
+        results.append((index_name, index_name in _plan_index_names(plan)))
+    return results
+
+
+def report_indexes(db, checks):
+    """Вывод результатов check_indexes; возвращает True, если все индексы используются"""
+    all_used = True
+    for index_name, used in check_indexes(db, checks):
+        status = "используется" if used else "НЕ используется"
+        print(f"{index_name}: {status}")
+        all_used = all_used and used
+    return all_used
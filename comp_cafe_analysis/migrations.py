@@ -0,0 +1,184 @@
+import sys
+
+# Сколько ID сеансов-дубликатов перечислять в сообщении об ошибке
+DUPLICATES_SHOWN = 10
+
+
+def create_receipt_sessions_unique_index(cursor):
+    """
+    Уникальный индекс receipt_sessions(session_id) вместо неуникального
+    из миграции 1. Если сеансы уже входят в несколько квитанций, миграция
+    не применяется, а дубликаты перечисляются в ошибке; после их удаления
+    миграция выполнится при следующем запуске
+    """
+    cursor.execute("""
+        SELECT session_id
+        FROM receipt_sessions
+        WHERE session_id IS NOT NULL
+        GROUP BY session_id
+        HAVING COUNT(*) > 1
+        ORDER BY session_id
+    """)
+    duplicates = [row[0] for row in cursor.fetchall()]
+    if duplicates:
+        shown = ', '.join(str(session_id) for session_id in duplicates[:DUPLICATES_SHOWN])
+        if len(duplicates) > DUPLICATES_SHOWN:
+            shown += f" и еще {len(duplicates) - DUPLICATES_SHOWN}"
+        raise ValueError(f"Сеансы входят в несколько квитанций ({len(duplicates)}, ID: {shown}). "
+                         f"Удалите лишние связи в receipt_sessions")
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_receipt_sessions_session_unique "
+                   "ON receipt_sessions (session_id)")
+    cursor.execute("DROP INDEX IF EXISTS idx_receipt_sessions_session_id")
+
+
+# Версионированные миграции схемы: (версия, описание, список шагов).
+# Шаг - SQL-команда или функция от курсора.
+# Применяются по возрастанию версии, каждая в отдельной транзакции (migration_runner).
+MIGRATIONS = [
+    (1, "Индексы для частых запросов", [
+        # Поиск действующего тарифа и загрузка шкалы тарифов
+        "CREATE INDEX IF NOT EXISTS idx_tariffs_effective_date ON tariffs (effective_date, tariff_id)",
+        # Дневная выручка для анализа: GROUP BY receipt_date без обращения к таблице
+        "CREATE INDEX IF NOT EXISTS idx_receipts_receipt_date ON receipts (receipt_date) INCLUDE (total_amount)",
+        # Поиск квитанции сеанса и анти-соединение "сеансы без квитанции"
+        # (уникальным индекс делает миграция 3)
+        "CREATE INDEX IF NOT EXISTS idx_receipt_sessions_session_id ON receipt_sessions (session_id)",
+        # Сеансы квитанции и каскадное удаление квитанций
+        "CREATE INDEX IF NOT EXISTS idx_receipt_sessions_receipt_id ON receipt_sessions (receipt_id)",
+        # Сортировка и keyset-пагинация списка сеансов
+        "CREATE INDEX IF NOT EXISTS idx_sessions_date_time_id ON sessions "
+        "(connection_date DESC, start_time DESC, session_id DESC)",
+    ]),
+    (2, "Сводная таблица дневной выручки", [
+        """
+        CREATE TABLE IF NOT EXISTS daily_revenue (
+            receipt_date DATE PRIMARY KEY,
+            total_amount DECIMAL(12,2) NOT NULL,
+            receipts_count INTEGER NOT NULL
+        )
+        """,
+        # Прибавление суммы и количества к дню; пустой день удаляется
+        """
+        CREATE OR REPLACE FUNCTION daily_revenue_apply(p_date DATE, p_amount NUMERIC, p_count INTEGER)
+        RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO daily_revenue AS d (receipt_date, total_amount, receipts_count)
+            VALUES (p_date, p_amount, p_count)
+            ON CONFLICT (receipt_date) DO UPDATE
+            SET total_amount = d.total_amount + EXCLUDED.total_amount,
+                receipts_count = d.receipts_count + EXCLUDED.receipts_count;
+
+            DELETE FROM daily_revenue WHERE receipt_date = p_date AND receipts_count <= 0;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        # Инкрементальное обновление сводки при любом изменении квитанций
+        """
+        CREATE OR REPLACE FUNCTION receipts_daily_revenue() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM daily_revenue_apply(OLD.receipt_date, -OLD.total_amount, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM daily_revenue_apply(NEW.receipt_date, NEW.total_amount, 1);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION receipts_daily_revenue_truncate() RETURNS TRIGGER AS $$
+        BEGIN
+            TRUNCATE daily_revenue;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS receipts_daily_revenue ON receipts",
+        """
+        CREATE TRIGGER receipts_daily_revenue
+        AFTER INSERT OR DELETE OR UPDATE OF receipt_date, total_amount ON receipts
+        FOR EACH ROW EXECUTE FUNCTION receipts_daily_revenue()
+        """,
+        "DROP TRIGGER IF EXISTS receipts_daily_revenue_truncate ON receipts",
+        """
+        CREATE TRIGGER receipts_daily_revenue_truncate
+        AFTER TRUNCATE ON receipts
+        FOR EACH STATEMENT EXECUTE FUNCTION receipts_daily_revenue_truncate()
+        """,
+        # Заполнение сводки по уже существующим квитанциям
+        """
+        INSERT INTO daily_revenue (receipt_date, total_amount, receipts_count)
+        SELECT receipt_date, SUM(total_amount), COUNT(*)
+        FROM receipts
+        GROUP BY receipt_date
+        ON CONFLICT (receipt_date) DO UPDATE
+        SET total_amount = EXCLUDED.total_amount,
+            receipts_count = EXCLUDED.receipts_count
+        """,
+    ]),
+    (3, "Сеанс входит не более чем в одну квитанцию", [
+        create_receipt_sessions_unique_index,
+    ]),
+]
+
+# Проверки планов: (индекс, запрос, параметры). Запрос должен использовать индекс,
+# если планировщику запрещено последовательное сканирование.
+INDEX_CHECKS = [
+    ("idx_tariffs_effective_date", """
+        SELECT cost_per_minute, discount_evening, discount_night
+        FROM tariffs
+        WHERE effective_date <= %s
+        ORDER BY effective_date DESC
+        LIMIT 1
+    """, ('2025-01-01',)),
+    ("idx_receipts_receipt_date", """
+        SELECT receipt_date, SUM(total_amount)
+        FROM receipts
+        WHERE receipt_date BETWEEN %s AND %s
+        GROUP BY receipt_date
+        ORDER BY receipt_date
+    """, ('2024-01-01', '2024-12-31')),
+    ("idx_receipt_sessions_session_unique", """
+        SELECT s.session_id
+        FROM sessions s
+        LEFT JOIN receipt_sessions rs ON s.session_id = rs.session_id
+        WHERE rs.session_id IS NULL
+    """, None),
+    ("idx_receipt_sessions_receipt_id", """
+        SELECT session_id, session_minutes, session_cost
+        FROM receipt_sessions
+        WHERE receipt_id = %s
+    """, (1,)),
+    ("idx_sessions_date_time_id", """
+        SELECT session_id, connection_date, start_time
+        FROM sessions
+        WHERE (connection_date, start_time, session_id) < (%s, %s, %s)
+        ORDER BY connection_date DESC, start_time DESC, session_id DESC
+        LIMIT 100
+    """, ('2025-01-01', '12:00', 0)),
+    ("daily_revenue_pkey", """
+        SELECT receipt_date, total_amount
+        FROM daily_revenue
+        WHERE receipt_date BETWEEN %s AND %s
+        ORDER BY receipt_date
+    """, ('2024-01-01', '2024-12-31')),
+]
+
+
+def main():
+    """Запуск из командной строки: применение миграций и проверка индексов"""
+    from database import InternetCafeDatabase
+    from migration_runner import report_indexes
+
+    db = InternetCafeDatabase()
+    try:
+        all_used = report_indexes(db, INDEX_CHECKS)
+        return 0 if all_used and not db.migration_problems else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
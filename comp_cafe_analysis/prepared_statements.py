@@ -0,0 +1,150 @@
+import itertools
+import os
+import re
+import threading
+from collections import OrderedDict
+import psycopg2
+from psycopg2 import errors, sql
+
+_PLACEHOLDER = re.compile(r"%s|%%")
+# Сколько разных текстов запросов помнит счетчик выполнений (и список неподготавливаемых)
+TRACKED_QUERIES = 1000
+
+
+class PreparedExecute(sql.SQL):
+    """Команда EXECUTE подготовленного запроса; source - исходный текст (для статистики)"""
+
+    def __init__(self, name, params_count, source):
+        placeholders = ', '.join(['%s'] * params_count)
+        super().__init__(f"EXECUTE {name} ({placeholders})")
+        self.source = source
+
+
+def to_server_placeholders(query):
+    """Замена %s на $1, $2, ... для PREPARE; возвращает (текст, число параметров)"""
+    counter = itertools.count(1)
+
+    def replace(match):
+        return '%' if match.group() == '%%' else f"${next(counter)}"
+
+    converted = _PLACEHOLDER.sub(replace, query)
+    return converted, next(counter) - 1
+
+
+class PreparedStatementCache:
+    """Кэш серверных подготовленных запросов (PREPARE/EXECUTE) для каждого соединения
+
+    Запрос подготавливается после threshold выполнений с параметрами.
+    Для каждого соединения хранится не больше max_statements запросов,
+    самый давно использованный освобождается командой DEALLOCATE.
+    Счетчики выполнений и список неподготавливаемых запросов ограничены
+    TRACKED_QUERIES последними текстами запросов.
+    """
+
+    def __init__(self, threshold=None, max_statements=None):
+        if threshold is None:
+            threshold = int(os.getenv('DB_PREPARE_THRESHOLD', '3'))
+        if max_statements is None:
+            max_statements = int(os.getenv('DB_PREPARED_CACHE_SIZE', '100'))
+        self.threshold = threshold
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._counts = OrderedDict()
+        self._unpreparable = OrderedDict()
+        self._statements = {}
+        self._names = itertools.count(1)
+
+    def execute(self, cursor, query, params):
+        """Выполнение запроса: горячие запросы - через EXECUTE подготовленного оператора"""
+        connection = cursor.connection
+        # Только одиночные запросы в autocommit: ошибка PREPARE не должна прерывать транзакцию
+        if not connection.autocommit or not self._should_prepare(query, params):
+            return cursor.execute(query, params)
+
+        with self._lock:
+            statements = self._statements.setdefault(id(connection), OrderedDict())
+
+        name = statements.get(query)
+        try:
+            if name is None:
+                name = self._prepare(cursor, statements, query, len(params))
+                if name is None:
+                    return cursor.execute(query, params)
+            else:
+                statements.move_to_end(query)
+            return cursor.execute(PreparedExecute(name, len(params), query), params)
+        except errors.InvalidSqlStatementName:
+            # Сервер не знает оператор (например, после переподключения) - сбрасываем кэш соединения
+            self.forget(connection)
+            return cursor.execute(query, params)
+        except errors.FeatureNotSupported as e:
+            # План устарел после изменения схемы ("cached plan must not change result type")
+            if 'cached plan' not in str(e):
+                raise
+            self._discard(cursor, statements, query)
+            return cursor.execute(query, params)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Соединение потеряно - подготовленные на нем запросы больше не существуют
+            self.forget(connection)
+            raise
+
+    def _should_prepare(self, query, params):
+        """Подходит ли запрос для подготовки и выполнялся ли он достаточно часто"""
+        if not isinstance(query, str) or not isinstance(params, (tuple, list)) or not params:
+            return False
+        with self._lock:
+            if query in self._unpreparable:
+                self._unpreparable.move_to_end(query)
+                return False
+            count = self._counts.pop(query, 0) + 1
+            _remember(self._counts, query, count)
+            return count >= self.threshold
+
+    def _prepare(self, cursor, statements, query, params_count):
+        """PREPARE запроса на текущем соединении; None, если запрос подготовить нельзя"""
+        converted, placeholders = to_server_placeholders(query)
+        if placeholders != params_count:
+            with self._lock:
+                _remember(self._unpreparable, query)
+            return None
+
+        name = f"ps_{next(self._names)}"
+        try:
+            cursor.execute(f"PREPARE {name} AS {converted}")
+        except Exception:
+            # Например, тип параметра нельзя вывести из контекста
+            with self._lock:
+                _remember(self._unpreparable, query)
+            return None
+
+        statements[query] = name
+        if len(statements) > self.max_statements:
+            _, evicted = statements.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {evicted}")
+        return name
+
+    def _discard(self, cursor, statements, query):
+        """Освобождение одного подготовленного запроса (следующие выполнения подготовят его заново)"""
+        name = statements.pop(query, None)
+        if name is not None and not cursor.connection.closed:
+            try:
+                cursor.execute(f"DEALLOCATE {name}")
+            except psycopg2.Error:
+                self.forget(cursor.connection)
+
+    def forget(self, connection):
+        """Сброс кэша соединения (при закрытии или замене соединения в пуле)"""
+        with self._lock:
+            self._statements.pop(id(connection), None)
+
+    def clear(self):
+        """Сброс кэша всех соединений"""
+        with self._lock:
+            self._statements.clear()
+
+
+def _remember(lru, key, value=None):
+    """Добавление в ограниченный TRACKED_QUERIES словарь; самый старый ключ вытесняется"""
+    lru[key] = value
+    if len(lru) > TRACKED_QUERIES:
+        lru.popitem(last=False)
@@ -0,0 +1,170 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from psycopg2 import extensions
+
+# Модули слоя доступа к данным: вызывающим считается первый кадр стека вне них
+INTERNAL_MODULES = {
+    'database.py', 'db_pool.py', 'query_stats.py', 'bulk_loader.py',
+    'prepared_statements.py', 'paged_tree.py', 'contextlib.py'
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query):
+    """Приведение текста запроса к шаблону: литералы заменяются на ?, пробелы схлопываются"""
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def find_caller():
+    """Имя функции (и класса вкладки), из которой пришел запрос"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if os.path.basename(code.co_filename) not in INTERNAL_MODULES:
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f"{type(owner).__name__}.{code.co_name}"
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            return f"{module}.{code.co_name}"
+        frame = frame.f_back
+    return '?'
+
+
+class QueryStats:
+    """Сбор статистики выполнения запросов: время, число строк, вызывающий код
+
+    Порог медленного запроса задается переменной окружения DB_SLOW_QUERY_MS
+    (по умолчанию 200 мс); такие запросы сразу выводятся в журнал.
+    """
+
+    def __init__(self, slow_query_ms=None):
+        if slow_query_ms is None:
+            slow_query_ms = float(os.getenv('DB_SLOW_QUERY_MS', '200'))
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, query, duration, rows, caller):
+        """Учет одного выполненного запроса (duration в секундах)"""
+        normalized = normalize_sql(query)
+        duration_ms = duration * 1000
+
+        with self._lock:
+            entry = self._queries.get(normalized)
+            if entry is None:
+                entry = self._queries[normalized] = {
+                    'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'callers': Counter()
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['rows'] += max(rows, 0)
+            entry['callers'][caller] += 1
+
+        if duration_ms >= self.slow_query_ms:
+            print(f"Медленный запрос ({duration_ms:.1f} мс, строк: {rows}, {caller}): {normalized}")
+
+    def top(self, limit=10):
+        """Самые затратные запросы по суммарному времени: список (запрос, статистика)"""
+        with self._lock:
+            items = [(query, dict(entry, callers=Counter(entry['callers'])))
+                     for query, entry in self._queries.items()]
+        items.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+        return items[:limit]
+
+    def format_summary(self, limit=10):
+        """Текстовая сводка по самым затратным запросам"""
+        lines = [f"{'Всего, мс':>10} {'Вызовов':>8} {'Средн., мс':>10} {'Макс., мс':>10} {'Строк':>8}  Запрос"]
+        for query, entry in self.top(limit):
+            callers = ', '.join(f"{caller} ({count})" for caller, count in entry['callers'].most_common(3))
+            lines.append(
+                f"{entry['total_ms']:10.1f} {entry['calls']:8d} "
+                f"{entry['total_ms'] / entry['calls']:10.2f} {entry['max_ms']:10.1f} {entry['rows']:8d}  "
+                f"{query[:100]}"
+            )
+            lines.append(f"{'':>51}  вызовы: {callers}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Очистка накопленной статистики"""
+        with self._lock:
+            self._queries.clear()
+
+    def cursor_factory(self):
+        """Класс курсора, записывающий статистику в этот объект"""
+        return type('InstrumentedCursor', (InstrumentedCursor,), {'stats': self})
+
+
+class InstrumentedCursor(extensions.cursor):
+    """Курсор psycopg2 с замером времени выполнения запросов"""
+
+    stats = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Серверный (именованный) курсор учитывается при закрытии: время выборки и строки
+        self._pending = None
+
+    def _query_text(self, query):
+        """Текст запроса (запросы psycopg2.sql и bytes приводятся к str)"""
+        if isinstance(query, str):
+            return query
+        # EXECUTE подготовленного запроса учитывается под исходным текстом
+        source = getattr(query, 'source', None)
+        if source is not None:
+            return source
+        return query.decode() if isinstance(query, bytes) else query.as_string(self)
+
+    def _record(self, query, duration, rows):
+        self.stats.record(self._query_text(query), duration, rows, find_caller())
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            duration = time.perf_counter() - started
+            if self.name:
+                self._pending = [self._query_text(query), duration, 0, find_caller()]
+            else:
+                self._record(query, duration, self.rowcount)
+
+    def fetchmany(self, size=None):
+        if self._pending is None:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        started = time.perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        self._pending[1] += time.perf_counter() - started
+        self._pending[2] += len(rows)
+        return rows
+
+    def close(self):
+        pending, self._pending = self._pending, None
+        try:
+            return super().close()
+        finally:
+            if pending is not None:
+                self.stats.record(*pending)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, time.perf_counter() - started, self.rowcount)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._record(sql, time.perf_counter() - started, self.rowcount)
@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+import warnings
+import numpy as np
+import empirical_functions as ef
+
+
+def make_series(series_count, points, seed=0):
+    """Синтетические ряды y = 2·x^1.5 с шумом 5% на общей сетке x"""
+    rng = np.random.default_rng(seed)
+    x = np.tile(np.linspace(1, 10, points), (series_count, 1))
+    y = 2 * x**1.5 * (1 + rng.normal(0, 0.05, x.shape))
+    return x, y
+
+
+def best_time(func, repeats):
+    """Лучшее время из repeats запусков и результат последнего, с"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def same_results(a, b):
+    """Совпадают ли результаты подбора (NaN считаются равными)"""
+    return (np.array_equal(a['ok'], b['ok'])
+            and np.allclose(a['parameters'], b['parameters'], equal_nan=True)
+            and np.allclose(a['sum_squared_errors'], b['sum_squared_errors'], equal_nan=True))
+
+
+def main():
+    """Сравнение пакетного подбора и пула процессов при разном числе рядов"""
+    parser = argparse.ArgumentParser(description="Замер скорости fit_models_batch и fit_models_parallel")
+    parser.add_argument('--series', type=int, nargs='+', default=[1000, 5000, 20000, 50000])
+    parser.add_argument('--points', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({2, 4, max(os.cpu_count() or 1, 2)}),
+                        help="размеры пула (1 - это столбец \"Блоки\")")
+    parser.add_argument('--chunk', type=int, default=ef.PARALLEL_CHUNK_SERIES)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    print(f"Ядер: {os.cpu_count()}, точек в ряде: {args.points}, рядов в блоке: {args.chunk}")
+    print(f"Порог пула сейчас: PARALLEL_MIN_SERIES = {ef.PARALLEL_MIN_SERIES}")
+    print(f"{'Рядов':>8} {'Пакетный, с':>12} {'Блоки, с':>10}" +
+          "".join(f" {f'Пул {w}, с':>10}" for w in args.workers))
+
+    for series_count in args.series:
+        x, y = make_series(series_count, args.points)
+        batch_time, batch = best_time(lambda: ef.fit_models_batch(x, y), args.repeats)
+        # Блоки по очереди в текущем процессе - то, к чему fit_models_parallel
+        # откатывается ниже порога
+        serial_time, serial = best_time(
+            lambda: ef.fit_models_parallel(x, y, workers=1, chunk_series=args.chunk), args.repeats
+        )
+        line = f"{series_count:>8} {batch_time:>12.3f} {serial_time:>10.3f}"
+        mismatch = not same_results(batch, serial)
+        for workers in args.workers:
+            # min_series=0 заставляет использовать пул независимо от порога
+            pool_time, pooled = best_time(
+                lambda: ef.fit_models_parallel(x, y, workers=workers, chunk_series=args.chunk,
+                                               min_series=0),
+                args.repeats
+            )
+            mismatch = mismatch or not same_results(batch, pooled)
+            line += f" {pool_time:>10.3f}"
+        print(line + ("  РЕЗУЛЬТАТЫ РАЗЛИЧАЮТСЯ" if mismatch else ""))
+
+    print("Пул выгоден, начиная с числа рядов, где его время меньше времени блоков;")
+    print("это значение стоит задать в PARALLEL_MIN_SERIES")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import sys
+import warnings
+import numpy as np
+import empirical_functions as ef
+
+# Допустимое относительное превышение оптимальной суммы квадратов ошибок
+SSE_TOLERANCE = 1e-6
+
+
+def optimal_polynomial_sse(x, y, degree):
+    """Сумма квадратов ошибок оптимального многочлена (np.polyfit) - эталон для проверок"""
+    coefficients = np.polyfit(x, y, degree)
+    return np.sum((y - np.polyval(coefficients, x))**2)
+
+
+def close_to(value, reference):
+    return value <= reference * (1 + SSE_TOLERANCE) + 1e-12
+
+
+def matches(value, reference):
+    return abs(value - reference) <= reference * SSE_TOLERANCE + 1e-12
+
+
+def check_wide_range():
+    """Квадратичная и линейная модели при x в широком диапазоне и большом числе точек"""
+    failures = []
+    rng = np.random.default_rng(0)
+    for count in (200000, 500000):
+        x = np.linspace(1, 1e6, count)
+        y = 1e-6 * x**2 + 0.5 * x + 3 + rng.normal(0, 1, count)
+        results = {result['name']: result for result in ef.fit_models(x, y)}
+        for name, degree in (("Линейная", 1), ("Квадратичная", 2)):
+            optimum = optimal_polynomial_sse(x, y, degree)
+            sse = results[name]['sum_squared_errors']
+            if not close_to(sse, optimum):
+                failures.append(f"широкий диапазон, {count} точек, {name}: {sse:.6g} вместо {optimum:.6g}")
+    return failures
+
+
+def degenerate_series():
+    """Вырожденные ряды: постоянные x или y, мало точек, большие и отрицательные значения"""
+    rng = np.random.default_rng(1)
+    noise = rng.normal(0, 1, 25)
+    return [
+        (np.full(25, 2.0), 3 + noise),
+        (np.full(25, 1e6), 3 + noise),
+        (np.full(25, -1.5), 3 + noise),
+        (np.repeat([1.0, 4.0], 10), np.repeat([2.0, 5.0], 10) + noise[:20]),
+        (np.linspace(1, 5, 25), np.full(25, 7.0)),
+        (np.linspace(1, 5, 25), np.zeros(25)),
+        (np.array([2.0]), np.array([3.0])),
+        (np.array([1.0, 2.0]), np.array([3.0, 5.0])),
+        (np.array([1.0, 2.0, 3.0]), np.array([3.0, 5.0, 4.0])),
+        (np.linspace(1e3, 1e3 + 1, 25), 2 + noise),
+    ]
+
+
+# Линейные по параметрам модели: (название, аргумент многочлена, степень)
+POLYNOMIAL_MODELS = [
+    ("Линейная", lambda x: x, 1),
+    ("Квадратичная", lambda x: x, 2),
+    ("Логарифмическая", np.log, 1),
+]
+
+
+def optimal_sse(name, x, y):
+    """Оптимальная сумма квадратов ошибок линейной по параметрам модели (None для прочих)"""
+    for model_name, argument, degree in POLYNOMIAL_MODELS:
+        if model_name == name and len(x) > degree and (argument is not np.log or np.all(x > 0)):
+            return optimal_polynomial_sse(argument(x), y, degree)
+    return None
+
+
+def check_batch_degenerate():
+    """
+    На вырожденных рядах fit_models и пакетный подбор дают оптимум линейных
+    по параметрам моделей, а пакетный подбор не хуже fit_models и подбирает те же модели
+    """
+    failures = []
+    series = degenerate_series()
+    batch = ef.fit_models_batch([x for x, _ in series], [y for _, y in series])
+    for index, (x, y) in enumerate(series):
+        reference = {result['name']: result for result in ef.fit_models(x, y)
+                     if np.isfinite(result['sum_squared_errors'])}
+        for name, result in reference.items():
+            optimum = optimal_sse(name, x, y)
+            if optimum is not None and not close_to(result['sum_squared_errors'], optimum):
+                failures.append(f"ряд {index}, {name}: fit_models - SSE {result['sum_squared_errors']:.6g} "
+                                f"вместо оптимума {optimum:.6g}")
+        for row in batch[batch['series'] == index]:
+            expected = reference.get(row['model'])
+            if expected is None:
+                continue
+            if not row['ok']:
+                failures.append(f"ряд {index}, {row['model']}: не подобрана, fit_models - SSE {expected['sum_squared_errors']:.6g}")
+                continue
+            best = expected['sum_squared_errors']
+            optimum = optimal_sse(row['model'], x, y)
+            if optimum is not None:
+                best = min(best, optimum)
+            if not close_to(row['sum_squared_errors'], best):
+                failures.append(f"ряд {index}, {row['model']}: SSE {row['sum_squared_errors']:.6g} "
+                                f"вместо {best:.6g}")
+    return failures
+
+
+def check_streaming():
+    """
+    Однопроходный подбор по блокам при x в широком диапазоне: точки
+    упорядочены и перемешаны, так что первый блок не представляет весь ряд.
+    Сумма квадратов ошибок подобранных параметров должна быть оптимальной,
+    а сообщаемая сумма - совпадать с фактической
+    """
+    failures = []
+    rng = np.random.default_rng(2)
+    count, chunk_rows = 1000000, 100000
+    x = np.linspace(0, 1e5, count)
+    y = 1e-4 * x**2 + 0.5 * x + 3 + rng.normal(0, 0.01, count)
+    optima = {name: optimal_polynomial_sse(x, y, degree) for name, degree in (("Линейная", 1), ("Квадратичная", 2))}
+    for order, permutation in (("упорядочены", np.arange(count)), ("перемешаны", rng.permutation(count))):
+        chunks = [(x[permutation[start:start + chunk_rows]], y[permutation[start:start + chunk_rows]])
+                  for start in range(0, count, chunk_rows)]
+        results = {result['name']: result for result in ef.fit_models_streaming(chunks)}
+        for name, optimum in optima.items():
+            result = results[name]
+            actual = np.sum((y - result['function'](x, *result['parameters']))**2)
+            if not close_to(actual, optimum):
+                failures.append(f"потоковый подбор, точки {order}, {name}: SSE {actual:.6g} вместо {optimum:.6g}")
+            if not matches(result['sum_squared_errors'], actual):
+                failures.append(f"потоковый подбор, точки {order}, {name}: сообщаемая SSE "
+                                f"{result['sum_squared_errors']:.6g} вместо {actual:.6g}")
+    return failures
+
+
+CHECKS = [check_wide_range, check_batch_degenerate, check_streaming]
+
+
+def main():
+    """Проверка точности подбора моделей на трудных наборах данных"""
+    warnings.simplefilter('ignore')
+    failures = []
+    for check in CHECKS:
+        found = check()
+        print(f"{check.__name__}: {'ошибок нет' if not found else f'ошибок {len(found)}'}")
+        failures += found
+    for failure in failures:
+        print(f"  {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from scipy.optimize import curve_fit
 
@@ -33,6 +36,122 @@ def get_all_models():
         (logarithmic, "Логарифмическая", 2, "y = {a:.6f} + {b:.6f}·ln(x)")
     ]
 
+def model_argument(func, x):
+    """Аргумент, по которому модель (или ее линеаризованная форма) линейна: ln x или x"""
+    if func in (logarithmic, power):
+        return np.log(x)
+    return x
+
+def design_matrix(func, x, shift=0.0):
+    """
+    Матрица плана для моделей, линейных по параметрам (столбцы в порядке параметров a, b, c).
+    Аргумент модели сдвигается на shift (обычно его среднее): для данных,
+    удаленных от нуля, это сохраняет обусловленность системы; параметры
+    переводятся обратно unshift_parameters.
+    Для двумерного x (ряды × точки) возвращает массив ряды × точки × параметры.
+    Для нелинейных моделей возвращает None
+    """
+    if func == linear:
+        t = x - shift
+        return np.stack([t, np.ones_like(t)], axis=-1)
+    if func == quadratic:
+        t = x - shift
+        return np.stack([t**2, t, np.ones_like(t)], axis=-1)
+    if func == logarithmic:
+        t = np.log(x) - shift
+        return np.stack([np.ones_like(t), t], axis=-1)
+    return None
+
+def unshift_parameters(func, params, shift):
+    """
+    Перевод параметров, найденных по сдвинутому аргументу, в исходные.
+    Для степенной и экспоненциальной моделей - параметры линеаризованной формы (ln a, b)
+    """
+    if func == linear:
+        a, b = params[..., 0], params[..., 1]
+        return np.stack([a, b - a * shift], axis=-1)
+    if func == quadratic:
+        a, b, c = params[..., 0], params[..., 1], params[..., 2]
+        return np.stack([a, b - 2 * a * shift, a * shift**2 - b * shift + c], axis=-1)
+    a, b = params[..., 0], params[..., 1]
+    return np.stack([a - b * shift, b], axis=-1)
+
+def column_scales(design, reference, counts):
+    """
+    Нормы столбцов матрицы плана для нормировки перед решением.
+    
+    reference - та же матрица без сдвига аргумента. Столбец, норма которого
+    после сдвига не больше counts·eps от нормы несдвинутого столбца, состоит
+    из ошибок округления (например, все x одинаковы): для него возвращается 0,
+    и соответствующий параметр полагается равным нулю
+    """
+    norms = np.sqrt(np.sum(design**2, axis=-2))
+    reference_norms = np.sqrt(np.sum(reference**2, axis=-2))
+    return np.where(norms > counts * np.finfo(float).eps * reference_norms, norms, 0)
+
+def solve_least_squares(design, y, reference=None):
+    """
+    Решение линейной задачи наименьших квадратов одним вызовом lstsq.
+    Столбцы матрицы плана нормируются: без этого порог rcond отбрасывает
+    столбцы малого масштаба (например, свободный член при x до 1e6).
+    Вырожденные столбцы (см. column_scales) исключаются
+    """
+    scale = column_scales(design, design if reference is None else reference, len(design))
+    negligible = scale == 0
+    scale[negligible] = 1
+    design = np.where(negligible, 0, design / scale)
+    params, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    return params / scale
+
+def log_linear_design(func, x, shift=0.0):
+    """Матрица плана линеаризованной формы (ln a, b) степенной или экспоненциальной модели"""
+    if func not in (power, exponential):
+        return None
+    t = model_argument(func, x) - shift
+    return np.stack([np.ones_like(t), t], axis=-1)
+
+def log_linear_seed(func, x, y):
+    """
+    Начальное приближение для степенной и экспоненциальной моделей
+    по линеаризованной форме:
+        ln y = ln a + b·ln x  (степенная),
+        ln y = ln a + b·x     (экспоненциальная).
+    Возвращает None, если логарифмирование невозможно (y <= 0 или x <= 0)
+    """
+    if np.any(y <= 0) or (func == power and np.any(x <= 0)):
+        return None
+    shift = np.mean(model_argument(func, x))
+    design = log_linear_design(func, x, shift)
+    if design is None:
+        return None
+    params = solve_least_squares(design, np.log(y), log_linear_design(func, x))
+    ln_a, b = unshift_parameters(func, params, shift)
+    return [np.exp(ln_a), b]
+
+def fit_parameters(func, x, y, p0=None):
+    """
+    Подбор параметров модели по методу наименьших квадратов.
+    Линейные по параметрам модели решаются напрямую, степенная и
+    экспоненциальная уточняются curve_fit от начального приближения p0
+    (по умолчанию - от решения линеаризованной формы)
+    """
+    if func in (linear, quadratic, logarithmic):
+        shift = np.mean(model_argument(func, x))
+        design = design_matrix(func, x, shift)
+        if len(y) < design.shape[1]:
+            # Как и curve_fit, не подбираем параметров больше, чем точек
+            raise ValueError("Недостаточно точек для подбора модели")
+        params = solve_least_squares(design, y, design_matrix(func, x))
+        return unshift_parameters(func, params, shift)
+    
+    if p0 is None:
+        p0 = log_linear_seed(func, x, y)
+    if p0 is None:
+        # Стандартные начальные приближения, если линеаризация невозможна
+        p0 = [1, 1] if func == power else [1, 0.5]
+    popt, pcov = curve_fit(func, x, y, p0=p0, maxfev=5000)
+    return popt
+
 def fit_models(x, y):
     """
     Подбирает все модели и возвращает результаты
@@ -45,18 +164,8 @@ def fit_models(x, y):
             # Проверяем данные для специфических функций
             if func == logarithmic and np.any(x <= 0):
                 continue  # Пропускаем логарифмическую если есть неположительные x
-                
-            # Особые начальные приближения для некоторых функций
-            if func == power:
-                p0 = [1, 1]
-            elif func == exponential:
-                p0 = [1, 0.5]
-            elif func == logarithmic:
-                p0 = [1, 1]
-            else:
-                p0 = None
             
-            popt, pcov = curve_fit(func, x, y, p0=p0, maxfev=5000)
+            popt = fit_parameters(func, x, y)
             y_pred = func(x, *popt)
             
             # Вычисляем различные метрики ошибок
@@ -131,3 +240,532 @@ def format_model_result(result):
     text += "-" * 50 + "\n"
     
     return text
+
+
+# Параметры пакетного уточнения степенной и экспоненциальной моделей (Левенберг-Марквардт)
+LM_MAX_ITERATIONS = 100
+LM_INITIAL_DAMPING = 1e-3
+LM_MAX_DAMPING = 1e10
+LM_TOLERANCE = 1e-10
+
+# Число рядов в одном задании параллельного подбора
+PARALLEL_CHUNK_SERIES = 256
+
+# Меньше рядов fit_models_parallel подбирает в текущем процессе: на один ряд
+# приходится порядка 0.15 мс работы, и на 5000 рядов × 100 точек пул из 4
+# процессов не давал выигрыша против пакетного подбора (запуск процессов,
+# передача блоков и конкуренция с потоками BLAS съедают его целиком).
+# Замер для своей машины - benchmark_fits.py
+PARALLEL_MIN_SERIES = 20000
+
+# Результат пакетного подбора: одна запись на пару (ряд, модель)
+BATCH_RESULT_DTYPE = np.dtype([
+    ('series', np.int64),
+    ('model', 'U16'),
+    ('num_params', np.int8),
+    ('parameters', np.float64, (3,)),
+    ('sum_squared_errors', np.float64),
+    ('rmse', np.float64),
+    ('mean_abs_error', np.float64),
+    ('r_squared', np.float64),
+    ('ok', np.bool_)
+])
+
+def stack_series(x, y):
+    """
+    Приведение набора рядов к двумерным массивам ряды × точки и маске точек.
+    
+    x, y - двумерные массивы одинаковой формы (x может быть общим одномерным
+    массивом для всех рядов) или списки одномерных массивов разной длины.
+    Недостающие точки коротких рядов заполняются единицами и исключаются маской
+    """
+    if not isinstance(y, (list, tuple)):
+        y = np.atleast_2d(np.asarray(y, dtype=float))
+        x = np.broadcast_to(np.asarray(x, dtype=float), y.shape)
+        return x, y, np.ones(y.shape, dtype=bool)
+    
+    if len(x) != len(y):
+        raise ValueError("Число рядов x и y не совпадает")
+    width = max((len(series) for series in y), default=0)
+    x_stacked = np.ones((len(y), width))
+    y_stacked = np.ones((len(y), width))
+    mask = np.zeros((len(y), width), dtype=bool)
+    for i, (x_series, y_series) in enumerate(zip(x, y)):
+        if len(x_series) != len(y_series):
+            raise ValueError(f"Длины x и y ряда {i} не совпадают")
+        x_stacked[i, :len(x_series)] = x_series
+        y_stacked[i, :len(y_series)] = y_series
+        mask[i, :len(y_series)] = True
+    return x_stacked, y_stacked, mask
+
+def solve_normal_equations(design, y, mask, reference=None):
+    """
+    Решение задач наименьших квадратов для всех рядов сразу через нормальные
+    уравнения (XᵀX)p = Xᵀy. Столбцы матрицы плана нормируются, чтобы
+    уменьшить обусловленность системы; вырожденные столбцы (см. column_scales,
+    reference - матрица без сдвига аргумента) исключаются, их параметры равны нулю.
+    
+    design - массив ряды × точки × параметры, y и mask - ряды × точки
+    """
+    weighted = design * mask[..., None]
+    if reference is None:
+        reference = weighted
+    scale = column_scales(weighted, reference * mask[..., None], mask.sum(axis=1)[:, None])
+    negligible = scale == 0
+    scale[negligible] = 1
+    weighted = np.where(negligible[:, None, :], 0, weighted / scale[:, None, :])
+    transposed = np.swapaxes(weighted, 1, 2)
+    gram = transposed @ weighted
+    # Исключенный столбец: единица на диагонали и нулевая правая часть дают параметр 0
+    gram += negligible[:, :, None] * np.eye(design.shape[-1])
+    rhs = (transposed @ np.where(mask, y, 0)[..., None])[..., 0]
+    try:
+        params = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Есть вырожденные ряды (например, все x одинаковы) - псевдообратная матрица
+        params = np.einsum('skm,sm->sk', np.linalg.pinv(gram), rhs)
+    return params / scale
+
+def model_jacobian(func, x, params):
+    """Производные степенной или экспоненциальной модели по (a, b) для всех рядов: ряды × точки × 2"""
+    a, b = params[:, 0, None], params[:, 1, None]
+    if func == power:
+        x_b = x**b
+        return np.stack([x_b, a * x_b * np.log(x)], axis=-1)
+    if func == exponential:
+        e_bx = np.exp(b * x)
+        return np.stack([e_bx, a * x * e_bx], axis=-1)
+    return None
+
+def sse_of_rows(func, x, y, mask, params):
+    """Сумма квадратов ошибок модели по каждому ряду (точки вне маски не учитываются)"""
+    return np.sum(np.where(mask, y - func(x, params[:, 0, None], params[:, 1, None]), 0)**2, axis=1)
+
+def refine_batch(func, x, y, mask, params):
+    """
+    Уточнение параметров степенной или экспоненциальной модели для всех рядов
+    сразу методом Левенберга-Марквардта.
+    
+    Возвращает (параметры, признак сходимости по рядам); несошедшиеся ряды
+    следует уточнить curve_fit по отдельности
+    """
+    params = params.copy()
+    sse = sse_of_rows(func, x, y, mask, params)
+    damping = np.full(len(y), LM_INITIAL_DAMPING)
+    converged = ~np.isfinite(sse)
+    for _ in range(LM_MAX_ITERATIONS):
+        active = ~converged
+        if not np.any(active):
+            break
+        p, xa, ya, ma = params[active], x[active], y[active], mask[active]
+        jacobian = model_jacobian(func, xa, p) * ma[..., None]
+        residuals = np.where(ma, ya - func(xa, p[:, 0, None], p[:, 1, None]), 0)
+        transposed = np.swapaxes(jacobian, 1, 2)
+        jtj = transposed @ jacobian
+        gradient = (transposed @ residuals[..., None])[..., 0]
+        # Демпфирование по диагонали JᵀJ (масштабно-инвариантный вариант Марквардта)
+        system = jtj + damping[active, None, None] * jtj * np.eye(2)
+        # Система 2×2 решается явно (вырожденные дают NaN и отклоняются)
+        det = system[:, 0, 0] * system[:, 1, 1] - system[:, 0, 1] * system[:, 1, 0]
+        step = np.stack([
+            system[:, 1, 1] * gradient[:, 0] - system[:, 0, 1] * gradient[:, 1],
+            system[:, 0, 0] * gradient[:, 1] - system[:, 1, 0] * gradient[:, 0]
+        ], axis=1) / det[:, None]
+        
+        candidate = p + step
+        candidate_sse = sse_of_rows(func, xa, ya, ma, candidate)
+        improved = np.isfinite(candidate_sse) & (candidate_sse < sse[active])
+        
+        small_sse_change = improved & (sse[active] - candidate_sse <= LM_TOLERANCE * sse[active])
+        small_step = np.all(np.abs(step) <= LM_TOLERANCE * (np.abs(p) + LM_TOLERANCE), axis=1)
+        stuck = damping[active] > LM_MAX_DAMPING
+        
+        indices = np.flatnonzero(active)
+        params[indices[improved]] = candidate[improved]
+        sse[indices[improved]] = candidate_sse[improved]
+        damping[indices] = np.where(improved, damping[indices] / 10, damping[indices] * 10)
+        converged[indices] = small_sse_change | small_step | stuck
+    
+    return params, converged & np.all(np.isfinite(params), axis=1)
+
+def batch_metrics(y, y_pred, mask):
+    """Метрики ошибок для всех рядов (как в fit_models), точки вне маски не учитываются"""
+    counts = mask.sum(axis=1)
+    residuals = np.where(mask, y - y_pred, 0)
+    sum_squared_errors = np.sum(residuals**2, axis=1)
+    rmse = np.sqrt(sum_squared_errors / counts)
+    mean_abs_error = np.sum(np.abs(residuals), axis=1) / counts
+    
+    y_mean = np.sum(np.where(mask, y, 0), axis=1) / counts
+    ss_total = np.sum(np.where(mask, (y - y_mean[:, None])**2, 0), axis=1)
+    r_squared = 1 - sum_squared_errors / ss_total
+    return sum_squared_errors, rmse, mean_abs_error, r_squared
+
+def fit_model_batch(func, num_params, x, y, mask):
+    """
+    Подбор одной модели для всех рядов (x, y, mask - ряды × точки).
+    
+    Возвращает (параметры ряды × num_params, сумма квадратов ошибок, rmse,
+    средняя абсолютная ошибка, R², признак успешного подбора)
+    """
+    counts = mask.sum(axis=1)
+    # Ряды, для которых модель определена
+    valid = counts >= num_params
+    if func == logarithmic:
+        valid &= ~np.any(mask & (x <= 0), axis=1)
+    
+    params = np.full((len(y), num_params), np.nan)
+    with np.errstate(all='ignore'):
+        if np.any(valid):
+            # Сдвиг аргумента на его среднее по точкам каждого ряда
+            argument = model_argument(func, x[valid])
+            shift = np.sum(np.where(mask[valid], argument, 0), axis=1) / counts[valid]
+            design = design_matrix(func, x[valid], shift[:, None])
+            if design is not None:
+                params[valid] = unshift_parameters(
+                    func,
+                    solve_normal_equations(design, y[valid], mask[valid], design_matrix(func, x[valid])),
+                    shift
+                )
+            else:
+                seeds = np.full((len(y), 2), np.nan)
+                seed_valid = valid & ~np.any(mask & (y <= 0), axis=1)
+                if func == power:
+                    seed_valid &= ~np.any(mask & (x <= 0), axis=1)
+                if np.any(seed_valid):
+                    seed_shift = shift[seed_valid[valid]]
+                    log_params = unshift_parameters(func, solve_normal_equations(
+                        log_linear_design(func, x[seed_valid], seed_shift[:, None]),
+                        np.log(np.where(mask[seed_valid], y[seed_valid], 1)),
+                        mask[seed_valid],
+                        log_linear_design(func, x[seed_valid])
+                    ), seed_shift)
+                    seeds[seed_valid] = np.column_stack([np.exp(log_params[:, 0]), log_params[:, 1]])
+                
+                # Ряды с линеаризованным приближением уточняются все вместе,
+                # остальные и несошедшиеся - curve_fit по отдельности
+                refined = np.zeros(len(y), dtype=bool)
+                if np.any(seed_valid):
+                    params[seed_valid], refined[seed_valid] = refine_batch(
+                        func, x[seed_valid], y[seed_valid], mask[seed_valid], seeds[seed_valid]
+                    )
+                
+                for i in np.flatnonzero(valid & ~refined):
+                    p0 = seeds[i] if seed_valid[i] else None
+                    try:
+                        params[i] = fit_parameters(func, x[i, mask[i]], y[i, mask[i]], p0=p0)
+                    except Exception:
+                        params[i] = np.nan
+        
+        y_pred = func(x, *params.T[:, :, None])
+        sum_squared_errors, rmse, mean_abs_error, r_squared = batch_metrics(y, y_pred, mask)
+    
+    ok = valid & np.all(np.isfinite(params), axis=1) & np.isfinite(sum_squared_errors)
+    return params, sum_squared_errors, rmse, mean_abs_error, r_squared, ok
+
+def empty_batch_results(series_count, models):
+    """Таблица результатов ряды × модели с заполненными номерами рядов и названиями моделей"""
+    results = np.zeros((series_count, len(models)), dtype=BATCH_RESULT_DTYPE)
+    results['series'] = np.arange(series_count)[:, None]
+    results['parameters'] = np.nan
+    for model_index, (func, name, num_params, equation_template) in enumerate(models):
+        results['model'][:, model_index] = name
+        results['num_params'][:, model_index] = num_params
+    return results
+
+def store_batch_results(results, model_index, rows, fitted):
+    """Запись результата fit_model_batch в строки rows столбца модели model_index"""
+    params, sum_squared_errors, rmse, mean_abs_error, r_squared, ok = fitted
+    column = results[rows, model_index]
+    column['parameters'][:, :params.shape[1]] = params
+    column['sum_squared_errors'] = sum_squared_errors
+    column['rmse'] = rmse
+    column['mean_abs_error'] = mean_abs_error
+    column['r_squared'] = r_squared
+    column['ok'] = ok
+    results[rows, model_index] = column
+
+def fit_models_batch(x, y):
+    """
+    Подбирает все модели для каждого ряда данных.
+    
+    Линейная, квадратичная и логарифмическая модели и линеаризованные
+    приближения степенной и экспоненциальной решаются сразу для всех рядов
+    через нормальные уравнения; степенная и экспоненциальная затем уточняются
+    пакетным методом Левенберга-Марквардта (curve_fit - только для рядов,
+    где линеаризация невозможна или уточнение не сошлось).
+    Возвращает структурированный массив BATCH_RESULT_DTYPE: записи упорядочены
+    по рядам, внутри ряда - в порядке get_all_models(). Модели, которые не
+    удалось подобрать, отмечены ok=False и имеют параметры NaN
+    """
+    x, y, mask = stack_series(x, y)
+    models = get_all_models()
+    results = empty_batch_results(len(y), models)
+    
+    for model_index, (func, name, num_params, equation_template) in enumerate(models):
+        fitted = fit_model_batch(func, num_params, x, y, mask)
+        store_batch_results(results, model_index, slice(None), fitted)
+    
+    return results.reshape(-1)
+
+def fit_chunk(job):
+    """Задание пула процессов: подбор одной модели для блока рядов"""
+    model_index, x, y, mask = job
+    func, name, num_params, equation_template = get_all_models()[model_index]
+    return fit_model_batch(func, num_params, x, y, mask)
+
+def fit_models_parallel(x, y, workers=None, chunk_series=PARALLEL_CHUNK_SERIES,
+                        min_series=PARALLEL_MIN_SERIES):
+    """
+    То же, что fit_models_batch, но задания (блок рядов, модель) выполняются
+    в пуле из workers процессов (по умолчанию - по числу ядер).
+    
+    Каждое задание содержит до chunk_series рядов, поэтому накладные расходы
+    на передачу данных приходятся на блок, а не на отдельный ряд. При числе
+    рядов меньше min_series или одном процессе пул не создается и блоки
+    подбираются по очереди в текущем процессе. Результат не зависит от числа
+    процессов и размера блока
+    """
+    x, y, mask = stack_series(x, y)
+    models = get_all_models()
+    results = empty_batch_results(len(y), models)
+    
+    keys = [
+        (model_index, slice(start, start + chunk_series))
+        for start in range(0, len(y), chunk_series)
+        for model_index in range(len(models))
+    ]
+    jobs = ((model_index, x[rows], y[rows], mask[rows]) for model_index, rows in keys)
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(y) < min_series:
+        for (model_index, rows), fitted in zip(keys, map(fit_chunk, jobs)):
+            store_batch_results(results, model_index, rows, fitted)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map возвращает результаты в порядке заданий
+            for (model_index, rows), fitted in zip(keys, pool.map(fit_chunk, jobs)):
+                store_batch_results(results, model_index, rows, fitted)
+    
+    return results.reshape(-1)
+
+# Строк CSV-файла в одном блоке потокового чтения
+CSV_CHUNK_ROWS = 100000
+
+# Признаки, накапливаемые StreamingFitter: 1, x, x², ln x, y, ln y (со сдвигом)
+FEATURE_ONE, FEATURE_X, FEATURE_X2, FEATURE_LN_X, FEATURE_Y, FEATURE_LN_Y = range(6)
+
+def read_csv_chunks(path, x_column=0, y_column=1, delimiter=',', skip_header=0, chunk_rows=CSV_CHUNK_ROWS):
+    """Чтение столбцов x и y из CSV-файла блоками по chunk_rows строк: генератор пар массивов (x, y)"""
+    with open(path, encoding='utf-8') as csv_file:
+        for _ in range(skip_header):
+            next(csv_file, None)
+        while True:
+            lines = list(itertools.islice(csv_file, chunk_rows))
+            if not lines:
+                break
+            data = np.loadtxt(lines, delimiter=delimiter, usecols=(x_column, y_column), ndmin=2)
+            yield data[:, 0], data[:, 1]
+
+class StreamingFitter:
+    """
+    Подбор моделей по данным, которые не помещаются в память.
+    
+    update() за один проход накапливает треугольный множитель R из
+    QR-разложения матрицы признаков 1, x, x², ln x, y, ln y всех точек
+    (блочный TSQR: R пересчитывается по старому R и новому блоку). По
+    столбцам R fit() решает задачи наименьших квадратов линейной,
+    квадратичной и логарифмической моделей, а также линеаризованных форм
+    степенной и экспоненциальной. RᵀR равна матрице сумм x^k, x^k·y, y² и
+    т.д., но к нормальным уравнениям решение не переходит, поэтому
+    обусловленность не возводится в квадрат. Признаки сдвигаются на средние
+    первого блока - это лишь опорная точка внутри диапазона данных, от
+    порядка блоков точность не зависит.
+    
+    Для линейной, квадратичной и логарифмической моделей параметры, сумма
+    квадратов ошибок, RMSE и R² совпадают с fit_models. Средняя абсолютная
+    ошибка и метрики степенной и экспоненциальной моделей (их параметры -
+    решение линеаризованной формы) требуют второго прохода - evaluate().
+    Если среди данных есть y <= 0 (или x <= 0 для степенной), эти модели
+    не подбираются: линеаризация невозможна
+    """
+    
+    def __init__(self):
+        self.r = np.zeros((0, 6))
+        # Суммы квадратов несдвинутых признаков - для поиска вырожденных столбцов
+        self.reference_squares = np.zeros(6)
+        self.count = 0
+        self.shift = None
+        self.x_positive = True
+        self.y_positive = True
+    
+    def update(self, x, y):
+        """Добавление блока точек"""
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if len(x) != len(y):
+            raise ValueError("Длины x и y не совпадают")
+        if len(x) == 0:
+            return
+        
+        self.x_positive = self.x_positive and bool(np.all(x > 0))
+        self.y_positive = self.y_positive and bool(np.all(y > 0))
+        with np.errstate(all='ignore'):
+            ln_x = np.log(x) if self.x_positive else np.zeros_like(x)
+            ln_y = np.log(y) if self.y_positive else np.zeros_like(y)
+        if self.shift is None:
+            self.shift = (np.mean(x), np.mean(ln_x), np.mean(y), np.mean(ln_y))
+        x_shift, ln_x_shift, y_shift, ln_y_shift = self.shift
+        
+        dx = x - x_shift
+        features = np.column_stack([
+            np.ones_like(x), dx, dx**2, ln_x - ln_x_shift, y - y_shift, ln_y - ln_y_shift
+        ])
+        reference = np.column_stack([np.ones_like(x), x, x**2, ln_x, y, ln_y])
+        self.reference_squares += np.sum(reference**2, axis=0)
+        self.count += len(x)
+        self.r = np.linalg.qr(np.vstack([self.r, features]), mode='r')
+    
+    def least_squares(self, columns, target):
+        """
+        Задача наименьших квадратов для признаков columns и целевого признака target
+        по столбцам R: ||R·p - r||² совпадает с ||X·p - y||² при любых p.
+        Вырожденные столбцы исключаются, как в column_scales.
+        Возвращает (параметры в сдвинутых координатах, сумма квадратов ошибок)
+        """
+        design = self.r[:, columns]
+        values = self.r[:, target]
+        scale = np.linalg.norm(design, axis=0)
+        reference_norms = np.sqrt(self.reference_squares[columns])
+        negligible = scale <= self.count * np.finfo(float).eps * reference_norms
+        scale[negligible] = 1
+        design_scaled = np.where(negligible, 0, design / scale)
+        params, _, _, _ = np.linalg.lstsq(design_scaled, values, rcond=None)
+        params = params / scale
+        residuals = values - design @ params
+        return params, residuals @ residuals
+    
+    def solve(self, columns, target):
+        """
+        Решение задачи наименьших квадратов для признаков columns и целевого признака target.
+        Возвращает (параметры в сдвинутых координатах, сумма квадратов ошибок, полная сумма квадратов)
+        """
+        params, sum_squared_errors = self.least_squares(columns, target)
+        _, ss_total = self.least_squares([FEATURE_ONE], target)
+        return params, sum_squared_errors, ss_total
+    
+    def fit_parameters(self, func):
+        """
+        Параметры модели в исходных координатах и (сумма квадратов ошибок, полная
+        сумма квадратов) - для степенной и экспоненциальной моделей (None, None)
+        """
+        x_shift, ln_x_shift, y_shift, ln_y_shift = self.shift
+        if func == linear:
+            (a, b), sse, ss_total = self.solve([FEATURE_X, FEATURE_ONE], FEATURE_Y)
+            return np.array([a, b - a * x_shift + y_shift]), sse, ss_total
+        if func == quadratic:
+            (a, b, c), sse, ss_total = self.solve([FEATURE_X2, FEATURE_X, FEATURE_ONE], FEATURE_Y)
+            return np.array([
+                a, b - 2 * a * x_shift, a * x_shift**2 - b * x_shift + c + y_shift
+            ]), sse, ss_total
+        if func == logarithmic:
+            (a, b), sse, ss_total = self.solve([FEATURE_ONE, FEATURE_LN_X], FEATURE_Y)
+            return np.array([a - b * ln_x_shift + y_shift, b]), sse, ss_total
+        if func == power:
+            (ln_a, b), _, _ = self.solve([FEATURE_ONE, FEATURE_LN_X], FEATURE_LN_Y)
+            return np.array([np.exp(ln_a - b * ln_x_shift + ln_y_shift), b]), None, None
+        if func == exponential:
+            (ln_a, b), _, _ = self.solve([FEATURE_ONE, FEATURE_X], FEATURE_LN_Y)
+            return np.array([np.exp(ln_a - b * x_shift + ln_y_shift), b]), None, None
+        raise ValueError(f"Неизвестная модель: {func}")
+    
+    def fit(self):
+        """
+        Подбор всех моделей по накопленному множителю R. Результаты в формате fit_models
+        (без y_pred); неизвестные до evaluate() метрики равны NaN
+        """
+        results = []
+        if self.count == 0:
+            return results
+        
+        for func, name, num_params, equation_template in get_all_models():
+            if self.count < num_params:
+                continue
+            if func in (logarithmic, power) and not self.x_positive:
+                continue
+            if func in (power, exponential) and not self.y_positive:
+                continue
+            
+            try:
+                popt, sum_squared_errors, ss_total = self.fit_parameters(func)
+            except np.linalg.LinAlgError:
+                continue
+            if not np.all(np.isfinite(popt)):
+                continue
+            
+            if sum_squared_errors is None:
+                sum_squared_errors = rmse = r_squared = np.nan
+            else:
+                rmse = np.sqrt(sum_squared_errors / self.count)
+                with np.errstate(all='ignore'):
+                    r_squared = 1 - sum_squared_errors / ss_total
+            
+            param_names = ['a', 'b', 'c'][:len(popt)]
+            equation = equation_template.format(**dict(zip(param_names, popt)))
+            results.append({
+                'function': func,
+                'name': name,
+                'parameters': popt,
+                'equation': equation,
+                'sum_squared_errors': sum_squared_errors,
+                'rmse': rmse,
+                'mean_abs_error': np.nan,
+                'r_squared': r_squared
+            })
+        
+        sort_results(results)
+        return results
+    
+    def evaluate(self, results, chunks):
+        """
+        Второй проход по тем же данным: точные метрики ошибок для всех результатов fit().
+        Результаты обновляются на месте и пересортировываются
+        """
+        sum_squared_errors = np.zeros(len(results))
+        sum_abs_errors = np.zeros(len(results))
+        for x, y in chunks:
+            x = np.asarray(x, dtype=float).ravel()
+            y = np.asarray(y, dtype=float).ravel()
+            for i, result in enumerate(results):
+                residuals = y - result['function'](x, *result['parameters'])
+                sum_squared_errors[i] += np.sum(residuals**2)
+                sum_abs_errors[i] += np.sum(np.abs(residuals))
+        
+        _, ss_total = self.least_squares([FEATURE_ONE], FEATURE_Y)
+        for i, result in enumerate(results):
+            result['sum_squared_errors'] = sum_squared_errors[i]
+            result['rmse'] = np.sqrt(sum_squared_errors[i] / self.count)
+            result['mean_abs_error'] = sum_abs_errors[i] / self.count
+            with np.errstate(all='ignore'):
+                result['r_squared'] = 1 - sum_squared_errors[i] / ss_total
+        
+        sort_results(results)
+        return results
+
+def sort_results(results):
+    """Сортировка по сумме квадратов ошибок (лучшие первыми, неизвестные в конце)"""
+    results.sort(key=lambda result: (np.isnan(result['sum_squared_errors']), result['sum_squared_errors']))
+
+def fit_models_streaming(chunks, evaluate_chunks=None):
+    """
+    Подбор моделей за один проход по блокам (x, y), например из read_csv_chunks().
+    Если задан evaluate_chunks - повторный источник тех же данных - метрики
+    уточняются вторым проходом (см. StreamingFitter.evaluate)
+    """
+    fitter = StreamingFitter()
+    for x, y in chunks:
+        fitter.update(x, y)
+    results = fitter.fit()
+    if evaluate_chunks is not None:
+        fitter.evaluate(results, evaluate_chunks)
+    return results
@@ -7,6 +7,8 @@ from gui.doctors_tab import DoctorsTab
 from gui.appointments_tab import AppointmentsTab
 from gui.records_tab import RecordsTab
 from gui.reports_tab import ReportsTab
+from gui.task_executor import TaskExecutor
+from gui.query_stats_window import QueryStatsWindow
 import os
 
 class MedicalApp:
@@ -15,11 +17,46 @@ class MedicalApp:
         self.root.title("Система управления медицинской организацией")
         self.root.geometry("1200x700")
         
+        # Обработка закрытия окна
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
         # Инициализация базы данных и генератора PDF
         self.db = MedicalDatabase()
         self.pdf_generator = PDFReportGenerator()
         
+        # Общий пул фоновых задач для запросов и формирования PDF
+        self.executor = TaskExecutor(self.root)
+        
+        self.setup_menu()
         self.setup_ui()
+        self.show_migration_problems()
+    
+    def show_migration_problems(self):
+        """Предупреждение о непримененных миграциях схемы"""
+        if self.db.migration_problems:
+            messagebox.showwarning(
+                "Миграции базы данных",
+                "\n\n".join(self.db.migration_problems)
+                + "\n\nПостраничный вывод и поиск могут работать медленно или с ошибками."
+            )
+    
+    def setup_menu(self):
+        """Меню "Сервис": статистика запросов к базе данных (также по F12)"""
+        self.query_stats_window = None
+        menubar = tk.Menu(self.root)
+        service_menu = tk.Menu(menubar, tearoff=0)
+        service_menu.add_command(label="Статистика запросов", accelerator="F12",
+                                 command=self.show_query_stats)
+        menubar.add_cascade(label="Сервис", menu=service_menu)
+        self.root.config(menu=menubar)
+        self.root.bind('<F12>', lambda event: self.show_query_stats())
+    
+    def show_query_stats(self):
+        """Окно статистики запросов; повторный вызов обновляет уже открытое окно"""
+        if self.query_stats_window is not None and self.query_stats_window.exists():
+            self.query_stats_window.show()
+        else:
+            self.query_stats_window = QueryStatsWindow(self.root, self.db.query_stats)
     
     def setup_ui(self):
         # Создание вкладок
@@ -27,24 +64,33 @@ class MedicalApp:
         notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Вкладка пациентов
-        self.patients_tab = PatientsTab(notebook, self.db)
+        self.patients_tab = PatientsTab(notebook, self.db, self.executor)
         notebook.add(self.patients_tab.frame, text="Пациенты")
         
         # Вкладка врачей
-        self.doctors_tab = DoctorsTab(notebook, self.db)
+        self.doctors_tab = DoctorsTab(notebook, self.db, self.executor)
         notebook.add(self.doctors_tab.frame, text="Врачи")
         
         # Вкладка назначений
-        self.appointments_tab = AppointmentsTab(notebook, self.db)
+        self.appointments_tab = AppointmentsTab(notebook, self.db, self.executor)
         notebook.add(self.appointments_tab.frame, text="Назначения")
         
         # Вкладка медицинских записей
-        self.records_tab = RecordsTab(notebook, self.db)
+        self.records_tab = RecordsTab(notebook, self.db, self.executor)
         notebook.add(self.records_tab.frame, text="Медкарты")
         
         # Вкладка отчетов
-        self.reports_tab = ReportsTab(notebook, self.db, self.pdf_generator)
+        self.reports_tab = ReportsTab(notebook, self.db, self.pdf_generator, self.executor)
         notebook.add(self.reports_tab.frame, text="Отчеты")
+    
+    def on_closing(self):
+        """Обработчик закрытия приложения: остановка фоновых задач и пула соединений"""
+        self.executor.shutdown(wait=True)
+        try:
+            self.db.close()
+        except Exception as e:
+            print(f"Ошибка при закрытии соединения: {e}")
+        self.root.destroy()
 
 def main():
     root = tk.Tk()
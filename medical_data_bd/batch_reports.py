@@ -0,0 +1,199 @@
+import argparse
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from reports import PDFReportGenerator
+
+# Сколько пациентов выбирать из базы за один запрос
+FETCH_BATCH_SIZE = 500
+# Сколько отчетов может ожидать обработки на каждый процесс (ограничивает память)
+TASKS_PER_WORKER = 4
+
+# Генератор PDF в процессе пула создается один раз (шрифты и стили переиспользуются)
+_worker_generator = None
+
+
+def _init_worker():
+    global _worker_generator
+    _worker_generator = PDFReportGenerator()
+
+
+def render_patient_report(patient_data):
+    """Формирование отчета пациента в памяти (выполняется в процессе пула)
+
+    Возвращает пару (ID пациента, содержимое PDF).
+    """
+    buffer = io.BytesIO()
+    _worker_generator.generate_patient_report(patient_data, buffer)
+    return patient_data[0], buffer.getvalue()
+
+
+def parse_patient_ids(text):
+    """Разбор списка ID вида "1, 5, 10-20" в отсортированный список (пустой текст - все пациенты)"""
+    ids = set()
+    for part in text.replace(';', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            start, end = int(start), int(end)
+            if start > end:
+                raise ValueError(f"Неверный диапазон ID: {part}")
+            ids.update(range(start, end + 1))
+        else:
+            ids.add(int(part))
+    return sorted(ids)
+
+
+def fetch_patients(db, patient_ids=None):
+    """Пачки строк пациентов (SELECT * FROM patients) одним потоковым запросом
+
+    patient_ids=None - все пациенты.
+    """
+    if patient_ids is None:
+        return db.execute_query_stream(
+            "SELECT * FROM patients ORDER BY patient_id", batch_size=FETCH_BATCH_SIZE)
+    return db.execute_query_stream(
+        "SELECT * FROM patients WHERE patient_id = ANY(%s) ORDER BY patient_id",
+        (list(patient_ids),), batch_size=FETCH_BATCH_SIZE)
+
+
+def report_filename(patient_data):
+    return f"patient_{patient_data[0]}.pdf"
+
+
+class ReportWriter:
+    """Запись готовых отчетов в каталог или в один ZIP-архив (если путь оканчивается на .zip)"""
+
+    def __init__(self, output):
+        self.output = output
+        self.archive = None
+        if output.lower().endswith('.zip'):
+            directory = os.path.dirname(os.path.abspath(output))
+            os.makedirs(directory, exist_ok=True)
+            self.archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            os.makedirs(output, exist_ok=True)
+
+    def write(self, name, content):
+        if self.archive is not None:
+            self.archive.writestr(name, content)
+        else:
+            with open(os.path.join(self.output, name), 'wb') as report_file:
+                report_file.write(content)
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+    def discard(self):
+        """Закрытие с удалением незавершенного ZIP-архива (отчеты в каталоге остаются)"""
+        self.close()
+        if self.archive is not None and os.path.exists(self.output):
+            os.remove(self.output)
+
+
+def generate_patient_reports(db, output, patient_ids=None, workers=None, on_progress=None):
+    """Пакетное формирование отчетов по пациентам в пуле процессов
+
+    Данные пациентов выбираются из базы пачками, PDF строятся параллельно
+    в отдельных процессах и записываются в каталог или ZIP-архив output.
+    on_progress(done, total) вызывается после каждого отчета (ненайденные
+    пациенты засчитываются разом после выборки); исключение из него
+    (например, отмена задачи) прерывает формирование, а незавершенный
+    ZIP-архив при этом удаляется.
+
+    Возвращает (число записанных отчетов, список ошибок [(ID пациента, сообщение)]).
+    """
+    workers = workers or os.cpu_count() or 1
+    total = len(patient_ids) if patient_ids is not None else None
+    missing = set(patient_ids) if patient_ids is not None else set()
+    written = 0
+    failures = []
+    done = 0
+
+    writer = ReportWriter(output)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    pending = {}
+    completed = False
+    try:
+        def collect(return_when):
+            nonlocal written, done
+            finished, _ = wait(pending, return_when=return_when)
+            for future in finished:
+                patient_data = pending.pop(future)
+                try:
+                    _, content = future.result()
+                    writer.write(report_filename(patient_data), content)
+                    written += 1
+                except Exception as e:
+                    failures.append((patient_data[0], str(e)))
+                done += 1
+                if on_progress:
+                    on_progress(done, total)
+
+        batches = fetch_patients(db, patient_ids)
+        try:
+            for batch in batches:
+                for patient_data in batch:
+                    missing.discard(patient_data[0])
+                    pending[pool.submit(render_patient_report, patient_data)] = patient_data
+                    if len(pending) >= workers * TASKS_PER_WORKER:
+                        collect(FIRST_COMPLETED)
+        finally:
+            batches.close()
+        if missing:
+            done += len(missing)
+            if on_progress:
+                on_progress(done, total)
+        while pending:
+            collect(FIRST_COMPLETED)
+        completed = True
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+        if completed:
+            writer.close()
+        else:
+            writer.discard()
+
+    failures.extend((patient_id, "пациент не найден") for patient_id in sorted(missing))
+    failures.sort()
+    return written, failures
+
+
+def main():
+    """Формирование отчетов по пациентам из командной строки"""
+    from database import MedicalDatabase
+
+    parser = argparse.ArgumentParser(description="Пакетное формирование PDF-отчетов по пациентам")
+    parser.add_argument('output', help="каталог для отчетов или путь к ZIP-архиву (*.zip)")
+    parser.add_argument('--ids', default='', help="ID пациентов, например \"1,5,10-20\" (по умолчанию все)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию по числу ядер)")
+    args = parser.parse_args()
+
+    patient_ids = parse_patient_ids(args.ids) or None
+
+    def show_progress(done, total):
+        if done % 100 == 0 or done == total:
+            print(f"Сформировано отчетов: {done}" + (f" из {total}" if total else ""))
+
+    db = MedicalDatabase()
+    started = time.perf_counter()
+    try:
+        written, failures = generate_patient_reports(db, args.output, patient_ids, args.workers, show_progress)
+    finally:
+        db.close()
+    print(f"Записано отчетов: {written} в {args.output} за {time.perf_counter() - started:.1f} с")
+    if failures:
+        print(f"Ошибки ({len(failures)}):")
+        for patient_id, message in failures:
+            print(f"  пациент {patient_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
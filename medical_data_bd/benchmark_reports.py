@@ -0,0 +1,82 @@
+import argparse
+import io
+import time
+from datetime import date
+from reportlab.lib.styles import ParagraphStyle
+from reports import PDFReportGenerator
+
+
+class UncachedReportGenerator(PDFReportGenerator):
+    """Прежнее поведение для сравнения: новый ParagraphStyle для каждой ячейки"""
+
+    def get_russian_style(self, style_name='Normal', **kwargs):
+        style = ParagraphStyle(f'Russian{style_name}', parent=self.styles[style_name], **kwargs)
+        style.fontName = 'DejaVuSans'
+        return style
+
+
+def make_patients(count):
+    """Синтетические строки пациентов в формате SELECT * FROM patients"""
+    return [
+        (i, f"Имя{i}", f"Фамилия{i}", date(1950 + i % 50, 1 + i % 12, 1 + i % 28),
+         'Мужской' if i % 2 else 'Женский', f"+7-900-{i:07d}", None, None, None, None)
+        for i in range(1, count + 1)
+    ]
+
+
+def time_rows(generator, patients):
+    """Время построения ячеек-абзацев для всех строк (как в generate_all_patients_report), с"""
+    started = time.perf_counter()
+    for patient in patients:
+        row_data = [
+            generator.ensure_unicode(patient[0]),
+            generator.ensure_unicode(patient[1]),
+            generator.ensure_unicode(patient[2]),
+            patient[3].strftime('%Y-%m-%d'),
+            generator.ensure_unicode(patient[4]),
+            generator.ensure_unicode(patient[5]) or 'Н/Д'
+        ]
+        [generator.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row_data]
+    return time.perf_counter() - started
+
+
+def time_report(generator, patients):
+    """Время полной генерации отчета по пациентам в память, с"""
+    started = time.perf_counter()
+    generator.generate_all_patients_report(patients, io.BytesIO())
+    return time.perf_counter() - started
+
+
+def main():
+    """Сравнение стоимости строки отчета до и после кэширования стилей"""
+    parser = argparse.ArgumentParser(description="Замер скорости генерации PDF-отчетов")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--report-rows', type=int, default=2000,
+                        help="строк для замера полной генерации отчета (0 - не замерять)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cached = PDFReportGenerator()
+    first_init = time.perf_counter() - started
+    started = time.perf_counter()
+    uncached = UncachedReportGenerator()
+    second_init = time.perf_counter() - started
+    print(f"Создание генератора: первое {first_init * 1000:.1f} мс, повторное {second_init * 1000:.1f} мс")
+
+    patients = make_patients(args.rows)
+    before = time_rows(uncached, patients)
+    after = time_rows(cached, patients)
+    print(f"Строк: {args.rows}")
+    print(f"Без кэша стилей: {before:.2f} с, {before / args.rows * 1e6:.1f} мкс на строку")
+    print(f"С кэшем стилей:  {after:.2f} с, {after / args.rows * 1e6:.1f} мкс на строку")
+    print(f"Стилей в кэше: {len(cached.style_cache)}")
+
+    if args.report_rows:
+        patients = patients[:args.report_rows]
+        before = time_report(uncached, patients)
+        after = time_report(cached, patients)
+        print(f"Полный отчет на {len(patients)} строк: без кэша {before:.2f} с, с кэшем {after:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
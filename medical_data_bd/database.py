@@ -1,209 +1,341 @@
 import psycopg2
 from psycopg2 import sql
 import os
+import sys
+from contextlib import contextmanager
 from datetime import datetime, date
 from data.sample_data import SampleData
 
+# Пул соединений, статистика запросов, подготовленные запросы, массовая загрузка
+# и пакет gui общие с приложением интернет-кафе и лежат в comp_cafe_analysis.
+# Каталог добавляется в конец пути, поэтому одноименные модули этого приложения
+# (database, validators, data) имеют приоритет.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'comp_cafe_analysis'))
+
+from db_pool import ConnectionPool
+from bulk_loader import copy_rows
+from query_stats import QueryStats
+from prepared_statements import PreparedStatementCache
+from entity_cache import EntityCache
+from migration_runner import apply_migrations
+from migrations import MIGRATIONS
+
+# Статусы назначений, которые считаются завершенными
+COMPLETED_STATUSES = ['Completed', 'Завершено']
+# Сколько последних месяцев выводить в помесячной статистике
+SUMMARY_MONTHS = 12
+
 class MedicalDatabase:
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        self.query_stats = QueryStats()
+        self.prepared_statements = PreparedStatementCache()
+        # Общие для всех вкладок справочники пациентов и врачей
+        self.patients_cache = EntityCache(self, 'patients', 'patient_id')
+        self.doctors_cache = EntityCache(self, 'doctors', 'doctor_id')
+        # Ошибки миграций - показываются пользователю при запуске
+        self.migration_problems = []
         self.connect()
         self.create_tables()
+        self.apply_migrations()
         self.prefill_data()
     
     def connect(self):
-        """Подключение к PostgreSQL базе данных"""
+        """Подключение к PostgreSQL базе данных через пул соединений"""
         try:
-            self.connection = psycopg2.connect(
+            self.pool = ConnectionPool(
+                minconn=1,
+                maxconn=int(os.getenv('DB_POOL_SIZE', '5')),
                 host=os.getenv('DB_HOST', 'localhost'),
                 database=os.getenv('DB_NAME', 'medical_db'),
                 user=os.getenv('DB_USER', 'postgres'),
                 password=os.getenv('DB_PASSWORD', 'magnususer'),
-                port=os.getenv('DB_PORT', '5432')
+                port=os.getenv('DB_PORT', '5432'),
+                cursor_factory=self.query_stats.cursor_factory(),
+                on_discard=self.prepared_statements.forget
             )
             print("Подключение к PostgreSQL установлено")
         except Exception as e:
             print(f"Ошибка подключения к базе данных: {e}")
     
+    @contextmanager
+    def get_connection(self, autocommit=False):
+        """Получение соединения из пула на время блока with"""
+        with self.pool.connection(autocommit=autocommit) as connection:
+            yield connection
+    
+    @contextmanager
+    def transaction(self):
+        """Транзакция из нескольких запросов; курсор закрывается, транзакция фиксируется при выходе"""
+        with self.pool.transaction() as cursor:
+            yield cursor
+    
     def create_tables(self):
         """Создание всех необходимых таблиц"""
         try:
-            cursor = self.connection.cursor()
-            
-            # Таблица пациентов
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS patients (
-                    patient_id SERIAL PRIMARY KEY,
-                    first_name VARCHAR(100) NOT NULL,
-                    last_name VARCHAR(100) NOT NULL,
-                    date_of_birth DATE NOT NULL,
-                    gender VARCHAR(10) NOT NULL,
-                    phone VARCHAR(20),
-                    email VARCHAR(100),
-                    address TEXT,
-                    insurance_number VARCHAR(50),
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Таблица врачей
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS doctors (
-                    doctor_id SERIAL PRIMARY KEY,
-                    first_name VARCHAR(100) NOT NULL,
-                    last_name VARCHAR(100) NOT NULL,
-                    specialization VARCHAR(100) NOT NULL,
-                    phone VARCHAR(20),
-                    email VARCHAR(100),
-                    license_number VARCHAR(50) UNIQUE,
-                    hire_date DATE,
-                    salary DECIMAL(10,2)
-                )
-            """)
+            with self.transaction() as cursor:
+                # Таблица пациентов
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS patients (
+                        patient_id SERIAL PRIMARY KEY,
+                        first_name VARCHAR(100) NOT NULL,
+                        last_name VARCHAR(100) NOT NULL,
+                        date_of_birth DATE NOT NULL,
+                        gender VARCHAR(10) NOT NULL,
+                        phone VARCHAR(20),
+                        email VARCHAR(100),
+                        address TEXT,
+                        insurance_number VARCHAR(50),
+                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
             
-            # Таблица назначений с каскадным удалением
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS appointments (
-                    appointment_id SERIAL PRIMARY KEY,
-                    patient_id INTEGER REFERENCES patients(patient_id) ON DELETE CASCADE,
-                    doctor_id INTEGER REFERENCES doctors(doctor_id) ON DELETE CASCADE,
-                    appointment_date TIMESTAMP NOT NULL,
-                    status VARCHAR(20) DEFAULT 'Scheduled',
-                    diagnosis TEXT,
-                    prescription TEXT,
-                    notes TEXT
-                )
-            """)
+                # Таблица врачей
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS doctors (
+                        doctor_id SERIAL PRIMARY KEY,
+                        first_name VARCHAR(100) NOT NULL,
+                        last_name VARCHAR(100) NOT NULL,
+                        specialization VARCHAR(100) NOT NULL,
+                        phone VARCHAR(20),
+                        email VARCHAR(100),
+                        license_number VARCHAR(50) UNIQUE,
+                        hire_date DATE,
+                        salary DECIMAL(10,2)
+                    )
+                """)
             
-            # Таблица медицинских записей с каскадным удалением
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS medical_records (
-                    record_id SERIAL PRIMARY KEY,
-                    patient_id INTEGER REFERENCES patients(patient_id) ON DELETE CASCADE,
-                    visit_date DATE NOT NULL,
-                    symptoms TEXT,
-                    diagnosis TEXT,
-                    treatment TEXT,
-                    medications TEXT,
-                    doctor_id INTEGER REFERENCES doctors(doctor_id) ON DELETE CASCADE,
-                    next_visit_date DATE
-                )
-            """)
+                # Таблица назначений с каскадным удалением
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS appointments (
+                        appointment_id SERIAL PRIMARY KEY,
+                        patient_id INTEGER REFERENCES patients(patient_id) ON DELETE CASCADE,
+                        doctor_id INTEGER REFERENCES doctors(doctor_id) ON DELETE CASCADE,
+                        appointment_date TIMESTAMP NOT NULL,
+                        status VARCHAR(20) DEFAULT 'Scheduled',
+                        diagnosis TEXT,
+                        prescription TEXT,
+                        notes TEXT
+                    )
+                """)
             
-            self.connection.commit()
-            cursor.close()
+                # Таблица медицинских записей с каскадным удалением
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS medical_records (
+                        record_id SERIAL PRIMARY KEY,
+                        patient_id INTEGER REFERENCES patients(patient_id) ON DELETE CASCADE,
+                        visit_date DATE NOT NULL,
+                        symptoms TEXT,
+                        diagnosis TEXT,
+                        treatment TEXT,
+                        medications TEXT,
+                        doctor_id INTEGER REFERENCES doctors(doctor_id) ON DELETE CASCADE,
+                        next_visit_date DATE
+                    )
+                """)
+
             print("Таблицы успешно созданы")
             
         except Exception as e:
             print(f"Ошибка создания таблиц: {e}")
 
+    def apply_migrations(self):
+        """Применение версионированных миграций схемы (индексы, полнотекстовый поиск)"""
+        try:
+            apply_migrations(self, MIGRATIONS)
+        except Exception as e:
+            self.migration_problems = [f"Ошибка применения миграций: {e}"]
+            print(self.migration_problems[0])
+
     def prefill_data(self):
         """Заполнение базы данных демонстрационными данными"""
         try:
-            cursor = self.connection.cursor()
-            
-            # Проверка существования данных
-            cursor.execute("SELECT COUNT(*) FROM patients")
-            patient_count = cursor.fetchone()[0]
+            with self.transaction() as cursor:
+                # Проверка существования данных
+                cursor.execute("SELECT COUNT(*) FROM patients")
+                patient_count = cursor.fetchone()[0]
             
-            if patient_count == 0:
-                sample_data = SampleData()
+                if patient_count == 0:
+                    sample_data = SampleData()
                 
-                # Вставка пациентов
-                cursor.executemany("""
-                    INSERT INTO patients (first_name, last_name, date_of_birth, gender, phone, email, address, insurance_number)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, sample_data.patients)
+                    # Вставка пациентов (массовая загрузка через COPY)
+                    copy_rows(cursor, 'patients', (
+                        'first_name', 'last_name', 'date_of_birth', 'gender',
+                        'phone', 'email', 'address', 'insurance_number'
+                    ), sample_data.patients)
                 
-                # Вставка врачей
-                cursor.executemany("""
-                    INSERT INTO doctors (first_name, last_name, specialization, phone, email, license_number, hire_date, salary)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, sample_data.doctors)
+                    # Вставка врачей
+                    copy_rows(cursor, 'doctors', (
+                        'first_name', 'last_name', 'specialization', 'phone',
+                        'email', 'license_number', 'hire_date', 'salary'
+                    ), sample_data.doctors)
                 
-                # Получаем ID вставленных пациентов и врачей
-                cursor.execute("SELECT patient_id FROM patients ORDER BY patient_id")
-                patient_ids = [row[0] for row in cursor.fetchall()]
+                    # Получаем ID вставленных пациентов и врачей
+                    cursor.execute("SELECT patient_id FROM patients ORDER BY patient_id")
+                    patient_ids = [row[0] for row in cursor.fetchall()]
                 
-                cursor.execute("SELECT doctor_id FROM doctors ORDER BY doctor_id")
-                doctor_ids = [row[0] for row in cursor.fetchall()]
+                    cursor.execute("SELECT doctor_id FROM doctors ORDER BY doctor_id")
+                    doctor_ids = [row[0] for row in cursor.fetchall()]
                 
-                # Вставка назначений - используем реальные ID
-                appointments_data = []
-                for i, appointment in enumerate(sample_data.appointments):
-                    if i < len(patient_ids) and i < len(doctor_ids):
-                        appointments_data.append((
-                            patient_ids[i],  # patient_id
-                            doctor_ids[i],   # doctor_id
-                            appointment[2],  # appointment_date
-                            appointment[3],  # status
-                            appointment[4],  # diagnosis
-                            appointment[5],  # prescription
-                            appointment[6]   # notes
-                        ))
+                    # Вставка назначений - используем реальные ID
+                    appointments_data = []
+                    for i, appointment in enumerate(sample_data.appointments):
+                        if i < len(patient_ids) and i < len(doctor_ids):
+                            appointments_data.append((
+                                patient_ids[i],  # patient_id
+                                doctor_ids[i],   # doctor_id
+                                appointment[2],  # appointment_date
+                                appointment[3],  # status
+                                appointment[4],  # diagnosis
+                                appointment[5],  # prescription
+                                appointment[6]   # notes
+                            ))
                 
-                cursor.executemany("""
-                    INSERT INTO appointments (patient_id, doctor_id, appointment_date, status, diagnosis, prescription, notes)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, appointments_data)
+                    copy_rows(cursor, 'appointments', (
+                        'patient_id', 'doctor_id', 'appointment_date', 'status',
+                        'diagnosis', 'prescription', 'notes'
+                    ), appointments_data)
                 
-                # Вставка медицинских записей - используем реальные ID
-                medical_records_data = []
-                for i, record in enumerate(sample_data.medical_records):
-                    if i < len(patient_ids) and i < len(doctor_ids):
-                        medical_records_data.append((
-                            patient_ids[i],  # patient_id
-                            record[1],       # visit_date
-                            record[2],       # symptoms
-                            record[3],       # diagnosis
-                            record[4],       # treatment
-                            record[5],       # medications
-                            doctor_ids[i],   # doctor_id
-                            record[7]        # next_visit_date
-                        ))
+                    # Вставка медицинских записей - используем реальные ID
+                    medical_records_data = []
+                    for i, record in enumerate(sample_data.medical_records):
+                        if i < len(patient_ids) and i < len(doctor_ids):
+                            medical_records_data.append((
+                                patient_ids[i],  # patient_id
+                                record[1],       # visit_date
+                                record[2],       # symptoms
+                                record[3],       # diagnosis
+                                record[4],       # treatment
+                                record[5],       # medications
+                                doctor_ids[i],   # doctor_id
+                                record[7]        # next_visit_date
+                            ))
                 
-                cursor.executemany("""
-                    INSERT INTO medical_records (patient_id, visit_date, symptoms, diagnosis, treatment, medications, doctor_id, next_visit_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, medical_records_data)
+                    copy_rows(cursor, 'medical_records', (
+                        'patient_id', 'visit_date', 'symptoms', 'diagnosis',
+                        'treatment', 'medications', 'doctor_id', 'next_visit_date'
+                    ), medical_records_data)
                 
-                self.connection.commit()
-                print("Демонстрационные данные успешно добавлены")
-            
-            cursor.close()
+                    print("Демонстрационные данные успешно добавлены")
             
         except Exception as e:
             print(f"Ошибка добавления демонстрационных данных: {e}")
-            # Важно: откатываем транзакцию при ошибке
-            if self.connection:
-                self.connection.rollback() 
         
     def execute_query(self, query, params=None):
         """Выполнение запроса и возврат результатов"""
         try:
-            cursor = self.connection.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                cursor.close()
-                return result, columns
-            else:
-                self.connection.commit()
-                cursor.close()
-                return True
+            # Одиночный запрос выполняется в режиме autocommit на соединении из пула
+            with self.get_connection(autocommit=True) as connection:
+                cursor = connection.cursor()
+                try:
+                    if params:
+                        # Часто повторяемые запросы выполняются как подготовленные на сервере
+                        self.prepared_statements.execute(cursor, query, params)
+                    else:
+                        cursor.execute(query)
+                    
+                    if query.strip().upper().startswith('SELECT'):
+                        result = cursor.fetchall()
+                        columns = [desc[0] for desc in cursor.description]
+                        return result, columns
+                    else:
+                        return True
+                finally:
+                    cursor.close()
         except Exception as e:
             print(f"Ошибка выполнения запроса: {e}")
-            # Откатываем транзакцию при ошибке
-            if self.connection:
-                self.connection.rollback()
             return None
     
+    def execute_query_stream(self, query, params=None, batch_size=1000):
+        """Потоковое выполнение SELECT: генератор пачек строк через серверный курсор"""
+        return self.pool.stream(query, params, batch_size)
+    
+    def get_report_summary(self):
+        """Сводная статистика для комплексного отчета, посчитанная на сервере
+        
+        Возвращает словарь:
+            patients, doctors, appointments, records, completed_appointments - общие количества;
+            by_specialization - [(специализация, врачей, назначений, завершено)];
+            by_status - [(статус, назначений)];
+            by_month - [(первый день месяца, назначений, медзаписей)] за последние
+                SUMMARY_MONTHS месяцев, в которых были данные.
+        Все запросы выполняются в одном снимке данных. При ошибке возвращается None.
+        """
+        try:
+            with self.transaction() as cursor:
+                # Согласованные между собой счетчики из одного снимка
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+                
+                cursor.execute("""
+                    SELECT (SELECT COUNT(*) FROM patients),
+                           (SELECT COUNT(*) FROM doctors),
+                           (SELECT COUNT(*) FROM medical_records)
+                """)
+                patients, doctors, records = cursor.fetchone()
+                
+                cursor.execute("""
+                    SELECT COALESCE(status, 'Не указан'), COUNT(*)
+                    FROM appointments
+                    GROUP BY 1
+                    ORDER BY 2 DESC, 1
+                """)
+                by_status = cursor.fetchall()
+                
+                # Назначения сначала группируются по врачу, затем по специализации
+                cursor.execute("""
+                    SELECT d.specialization, COUNT(*),
+                           COALESCE(SUM(a.total), 0), COALESCE(SUM(a.completed), 0)
+                    FROM doctors d
+                    LEFT JOIN (
+                        SELECT doctor_id, COUNT(*) AS total,
+                               COUNT(*) FILTER (WHERE status = ANY(%s)) AS completed
+                        FROM appointments
+                        GROUP BY doctor_id
+                    ) a ON a.doctor_id = d.doctor_id
+                    GROUP BY d.specialization
+                    ORDER BY 3 DESC, 1
+                """, (COMPLETED_STATUSES,))
+                by_specialization = [
+                    (specialization, doctor_count, int(total), int(completed))
+                    for specialization, doctor_count, total, completed in cursor.fetchall()
+                ]
+                
+                cursor.execute("""
+                    SELECT date_trunc('month', appointment_date)::date, COUNT(*)
+                    FROM appointments
+                    GROUP BY 1 ORDER BY 1 DESC LIMIT %s
+                """, (SUMMARY_MONTHS,))
+                appointments_by_month = dict(cursor.fetchall())
+                cursor.execute("""
+                    SELECT date_trunc('month', visit_date)::date, COUNT(*)
+                    FROM medical_records
+                    GROUP BY 1 ORDER BY 1 DESC LIMIT %s
+                """, (SUMMARY_MONTHS,))
+                records_by_month = dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Ошибка получения сводной статистики: {e}")
+            return None
+        
+        months = sorted(set(appointments_by_month) | set(records_by_month))[-SUMMARY_MONTHS:]
+        return {
+            'patients': patients,
+            'doctors': doctors,
+            'appointments': sum(count for _, count in by_status),
+            'records': records,
+            'completed_appointments': sum(count for status, count in by_status if status in COMPLETED_STATUSES),
+            'by_specialization': by_specialization,
+            'by_status': by_status,
+            'by_month': [
+                (month, appointments_by_month.get(month, 0), records_by_month.get(month, 0))
+                for month in months
+            ],
+        }
+    
     def close(self):
-        """Закрытие соединения с базой данных"""
-        if self.connection:
-            self.connection.close()
+        """Закрытие всех соединений с базой данных и вывод статистики запросов"""
+        if self.pool:
+            self.pool.closeall()
+        self.prepared_statements.clear()
+        if self.query_stats.top(1):
+            print("Статистика запросов (по суммарному времени):")
+            print(self.query_stats.format_summary())
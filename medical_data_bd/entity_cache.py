@@ -0,0 +1,92 @@
+import threading
+from bisect import bisect_left
+
+
+class EntityCache:
+    """Кэш справочника (пациенты или врачи) в памяти процесса
+
+    Загружается одним запросом методом load() - в рабочем потоке, так как
+    он обращается к базе. Содержимое хранится одним кортежем (по ID, список,
+    ключи имен), который заменяется целиком, поэтому peek() можно вызывать
+    из главного потока без блокировки: он возвращает уже построенный кортеж
+    или None, но никогда не выполняет запрос.
+    После изменения одной записи ее обновляют методом put() или remove()
+    без перезагрузки справочника; invalidate() сбрасывает кэш целиком.
+    """
+
+    def __init__(self, db, table, id_column):
+        self.db = db
+        self.table = table
+        self.id_column = id_column
+        self._lock = threading.Lock()
+        # (по ID: (имя, фамилия); записи (ID, имя, фамилия), отсортированные по
+        # фамилии и имени; ключи "фамилия имя" в нижнем регистре) или None
+        self._data = None
+
+    def load(self):
+        """Загрузка справочника при пустом кэше (блокирующая); возвращает содержимое"""
+        with self._lock:
+            if self._data is not None:
+                return self._data
+            result = self.db.execute_query(
+                f"SELECT {self.id_column}, first_name, last_name FROM {self.table}"
+            )
+            if result is None:
+                raise RuntimeError(f"Не удалось загрузить справочник {self.table}")
+
+            # Ключи "фамилия имя" в нижнем регистре задают порядок и служат для поиска по префиксу
+            keyed = sorted((self._name_key(row[1], row[2]), row[0], row) for row in result[0])
+            self._data = (
+                {row[0]: (row[1], row[2]) for _, _, row in keyed},
+                [row for _, _, row in keyed],
+                [key for key, _, _ in keyed],
+            )
+            return self._data
+
+    @staticmethod
+    def _name_key(first_name, last_name):
+        return f"{last_name} {first_name}".lower()
+
+    def _without(self, data, entity_id):
+        """Копии (по ID, список, ключи) без записи entity_id"""
+        by_id, entries, keys = dict(data[0]), list(data[1]), list(data[2])
+        old = by_id.pop(entity_id, None)
+        if old is not None:
+            index = bisect_left(keys, self._name_key(*old))
+            # Среди одинаковых ключей записи упорядочены по ID
+            while entries[index][0] != entity_id:
+                index += 1
+            del entries[index]
+            del keys[index]
+        return by_id, entries, keys
+
+    def put(self, entity_id, first_name, last_name):
+        """Добавление или изменение одной записи; незагруженный кэш не трогается"""
+        with self._lock:
+            if self._data is None:
+                return
+            by_id, entries, keys = self._without(self._data, entity_id)
+            key = self._name_key(first_name, last_name)
+            index = bisect_left(keys, key)
+            while index < len(keys) and keys[index] == key and entries[index][0] < entity_id:
+                index += 1
+            by_id[entity_id] = (first_name, last_name)
+            entries.insert(index, (entity_id, first_name, last_name))
+            keys.insert(index, key)
+            # Читатели в главном потоке видят либо старое, либо новое содержимое целиком
+            self._data = (by_id, entries, keys)
+
+    def remove(self, entity_id):
+        """Удаление одной записи из загруженного кэша"""
+        with self._lock:
+            if self._data is not None:
+                self._data = self._without(self._data, entity_id)
+
+    def peek(self):
+        """Содержимое (по ID, список, ключи имен), если кэш уже загружен, иначе None"""
+        return self._data
+
+    def invalidate(self):
+        """Сброс кэша целиком; следующий load() перечитает справочник"""
+        with self._lock:
+            self._data = None
@@ -0,0 +1,103 @@
+import sys
+
+# Версионированные миграции схемы: (версия, описание, список шагов).
+# Применяются по возрастанию версии, каждая в отдельной транзакции (migration_runner
+# из comp_cafe_analysis), и только один раз - а не при каждом запуске приложения.
+MIGRATIONS = [
+    (1, "Составные индексы для постраничного вывода", [
+        # Сортировка по дате и ID, в том числе с фильтром по врачу, пациенту или статусу
+        "CREATE INDEX IF NOT EXISTS idx_appointments_date_id ON appointments "
+        "(appointment_date DESC, appointment_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date ON appointments "
+        "(doctor_id, appointment_date DESC, appointment_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_appointments_patient_date ON appointments "
+        "(patient_id, appointment_date DESC, appointment_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_appointments_status_date ON appointments "
+        "(status, appointment_date DESC, appointment_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_records_date_id ON medical_records "
+        "(visit_date DESC, record_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_records_doctor_date ON medical_records "
+        "(doctor_id, visit_date DESC, record_id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_records_patient_date ON medical_records "
+        "(patient_id, visit_date DESC, record_id DESC)",
+    ]),
+    (2, "Полнотекстовый поиск по медкартам и назначениям", [
+        # Вычисляемые столбцы tsvector (русская конфигурация) пересчитываются сервером
+        # при каждой записи. Веса: диагноз важнее симптомов, симптомы важнее лечения.
+        # Добавление столбца перезаписывает таблицу - поэтому это миграция.
+        """
+        ALTER TABLE medical_records ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(diagnosis, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(symptoms, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(treatment, '')), 'C') ||
+            setweight(to_tsvector('russian', coalesce(medications, '')), 'C')
+        ) STORED
+        """,
+        """
+        ALTER TABLE appointments ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(diagnosis, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(prescription, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(notes, '')), 'C')
+        ) STORED
+        """,
+        # GIN-индексы находят совпадения без просмотра всей таблицы
+        "CREATE INDEX IF NOT EXISTS idx_records_search ON medical_records USING GIN (search_vector)",
+        "CREATE INDEX IF NOT EXISTS idx_appointments_search ON appointments USING GIN (search_vector)",
+    ]),
+]
+
+# Проверки планов: (индекс, запрос, параметры). Запрос должен использовать индекс,
+# если планировщику запрещено последовательное сканирование.
+INDEX_CHECKS = [
+    ("idx_appointments_date_id", """
+        SELECT appointment_id FROM appointments
+        WHERE (appointment_date, appointment_id) < (%s, %s)
+        ORDER BY appointment_date DESC, appointment_id DESC
+        LIMIT 100
+    """, ('2025-01-01', 0)),
+    ("idx_appointments_doctor_date", """
+        SELECT appointment_id FROM appointments
+        WHERE doctor_id = %s
+        ORDER BY appointment_date DESC, appointment_id DESC
+        LIMIT 100
+    """, (1,)),
+    ("idx_records_date_id", """
+        SELECT record_id FROM medical_records
+        WHERE (visit_date, record_id) < (%s, %s)
+        ORDER BY visit_date DESC, record_id DESC
+        LIMIT 100
+    """, ('2025-01-01', 0)),
+    ("idx_records_patient_date", """
+        SELECT record_id FROM medical_records
+        WHERE patient_id = %s
+        ORDER BY visit_date DESC, record_id DESC
+        LIMIT 100
+    """, (1,)),
+    ("idx_records_search", """
+        SELECT record_id FROM medical_records
+        WHERE search_vector @@ websearch_to_tsquery('russian', %s)
+    """, ('инфекция',)),
+    ("idx_appointments_search", """
+        SELECT appointment_id FROM appointments
+        WHERE search_vector @@ websearch_to_tsquery('russian', %s)
+    """, ('инфекция',)),
+]
+
+
+def main():
+    """Запуск из командной строки: применение миграций и проверка индексов"""
+    from database import MedicalDatabase
+    from migration_runner import report_indexes
+
+    db = MedicalDatabase()
+    try:
+        all_used = report_indexes(db, INDEX_CHECKS)
+        return 0 if all_used and not db.migration_problems else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
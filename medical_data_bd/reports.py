@@ -1,5 +1,6 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.pdfgen import canvas
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
@@ -7,56 +8,152 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from datetime import datetime
 import os
+import threading
+
+# Результат регистрации шрифтов: шрифты регистрируются один раз на процесс
+_fonts_registered = None
+_fonts_lock = threading.Lock()
+
+
+def register_russian_fonts():
+    """Регистрация шрифта с поддержкой кириллицы (повторные вызовы возвращают прежний результат)"""
+    global _fonts_registered
+    with _fonts_lock:
+        if _fonts_registered is None:
+            _fonts_registered = _register_fonts()
+        return _fonts_registered
+
+
+def _register_fonts():
+    try:
+        # Попробуем найти и зарегистрировать шрифт с поддержкой кириллицы
+        font_paths = [
+            # Шрифт, поставляемый вместе с приложением (не зависит от текущего каталога)
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "DejaVuSans.ttf"),
+            "DejavuSans.ttf",
+            "arial.ttf",
+            "C:/Windows/Fonts/arial.ttf",
+            "C:/Windows/Fonts/times.ttf",
+            "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
+        ]
+        
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+                pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', font_path))
+                print(f"Шрифт зарегистрирован: {font_path}")
+                return True
+        
+        # Если шрифты не найдены, используем стандартные
+        print("Предупреждение: Русские шрифты не найдены. Используются стандартные шрифты.")
+        return False
+        
+    except Exception as e:
+        print(f"Ошибка при регистрации шрифтов: {e}")
+        return False
+
+
+def table_style(header_color, body_color, with_header):
+    """Стиль таблицы отчета; без заголовка все строки оформляются как тело"""
+    body_start = 1 if with_header else 0
+    commands = [
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BACKGROUND', (0, body_start), (-1, -1), body_color),
+        ('FONTNAME', (0, body_start), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, body_start), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]
+    if with_header:
+        commands += [
+            ('BACKGROUND', (0, 0), (-1, 0), header_color),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12)
+        ]
+    return TableStyle(commands)
+
+
+class PageWriter:
+    """Вывод элементов (абзацев, таблиц) на страницы A4 сверху вниз
+
+    Нужен для потоковых отчетов: doc.build() принимает только готовый список
+    элементов, а здесь каждый элемент выводится сразу (wrapOn/drawOn) и
+    больше не хранится. Поля страницы - как у SimpleDocTemplate по умолчанию.
+    """
+
+    def __init__(self, filename, pagesize=A4, margin=inch):
+        self.canv = canvas.Canvas(filename, pagesize=pagesize)
+        self.margin = margin
+        self.width = pagesize[0] - 2 * margin
+        self.top = pagesize[1] - margin
+        self.y = self.top
+
+    @property
+    def at_top(self):
+        return self.y >= self.top
+
+    def remaining(self):
+        """Свободная высота на текущей странице"""
+        return self.y - self.margin
+
+    def new_page(self):
+        self.canv.showPage()
+        self.y = self.top
+
+    def add(self, flowable):
+        """Вывод элемента целиком; если он не помещается, то с новой страницы"""
+        space_before = 0 if self.at_top else flowable.getSpaceBefore()
+        _, height = flowable.wrapOn(self.canv, self.width, self.remaining())
+        if not self.at_top and space_before + height > self.remaining():
+            self.new_page()
+            space_before = 0
+        self.y -= space_before + height
+        flowable.drawOn(self.canv, self.margin, self.y)
+        self.y -= flowable.getSpaceAfter()
+
+    def save(self):
+        self.canv.save()
+
 
 class PDFReportGenerator:
     def __init__(self):
         self.styles = getSampleStyleSheet()
+        # Стили абзацев по ключу (базовый стиль, параметры): один объект на все ячейки
+        self.style_cache = {}
         self.setup_russian_fonts()
     
     def setup_russian_fonts(self):
         """Настройка шрифтов для поддержки русского языка"""
-        try:
-            # Попробуем найти и зарегистрировать шрифт с поддержкой кириллицы
-            font_paths = [
-                "DejavuSans.ttf",
-                "arial.ttf",
-                "C:/Windows/Fonts/arial.ttf",
-                "C:/Windows/Fonts/times.ttf",
-                "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-            ]
-            
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                    pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', font_path))
-                    print(f"Шрифт зарегистрирован: {font_path}")
-                    return True
-            
-            # Если шрифты не найдены, используем стандартные
-            print("Предупреждение: Русские шрифты не найдены. Используются стандартные шрифты.")
-            return False
-            
-        except Exception as e:
-            print(f"Ошибка при регистрации шрифтов: {e}")
-            return False
+        return register_russian_fonts()
     
-    def create_russian_paragraph(self, text, style_name='Normal', **kwargs):
-        """Создание параграфа с поддержкой русского текста"""
+    def get_russian_style(self, style_name='Normal', **kwargs):
+        """Стиль абзаца с русским шрифтом из кэша (создается при первом запросе)"""
         try:
+            key = (style_name, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            # Нехэшируемые параметры - стиль не кэшируется
+            key = None
+        
+        style = self.style_cache.get(key) if key is not None else None
+        if style is None:
             # Создаем кастомный стиль с русским шрифтом
-            russian_style = ParagraphStyle(
+            style = ParagraphStyle(
                 f'Russian{style_name}',
                 parent=self.styles[style_name],
                 **kwargs
             )
-            
-            # Пытаемся использовать русский шрифт
-            try:
-                russian_style.fontName = 'DejaVuSans'
-            except:
-                pass  # Если шрифт не зарегистрирован, используем стандартный
-                
-            return Paragraph(text, russian_style)
+            style.fontName = 'DejaVuSans'
+            if key is not None:
+                style = self.style_cache.setdefault(key, style)
+        return style
+    
+    def create_russian_paragraph(self, text, style_name='Normal', **kwargs):
+        """Создание параграфа с поддержкой русского текста"""
+        try:
+            return Paragraph(text, self.get_russian_style(style_name, **kwargs))
         except Exception as e:
             print(f"Ошибка создания русского параграфа: {e}")
             return Paragraph(text, self.styles[style_name])
@@ -72,6 +169,58 @@ class PDFReportGenerator:
         except:
             return ""
     
+    def build_table_report(self, filename, title, header_row, rows, col_fractions,
+                           header_color, body_color, summary):
+        """Потоковое построение отчета-таблицы
+        
+        rows - итератор строк (списки текстов ячеек), например из серверного
+        курсора. Высота каждой строки измеряется отдельно; строки набираются,
+        пока помещаются на страницу, и выводятся одной таблицей с заголовком.
+        В памяти находятся только строки текущей страницы. summary()
+        вызывается после вывода всех строк и возвращает текст сводки.
+        """
+        writer = PageWriter(filename)
+        col_widths = [writer.width * fraction for fraction in col_fractions]
+        header_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=10) for text in header_row]
+        body_style = table_style(header_color, body_color, False)
+        page_style = table_style(header_color, body_color, True)
+        
+        def measure(cells, style):
+            table = Table([cells], colWidths=col_widths, style=style)
+            return table.wrapOn(writer.canv, writer.width, writer.top)[1]
+        
+        header_height = measure(header_cells, page_style)
+        page_rows = []
+        page_heights = []
+        rows_height = 0
+        
+        def flush():
+            # Высоты уже известны - ячейки не переверстываются для расчета размеров
+            writer.add(Table([header_cells] + page_rows, colWidths=col_widths,
+                             rowHeights=[header_height] + page_heights, style=page_style))
+        
+        writer.add(self.create_russian_paragraph(title, 'Heading1', fontSize=16, spaceAfter=30, alignment=1))
+        for row in rows:
+            cells = [self.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row]
+            height = measure(cells, body_style)
+            # Строка, которая не помещается даже на пустую страницу, выводится как есть
+            fits = header_height + rows_height + height <= writer.remaining()
+            if not fits and (page_rows or not writer.at_top):
+                if page_rows:
+                    flush()
+                    page_rows, page_heights, rows_height = [], [], 0
+                writer.new_page()
+            page_rows.append(cells)
+            page_heights.append(height)
+            rows_height += height
+        # Последняя страница таблицы (для пустого отчета - только заголовок)
+        flush()
+        
+        # Сводка
+        writer.add(self.create_russian_paragraph(summary(), 'Normal', fontSize=10, spaceBefore=20))
+        writer.save()
+        return filename
+    
     def generate_patient_report(self, patient_data, filename="patient_report.pdf"):
         """Генерация медицинского отчета пациента"""
         doc = SimpleDocTemplate(filename, pagesize=A4)
@@ -139,223 +288,91 @@ class PDFReportGenerator:
         return filename
 
     def generate_all_patients_report(self, patients_data, filename="all_patients_report.pdf"):
-        """Генерация отчета по всем пациентам"""
-        doc = SimpleDocTemplate(filename, pagesize=A4)
-        story = []
-        
-        # Заголовок
-        title = self.create_russian_paragraph(
-            "ОТЧЕТ ПО ВСЕМ ПАЦИЕНТАМ", 
-            'Heading1',
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1
+        """Генерация отчета по всем пациентам (patients_data - список или итератор строк)"""
+        stats = {'total': 0}
+        
+        def rows():
+            for patient in patients_data:
+                stats['total'] += 1
+                yield [
+                    self.ensure_unicode(patient[0]),
+                    self.ensure_unicode(patient[1]),
+                    self.ensure_unicode(patient[2]),
+                    patient[3].strftime('%Y-%m-%d') if patient[3] else 'Н/Д',
+                    self.ensure_unicode(patient[4]),
+                    self.ensure_unicode(patient[5]) or 'Н/Д'
+                ]
+        
+        return self.build_table_report(
+            filename,
+            "ОТЧЕТ ПО ВСЕМ ПАЦИЕНТАМ",
+            ['ID пациента', 'Имя', 'Фамилия', 'Дата рождения', 'Пол', 'Телефон'],
+            rows(),
+            [0.12, 0.17, 0.2, 0.17, 0.12, 0.22],
+            colors.darkblue,
+            colors.lightblue,
+            lambda: f"Всего пациентов: {stats['total']}"
         )
-        story.append(title)
-        
-        # Заголовки таблицы
-        header_row = [
-            'ID пациента', 'Имя', 'Фамилия', 'Дата рождения', 'Пол', 'Телефон'
-        ]
-        
-        # Создаем данные таблицы с поддержкой Unicode
-        table_data = []
-        
-        # Заголовок таблицы
-        header_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=10) for text in header_row]
-        table_data.append(header_cells)
-        
-        # Данные пациентов
-        for patient in patients_data:
-            row_data = [
-                self.ensure_unicode(patient[0]),
-                self.ensure_unicode(patient[1]),
-                self.ensure_unicode(patient[2]),
-                patient[3].strftime('%Y-%m-%d') if patient[3] else 'Н/Д',
-                self.ensure_unicode(patient[4]),
-                self.ensure_unicode(patient[5]) or 'Н/Д'
-            ]
-            
-            row_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row_data]
-            table_data.append(row_cells)
-        
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(table)
-        
-        # Сводка
-        total = len(patients_data)
-        summary_text = f"Всего пациентов: {total}"
-        summary = self.create_russian_paragraph(
-            summary_text, 
-            'Normal',
-            fontSize=10,
-            spaceBefore=20
-        )
-        story.append(summary)
-        
-        doc.build(story)
-        return filename
 
     def generate_all_doctors_report(self, doctors_data, filename="all_doctors_report.pdf"):
-        """Генерация отчета по всем врачам"""
-        doc = SimpleDocTemplate(filename, pagesize=A4)
-        story = []
-        
-        # Заголовок
-        title = self.create_russian_paragraph(
-            "ОТЧЕТ ПО ВСЕМ ВРАЧАМ", 
-            'Heading1',
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1
-        )
-        story.append(title)
-        
-        # Заголовки таблицы
-        header_row = [
-            'ID врача', 'Имя', 'Фамилия', 'Специализация', 'Телефон', 'Email'
-        ]
-        
-        # Создаем данные таблицы с поддержкой Unicode
-        table_data = []
-        
-        # Заголовок таблицы
-        header_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=10) for text in header_row]
-        table_data.append(header_cells)
-        
-        # Данные врачей
-        for doctor in doctors_data:
-            row_data = [
-                self.ensure_unicode(doctor[0]),
-                self.ensure_unicode(doctor[1]),
-                self.ensure_unicode(doctor[2]),
-                self.ensure_unicode(doctor[3]),
-                self.ensure_unicode(doctor[4]) or 'Н/Д',
-                self.ensure_unicode(doctor[5]) or 'Н/Д'
-            ]
-            
-            row_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row_data]
-            table_data.append(row_cells)
-        
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(table)
-        
-        # Сводка
-        total = len(doctors_data)
-        summary_text = f"Всего врачей: {total}"
-        summary = self.create_russian_paragraph(
-            summary_text, 
-            'Normal',
-            fontSize=10,
-            spaceBefore=20
+        """Генерация отчета по всем врачам (doctors_data - список или итератор строк)"""
+        stats = {'total': 0}
+        
+        def rows():
+            for doctor in doctors_data:
+                stats['total'] += 1
+                yield [
+                    self.ensure_unicode(doctor[0]),
+                    self.ensure_unicode(doctor[1]),
+                    self.ensure_unicode(doctor[2]),
+                    self.ensure_unicode(doctor[3]),
+                    self.ensure_unicode(doctor[4]) or 'Н/Д',
+                    self.ensure_unicode(doctor[5]) or 'Н/Д'
+                ]
+        
+        return self.build_table_report(
+            filename,
+            "ОТЧЕТ ПО ВСЕМ ВРАЧАМ",
+            ['ID врача', 'Имя', 'Фамилия', 'Специализация', 'Телефон', 'Email'],
+            rows(),
+            [0.1, 0.14, 0.16, 0.2, 0.17, 0.23],
+            colors.darkgreen,
+            colors.lightgreen,
+            lambda: f"Всего врачей: {stats['total']}"
         )
-        story.append(summary)
-        
-        doc.build(story)
-        return filename
-    
+
     def generate_appointments_report(self, appointments_data, filename="appointments_report.pdf"):
-        """Генерация отчета по назначениям"""
-        doc = SimpleDocTemplate(filename, pagesize=A4)
-        story = []
-        
-        # Заголовок
-        title = self.create_russian_paragraph(
-            "ОТЧЕТ ПО НАЗНАЧЕНИЯМ", 
-            'Heading1',
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1
-        )
-        story.append(title)
-        
-        # Заголовки таблицы
-        header_row = [
-            'ID назначения', 'Пациент', 'Врач', 'Дата', 'Статус', 'Диагноз'
-        ]
-        
-        # Создаем данные таблицы с поддержкой Unicode
-        table_data = []
-        
-        # Заголовок таблицы
-        header_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=10) for text in header_row]
-        table_data.append(header_cells)
-        
-        # Данные назначений
-        for appointment in appointments_data:
-            row_data = [
-                self.ensure_unicode(appointment[0]),
-                f"{self.ensure_unicode(appointment[1])} {self.ensure_unicode(appointment[2])}",
-                f"Доктор {self.ensure_unicode(appointment[3])}",
-                appointment[4].strftime('%Y-%m-%d %H:%M'),
-                self.ensure_unicode(appointment[5]),
-                self.ensure_unicode(appointment[6]) or 'Н/Д'
-            ]
-            
-            row_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row_data]
-            table_data.append(row_cells)
-        
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(table)
-        
-        # Сводка
-        total = len(appointments_data)
-        completed = len([a for a in appointments_data if a[5] in ['Completed', 'Завершено']])
-        pending = total - completed
-        
-        summary_text = f"Всего назначений: {total} | Завершено: {completed} | Ожидают: {pending}"
-        summary = self.create_russian_paragraph(
-            summary_text, 
-            'Normal',
-            fontSize=10,
-            spaceBefore=20
+        """Генерация отчета по назначениям (appointments_data - список или итератор строк)"""
+        stats = {'total': 0, 'completed': 0}
+        
+        def rows():
+            for appointment in appointments_data:
+                stats['total'] += 1
+                if appointment[5] in ['Completed', 'Завершено']:
+                    stats['completed'] += 1
+                yield [
+                    self.ensure_unicode(appointment[0]),
+                    f"{self.ensure_unicode(appointment[1])} {self.ensure_unicode(appointment[2])}",
+                    f"Доктор {self.ensure_unicode(appointment[3])}",
+                    appointment[4].strftime('%Y-%m-%d %H:%M'),
+                    self.ensure_unicode(appointment[5]),
+                    self.ensure_unicode(appointment[6]) or 'Н/Д'
+                ]
+        
+        def summary():
+            pending = stats['total'] - stats['completed']
+            return f"Всего назначений: {stats['total']} | Завершено: {stats['completed']} | Ожидают: {pending}"
+        
+        return self.build_table_report(
+            filename,
+            "ОТЧЕТ ПО НАЗНАЧЕНИЯМ",
+            ['ID назначения', 'Пациент', 'Врач', 'Дата', 'Статус', 'Диагноз'],
+            rows(),
+            [0.12, 0.2, 0.17, 0.17, 0.14, 0.2],
+            colors.blue,
+            colors.beige,
+            summary
         )
-        story.append(summary)
-        
-        doc.build(story)
-        return filename
 
     def generate_doctor_report(self, doctor_data, filename="doctor_report.pdf"):
         """Генерация отчета по врачу"""
@@ -423,79 +440,56 @@ class PDFReportGenerator:
         return filename
 
     def generate_medical_records_report(self, medical_records_data, filename="medical_records_report.pdf"):
-        """Генерация отчета по медицинским картам"""
-        doc = SimpleDocTemplate(filename, pagesize=A4)
-        story = []
-        
-        # Заголовок
-        title = self.create_russian_paragraph(
-            "ОТЧЕТ ПО МЕДИЦИНСКИМ КАРТАМ", 
-            'Heading1',
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1
+        """Генерация отчета по медицинским картам (medical_records_data - список или итератор строк)"""
+        stats = {'total': 0}
+        
+        def rows():
+            for record in medical_records_data:
+                stats['total'] += 1
+                yield [
+                    self.ensure_unicode(record[0]),
+                    self.ensure_unicode(record[1]),
+                    self.ensure_unicode(record[2]),
+                    record[3].strftime('%Y-%m-%d') if record[3] else 'Н/Д',
+                    self.ensure_unicode(record[4]) or 'Н/Д',
+                    self.ensure_unicode(record[5]) or 'Н/Д'
+                ]
+        
+        return self.build_table_report(
+            filename,
+            "ОТЧЕТ ПО МЕДИЦИНСКИМ КАРТАМ",
+            ['ID записи', 'Пациент', 'Врач', 'Дата визита', 'Диагноз', 'Лечение'],
+            rows(),
+            [0.1, 0.18, 0.18, 0.14, 0.2, 0.2],
+            colors.purple,
+            colors.lavender,
+            lambda: f"Всего медицинских записей: {stats['total']}"
         )
-        story.append(title)
-        
-        # Заголовки таблицы
-        header_row = [
-            'ID записи', 'Пациент', 'Врач', 'Дата визита', 'Диагноз', 'Лечение'
-        ]
-        
-        # Создаем данные таблицы с поддержкой Unicode
+
+    def create_summary_table(self, data, col_widths):
+        """Небольшая таблица статистики: первая строка - заголовок"""
         table_data = []
+        for row in data:
+            table_data.append([self.create_russian_paragraph(self.ensure_unicode(cell), 'Normal', fontSize=10) for cell in row])
         
-        # Заголовок таблицы
-        header_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=10) for text in header_row]
-        table_data.append(header_cells)
-        
-        # Данные медицинских записей
-        for record in medical_records_data:
-            row_data = [
-                self.ensure_unicode(record[0]),
-                self.ensure_unicode(record[1]),
-                self.ensure_unicode(record[2]),
-                record[3].strftime('%Y-%m-%d') if record[3] else 'Н/Д',
-                self.ensure_unicode(record[4]) or 'Н/Д',
-                self.ensure_unicode(record[5]) or 'Н/Д'
-            ]
-            
-            row_cells = [self.create_russian_paragraph(text, 'Normal', fontSize=9) for text in row_data]
-            table_data.append(row_cells)
-        
-        table = Table(table_data, repeatRows=1)
+        table = Table(table_data, colWidths=col_widths)
         table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
+        return table
+    
+    def generate_comprehensive_report(self, summary, filename="comprehensive_report.pdf"):
+        """Генерация комплексного отчета
         
-        story.append(table)
-        
-        # Сводка
-        total = len(medical_records_data)
-        summary_text = f"Всего медицинских записей: {total}"
-        summary = self.create_russian_paragraph(
-            summary_text, 
-            'Normal',
-            fontSize=10,
-            spaceBefore=20
-        )
-        story.append(summary)
-        
-        doc.build(story)
-        return filename
-
-    def generate_comprehensive_report(self, patients_data, doctors_data, appointments_data, medical_records_data, filename="comprehensive_report.pdf"):
-        """Генерация комплексного отчета"""
+        summary - сводная статистика из MedicalDatabase.get_report_summary();
+        объем отчета не зависит от числа записей в базе.
+        """
         doc = SimpleDocTemplate(filename, pagesize=A4)
         story = []
         
@@ -529,7 +523,7 @@ class PDFReportGenerator:
         )
         story.append(patients_title)
         
-        patients_count = len(patients_data)
+        patients_count = summary['patients']
         patients_summary = self.create_russian_paragraph(
             f"Всего пациентов в системе: {patients_count}", 
             'Normal',
@@ -547,7 +541,7 @@ class PDFReportGenerator:
         )
         story.append(doctors_title)
         
-        doctors_count = len(doctors_data)
+        doctors_count = summary['doctors']
         doctors_summary = self.create_russian_paragraph(
             f"Всего врачей в системе: {doctors_count}", 
             'Normal',
@@ -556,6 +550,12 @@ class PDFReportGenerator:
         )
         story.append(doctors_summary)
         
+        if summary['by_specialization']:
+            specialization_data = [["Специализация", "Врачей", "Назначений", "Завершено"]]
+            specialization_data += [list(row) for row in summary['by_specialization']]
+            story.append(self.create_summary_table(specialization_data, [2.5*inch, 1*inch, 1.2*inch, 1.2*inch]))
+            story.append(Spacer(1, 10))
+        
         # Раздел назначений
         appointments_title = self.create_russian_paragraph(
             "3. СТАТИСТИКА ПО НАЗНАЧЕНИЯМ", 
@@ -565,8 +565,8 @@ class PDFReportGenerator:
         )
         story.append(appointments_title)
         
-        appointments_count = len(appointments_data)
-        completed_appointments = len([a for a in appointments_data if a[5] in ['Completed', 'Завершено']])
+        appointments_count = summary['appointments']
+        completed_appointments = summary['completed_appointments']
         pending_appointments = appointments_count - completed_appointments
         
         appointments_summary = self.create_russian_paragraph(
@@ -577,6 +577,11 @@ class PDFReportGenerator:
         )
         story.append(appointments_summary)
         
+        if summary['by_status']:
+            status_data = [["Статус", "Назначений"]] + [list(row) for row in summary['by_status']]
+            story.append(self.create_summary_table(status_data, [3*inch, 2*inch]))
+            story.append(Spacer(1, 10))
+        
         # Раздел медицинских записей
         records_title = self.create_russian_paragraph(
             "4. СТАТИСТИКА ПО МЕДИЦИНСКИМ ЗАПИСЯМ", 
@@ -586,7 +591,7 @@ class PDFReportGenerator:
         )
         story.append(records_title)
         
-        records_count = len(medical_records_data)
+        records_count = summary['records']
         records_summary = self.create_russian_paragraph(
             f"Всего медицинских записей: {records_count}", 
             'Normal',
@@ -595,6 +600,23 @@ class PDFReportGenerator:
         )
         story.append(records_summary)
         
+        # Помесячная динамика
+        if summary['by_month']:
+            months_title = self.create_russian_paragraph(
+                "5. ДИНАМИКА ПО МЕСЯЦАМ", 
+                'Heading2',
+                fontSize=14,
+                spaceAfter=20
+            )
+            story.append(months_title)
+            
+            month_data = [["Месяц", "Назначения", "Медицинские записи"]]
+            month_data += [
+                [month.strftime('%Y-%m'), appointments, records]
+                for month, appointments, records in summary['by_month']
+            ]
+            story.append(self.create_summary_table(month_data, [2*inch, 1.5*inch, 2*inch]))
+        
         story.append(PageBreak())
         
         # Общая сводка
@@ -609,33 +631,14 @@ class PDFReportGenerator:
         
         summary_data = [
             ["Показатель", "Количество"],
-            ["Пациенты", str(patients_count)],
-            ["Врачи", str(doctors_count)],
-            ["Назначения", str(appointments_count)],
-            ["Медицинские записи", str(records_count)],
-            ["Завершенные назначения", str(completed_appointments)],
-            ["Ожидающие назначения", str(pending_appointments)]
+            ["Пациенты", patients_count],
+            ["Врачи", doctors_count],
+            ["Назначения", appointments_count],
+            ["Медицинские записи", records_count],
+            ["Завершенные назначения", completed_appointments],
+            ["Ожидающие назначения", pending_appointments]
         ]
-        
-        summary_table_data = []
-        for row in summary_data:
-            table_row = []
-            for cell in row:
-                table_row.append(self.create_russian_paragraph(cell, 'Normal', fontSize=10))
-            summary_table_data.append(table_row)
-        
-        summary_table = Table(summary_table_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
+        story.append(self.create_summary_table(summary_data, [3*inch, 2*inch]))
         
         doc.build(story)
         return filename